@@ -0,0 +1,138 @@
+import sys
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import yaml
+
+from src import api_fetch
+from src.utils import load_json, save_json
+
+"""
+Times the fetch path against the offline stand-in API at multiples of our league count.
+
+python benchmarks/bench_fetch.py
+python benchmarks/bench_fetch.py --scales 10 100 --latency 0.02 --error-rate 0.01
+python benchmarks/bench_fetch.py --rate-limit 200 --output data/stats/bench_fetch.json
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def start_server(args):
+    """Run benchmarks/fake_api.py in its own process so it does not share our GIL."""
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "benchmarks/fake_api.py"),
+        "--port",
+        str(args.port),
+    ]
+    command += ["--latency", str(args.latency), "--error-rate", str(args.error_rate)]
+    if args.rate_limit:
+        command += ["--rate-limit", str(args.rate_limit)]
+    server = subprocess.Popen(command)
+    for _ in range(500):
+        try:
+            httpx.get(f"{os.environ['API_BASE_URL']}/_stats")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.02)
+    server.terminate()
+    raise RuntimeError("fake API server did not start")
+
+
+def prepare_workdir(workdir, n_leagues, client_rate, max_concurrency):
+    """Lay out config/ and data/ for one run so api_fetch works on relative paths."""
+    config = yaml.safe_load(open(os.path.join(ROOT, "config/config.yaml"), encoding="utf-8"))
+    config["api"].update(
+        {"rate_per_second": client_rate, "burst": client_rate, "max_concurrency": max_concurrency}
+    )
+    os.makedirs(os.path.join(workdir, "config"))
+    os.makedirs(os.path.join(workdir, "data/raw"))
+    with open(os.path.join(workdir, "config/config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    leagues = [{"name": f"League {i}", "id": i} for i in range(1, n_leagues + 1)]
+    save_json(leagues, os.path.join(workdir, "config/leagues.json"))
+    save_json([], os.path.join(workdir, "data/raw/matches_raw.json"))
+
+
+def timed(func, *args):
+    base_url = os.environ["API_BASE_URL"]
+    httpx.get(f"{base_url}/_stats/reset")
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 3), **httpx.get(f"{base_url}/_stats").json()}
+
+
+def bench(n_leagues, client_rate, max_concurrency):
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    cwd = os.getcwd()
+    try:
+        prepare_workdir(workdir, n_leagues, client_rate, max_concurrency)
+        os.chdir(workdir)
+        return {
+            "get_historical_data": timed(api_fetch.get_historical_data),
+            "main": timed(api_fetch.main),
+            "fetch_upcoming_matches": timed(api_fetch.fetch_upcoming_matches),
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--client-rate", type=float, default=10_000)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    os.environ["API_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("API_KEY", "offline")
+    base_leagues = len(load_json(os.path.join(ROOT, "config/leagues.json")))
+
+    server = start_server(args)
+    results = []
+    print(f"{'leagues':>8} {'stage':<24} {'seconds':>9} {'calls':>8} {'MB':>8} {'calls/s':>9}")
+    try:
+        for scale in args.scales:
+            n_leagues = base_leagues * scale
+            runs = bench(n_leagues, args.client_rate, args.max_concurrency)
+            for stage, run in runs.items():
+                rate = run["requests"] / run["seconds"] if run["seconds"] else 0.0
+                print(
+                    f"{n_leagues:>8} {stage:<24} {run['seconds']:>9.2f} {run['requests']:>8} "
+                    f"{run['bytes'] / 1e6:>8.2f} {rate:>9.0f}"
+                )
+            results.append({"scale": scale, "leagues": n_leagues, "stages": runs})
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        report = {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit": args.rate_limit,
+            "results": results,
+        }
+        save_json(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
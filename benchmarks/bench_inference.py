@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from src.forest_engine import CompiledForest
+from src.model_store import BundleLoader
+
+"""
+Compares sklearn predict_proba with CompiledForest on the trained bundles in models/.
+
+python benchmarks/bench_inference.py
+python benchmarks/bench_inference.py --targets Winner BTTS --sizes 1 10 1000 --repeats 50
+"""
+
+
+def best_of(func, X, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(bundle, sizes, repeats, seed=0):
+    model = bundle["model"]
+    start = time.perf_counter()
+    engine = CompiledForest.from_forest(model)
+    compile_seconds = time.perf_counter() - start
+    rng = np.random.RandomState(seed)
+    rows = []
+    for n in sizes:
+        # Features are standardised, so N(0, 1) rows exercise both sides of most splits.
+        X = pd.DataFrame(rng.randn(n, model.n_features_in_), columns=bundle["feature_columns"])
+        sk = best_of(model.predict_proba, X, repeats)
+        compiled = best_of(engine.predict_proba, X, repeats)
+        diff = np.abs(np.asarray(engine.predict_proba(X)) - np.asarray(model.predict_proba(X)))
+        rows.append((n, sk, compiled, float(diff.max())))
+    return compile_seconds, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        default=["Winner", "BTTS", "Over_1_5", "Over_2_5", "Double_Chance"],
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 1000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    loader = BundleLoader(args.model_dir)
+    print(
+        f"{'target':<14} {'batch':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8} {'max diff':>9}"
+    )
+    for target in args.targets:
+        bundle = loader.load(os.path.join(args.model_dir, f"bundle_{target}.pkl"))
+        compile_seconds, rows = bench(bundle, args.sizes, args.repeats)
+        for n, sk, compiled, diff in rows:
+            print(
+                f"{target:<14} {n:>6} {sk * 1e3:>11.3f} {compiled * 1e3:>12.3f} "
+                f"{sk / compiled:>7.1f}x {diff:>9.1e}"
+            )
+        print(
+            f"{target:<14} compiled {len(bundle['model'].estimators_)} trees in {compile_seconds * 1e3:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import sys
+import os
+import gc
+import time
+import shutil
+import logging
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+import sklearn
+import yaml
+
+from benchmarks.synthetic import (
+    generate_matches,
+    generate_upcoming_games,
+    league_config,
+    write_matches_raw,
+)
+from src.data_prep import preprocess_data
+from src.features import add_recent_form_features, apply_all_features
+from src.predict import prepare_features
+from src.train import train_model
+from src.utils import load_json, save_json
+
+"""
+Times and memory-profiles the ML pipeline stages on synthetic match histories.
+
+Each size runs in a scratch directory holding its own config, leagues.json and
+matches_raw.json, so nothing under data/ or models/ is touched. Every invocation appends
+one run (commit, library versions, per-stage results) to --output, so regressions show up
+when runs from different commits are compared.
+
+python benchmarks/bench_pipeline.py
+python benchmarks/bench_pipeline.py --sizes 10000 100000 1000000 --stages preprocess_data
+python benchmarks/bench_pipeline.py --sizes 10000 --no-memory --output /tmp/bench.json
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STAGES = [
+    "apply_all_features",
+    "add_recent_form_features",
+    "preprocess_data",
+    "train_model",
+    "prepare_features",
+]
+
+
+def measure(func, memory=True):
+    """Run func and return (result, stats); peak Python/NumPy allocations need a second run.
+
+    tracemalloc slows allocation-heavy code several times over, so timings come from an
+    untraced run and peak_mb from a separate traced one.
+    """
+    gc.collect()
+    cpu, start = time.process_time(), time.perf_counter()
+    result = func()
+    stats = {
+        "seconds": round(time.perf_counter() - start, 4),
+        "cpu_seconds": round(time.process_time() - cpu, 4),
+    }
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = func()
+        stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    stats["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result, stats
+
+
+def prepare_workdir(workdir, df, n_jobs):
+    config = yaml.safe_load(open(os.path.join(ROOT, "config/config.yaml"), encoding="utf-8"))
+    config["train_params"]["n_jobs"] = n_jobs
+    config["train_params"]["incremental"]["enabled"] = False
+    config["paths"]["tuned_params"] = None
+    leagues = league_config(df)
+    for path in ("config", "data/raw", "models"):
+        os.makedirs(os.path.join(workdir, path))
+    with open(os.path.join(workdir, "config/config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    save_json(leagues, os.path.join(workdir, "config/leagues.json"))
+    write_matches_raw(df, os.path.join(workdir, "data/raw/matches_raw.json"))
+    return leagues
+
+
+def bench(n_matches, stages, n_games, n_jobs, memory):
+    start = time.perf_counter()
+    df = generate_matches(n_matches)
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    leagues = prepare_workdir(workdir, df, n_jobs)
+    setup_seconds = time.perf_counter() - start
+    frame = df.rename(
+        columns={"team1_goals": "Team1Goals", "team2_goals": "Team2Goals", "league": "League"}
+    )
+    games = generate_upcoming_games(df, leagues, n_games)
+    results = {}
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        if "apply_all_features" in stages:
+            _, results["apply_all_features"] = measure(
+                lambda: apply_all_features(frame.copy()), memory
+            )
+        if "add_recent_form_features" in stages:
+            _, results["add_recent_form_features"] = measure(
+                lambda: add_recent_form_features(frame, n_games=5), memory
+            )
+        if "preprocess_data" in stages or "prepare_features" in stages:
+            prep, stats = measure(lambda: preprocess_data(feature_store_path=None), memory)
+            if "preprocess_data" in stages:
+                results["preprocess_data"] = stats
+            _, feature_columns, scaler, le_league = prep
+            del prep
+        if "train_model" in stages:
+            _, results["train_model"] = measure(lambda: train_model(force=True), memory)
+        if "prepare_features" in stages:
+            _, results["prepare_features"] = measure(
+                lambda: prepare_features(
+                    [dict(g) for g in games],
+                    feature_columns,
+                    scaler=scaler,
+                    encoders={"le_league": le_league},
+                ),
+                memory,
+            )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "matches": len(df),
+        "leagues": len(leagues),
+        "upcoming_games": n_games,
+        "setup_seconds": round(setup_seconds, 2),
+        "stages": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--games", type=int, default=50, help="Upcoming fixtures to prepare")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="train_params.n_jobs to use")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--output", default="data/stats/bench_pipeline.json")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    run = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    print(f"{'matches':>9} {'stage':<26} {'seconds':>9} {'cpu s':>9} {'peak MB':>9} {'RSS MB':>9}")
+    for size in args.sizes:
+        result = bench(size, args.stages, args.games, args.n_jobs, not args.no_memory)
+        for stage, stats in result["stages"].items():
+            print(
+                f"{size:>9} {stage:<26} {stats['seconds']:>9.3f} {stats['cpu_seconds']:>9.3f} "
+                f"{stats.get('peak_mb', float('nan')):>9.1f} {stats['max_rss_mb']:>9.1f}"
+            )
+        run["results"].append(result)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        history = load_json(args.output) if os.path.exists(args.output) else {"runs": []}
+        history["runs"].append(run)
+        save_json(history, args.output)
+        print(f"Appended run to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
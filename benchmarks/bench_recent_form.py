@@ -0,0 +1,42 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic import generate_matches
+from src.features import add_recent_form_features
+
+"""
+python benchmarks/bench_recent_form.py
+python benchmarks/bench_recent_form.py --sizes 10000 100000 1000000
+"""
+
+
+def bench(n_matches, repeats=3):
+    df = generate_matches(n_matches).rename(
+        columns={"team1_goals": "Team1Goals", "team2_goals": "Team2Goals", "league": "League"}
+    )
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        add_recent_form_features(df, n_games=5)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'seconds':>10} {'us/match':>10}")
+    for n in args.sizes:
+        seconds = bench(n, args.repeats)
+        print(f"{n:>10} {seconds:>10.3f} {seconds / n * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.batcher import MicroBatcher
+from src.match_store import read_matches
+from src.model_registry import ModelRegistry
+from src.serving import FixtureContext, predict_matches
+
+"""
+Throughput of single-fixture predictions under concurrency, with and without MicroBatcher.
+
+Closed-loop clients each send --requests fixtures one after another against the bundles in
+models/ and the local match store. "direct" scores every request on its own in a worker
+thread (as a plain sync route would); "batched" goes through MicroBatcher.
+
+python benchmarks/bench_serving.py
+python benchmarks/bench_serving.py --clients 1 16 64 --window-ms 1 2 5
+"""
+
+
+def sample_matches(n, seed=0):
+    df = read_matches(columns=["league", "team1", "team2"], categorical=False).tail(500)
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.choice(len(df), n)]
+    return [
+        {
+            "match_id": i,
+            "date": "01/06/2026",
+            "time": "20:00",
+            "league": row.league,
+            "home_team": row.team1,
+            "away_team": row.team2,
+            "odds": {"home": 2.1, "draw": 3.3, "away": 3.6},
+        }
+        for i, row in enumerate(rows.itertuples())
+    ]
+
+
+async def run_clients(call, matches, clients, requests):
+    latencies = []
+
+    async def client(k):
+        for j in range(requests):
+            start = time.perf_counter()
+            await call(matches[(k * requests + j) % len(matches)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(k) for k in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = np.asarray(latencies) * 1e3
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+async def bench(bundles, context, matches, clients, requests, window, max_batch):
+    async def direct(match):
+        return await asyncio.to_thread(predict_matches, bundles, context, [match])
+
+    batcher = MicroBatcher(
+        lambda items: predict_matches(bundles, context, items), max_batch=max_batch, window=window
+    )
+    batcher.start()
+    try:
+        results = {
+            "direct": await run_clients(direct, matches, clients, requests),
+            "batched": await run_clients(batcher.submit, matches, clients, requests),
+        }
+        return results, batcher.metrics()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--window-ms", type=float, nargs="+", default=[2.0])
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    registry = ModelRegistry.from_config()
+    registry.refresh()
+    bundles = registry.current.bundles
+    context = FixtureContext.from_store()
+    matches = sample_matches(1000)
+    predict_matches(bundles, context, matches[:2])
+
+    print(
+        f"{'clients':>7} {'window':>7} {'mode':<8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'mean batch':>10}"
+    )
+    for clients in args.clients:
+        for window_ms in args.window_ms:
+            results, metrics = asyncio.run(
+                bench(
+                    bundles,
+                    context,
+                    matches,
+                    clients,
+                    args.requests,
+                    window_ms / 1000,
+                    args.max_batch,
+                )
+            )
+            for mode, (throughput, p50, p99) in results.items():
+                batch = metrics["batch_size"]["mean"] if mode == "batched" else 1
+                print(
+                    f"{clients:>7} {window_ms:>7.1f} {mode:<8} {throughput:>9.0f} {p50:>8.2f} "
+                    f"{p99:>8.2f} {batch:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+
+"""
+Offline stand-in for the SoccerDataAPI endpoints used by src/api_fetch.py.
+
+Every league id gets PAST finished and UPCOMING scheduled fixtures dated around today,
+derived deterministically from the ids, so any config/leagues.json can be served.
+
+python benchmarks/fake_api.py --port 8765 --latency 0.02 --error-rate 0.01 --rate-limit 50
+API_BASE_URL=http://127.0.0.1:8765 API_KEY=offline python -m src.api_fetch
+"""
+
+TEAMS_PER_LEAGUE = 20
+PAST_PER_LEAGUE = 2
+UPCOMING_PER_LEAGUE = 2
+MATCH_ID_STRIDE = 1000
+TEAM_ID_STRIDE = 100
+
+
+def _fixture(league_id, k):
+    """(match_id, home_id, away_id, day offset from today) of fixture k in a league."""
+    rng = random.Random(league_id * MATCH_ID_STRIDE + k)
+    home, away = rng.sample(range(TEAMS_PER_LEAGUE), 2)
+    offset = -(k + 1) if k < PAST_PER_LEAGUE else k - PAST_PER_LEAGUE + 1
+    return (
+        league_id * MATCH_ID_STRIDE + k,
+        league_id * TEAM_ID_STRIDE + home,
+        league_id * TEAM_ID_STRIDE + away,
+        offset,
+    )
+
+
+def _team(team_id):
+    return {"id": team_id, "name": f"Team {team_id}"}
+
+
+def _odds(match_id):
+    rng = random.Random(match_id)
+    return {
+        "home": round(rng.uniform(1.2, 5), 2),
+        "draw": 3.4,
+        "away": round(rng.uniform(1.2, 8), 2),
+    }
+
+
+def _goals(match_id):
+    rng = random.Random(-match_id)
+    return {"home_ft_goals": rng.randint(0, 4), "away_ft_goals": rng.randint(0, 3)}
+
+
+def league_matches(league_id):
+    matches = []
+    for k in range(PAST_PER_LEAGUE + UPCOMING_PER_LEAGUE):
+        match_id, home, away, offset = _fixture(league_id, k)
+        matches.append(
+            {
+                "id": match_id,
+                "date": (date.today() + timedelta(days=offset)).strftime("%d/%m/%Y"),
+                "time": "15:00",
+                "status": "finished" if offset < 0 else "pre-game",
+                "teams": {"home": _team(home), "away": _team(away)},
+                "odds": {"match_winner": _odds(match_id)},
+            }
+        )
+    return {
+        "league_id": league_id,
+        "league_name": f"League {league_id}",
+        "is_cup": False,
+        "stage": [{"stage_id": 1, "stage_name": "Regular Season", "matches": matches}],
+    }
+
+
+def match_details(match_id):
+    league_id, k = divmod(match_id, MATCH_ID_STRIDE)
+    _, home, away, offset = _fixture(league_id, k)
+    return {
+        "id": match_id,
+        "date": (date.today() + timedelta(days=offset)).strftime("%d/%m/%Y"),
+        "time": "15:00",
+        "status": "finished" if offset < 0 else "pre-game",
+        "league": {"id": league_id, "name": f"League {league_id}"},
+        "teams": {"home": _team(home), "away": _team(away)},
+        "goals": _goals(match_id),
+    }
+
+
+def head_to_head(team1_id, team2_id):
+    rng = random.Random(team1_id * 100_003 + team2_id)
+    wins1, wins2, draws = rng.randint(0, 6), rng.randint(0, 6), rng.randint(1, 4)
+    return {
+        "stats": {
+            "overall": {
+                "overall_games_played": wins1 + wins2 + draws,
+                "overall_team1_wins": wins1,
+                "overall_team2_wins": wins2,
+                "overall_draws": draws,
+                "overall_team1_scored": wins1 * 2 + draws,
+                "overall_team2_scored": wins2 * 2 + draws,
+            },
+            "team1_at_home": {
+                "team1_wins_at_home": wins1 // 2,
+                "team1_draws_at_home": draws // 2,
+                "team1_losses_at_home": wins2 // 2,
+                "team1_scored_at_home": wins1 + draws // 2,
+                "team1_conceded_at_home": wins2 + draws // 2,
+            },
+            "team2_at_home": {
+                "team2_wins_at_home": wins2 - wins2 // 2,
+                "team2_draws_at_home": draws - draws // 2,
+                "team2_losses_at_home": wins1 - wins1 // 2,
+                "team2_scored_at_home": wins2 + draws // 2,
+                "team2_conceded_at_home": wins1 + draws // 2,
+            },
+        }
+    }
+
+
+def standings(league_id):
+    order = list(range(TEAMS_PER_LEAGUE))
+    random.Random(league_id).shuffle(order)
+    table = [
+        {"team_id": league_id * TEAM_ID_STRIDE + team, "position": position + 1}
+        for position, team in enumerate(order)
+    ]
+    return {"league_id": league_id, "stage": [{"stage_id": 1, "standings": table}]}
+
+
+class TrafficStats:
+    """ASGI wrapper counting requests, status codes and response body bytes on the wire.
+
+    GET /_stats returns the counters and GET /_stats/reset clears them; neither is counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.statuses = {}
+
+    def snapshot(self):
+        return {"requests": self.requests, "bytes": self.bytes, "statuses": dict(self.statuses)}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if scope["path"] in ("/_stats", "/_stats/reset"):
+            if scope["path"] == "/_stats/reset":
+                self.reset()
+            return await JSONResponse(self.snapshot())(scope, receive, send)
+        self.requests += 1
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                self.statuses[message["status"]] = self.statuses.get(message["status"], 0) + 1
+            elif message["type"] == "http.response.body":
+                self.bytes += len(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, counting_send)
+
+
+def create_app(latency=0.0, error_rate=0.0, rate_limit=None, seed=0):
+    """Build the stand-in app wrapped in TrafficStats.
+
+    latency: seconds added to every response. error_rate: fraction of requests answered
+    with a 503. rate_limit: requests per second allowed before answering 429 with
+    Retry-After (None disables it).
+    """
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+    rng = random.Random(seed)
+    window = {"start": time.monotonic(), "count": 0}
+
+    @app.middleware("http")
+    async def simulate_conditions(request: Request, call_next):
+        if "auth_token" not in request.query_params:
+            return JSONResponse({"detail": "auth_token required"}, status_code=401)
+        if latency:
+            await asyncio.sleep(latency)
+        if rate_limit:
+            now = time.monotonic()
+            if now - window["start"] >= 1:
+                window["start"], window["count"] = now, 0
+            window["count"] += 1
+            if window["count"] > rate_limit:
+                retry_after = max(0.0, 1 - (now - window["start"]))
+                return JSONResponse(
+                    {"detail": "rate limit exceeded"},
+                    status_code=429,
+                    headers={"Retry-After": f"{retry_after:.2f}"},
+                )
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"detail": "upstream unavailable"}, status_code=503)
+        return await call_next(request)
+
+    @app.get("/matches/")
+    async def matches(league_id: int):
+        return league_matches(league_id)
+
+    @app.get("/match/")
+    async def match(match_id: int):
+        return match_details(match_id)
+
+    @app.get("/head-to-head/")
+    async def h2h(team_1_id: int, team_2_id: int):
+        return head_to_head(team_1_id, team_2_id)
+
+    @app.get("/standing/")
+    async def standing(league_id: int):
+        return standings(league_id)
+
+    return TrafficStats(app)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate, args.rate_limit)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
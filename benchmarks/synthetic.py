@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+"""
+Synthetic stand-in for data/raw/matches_raw.json at any size.
+
+Leagues play double round-robin seasons (August to May) between teams whose strength
+drifts from season to season. Strength drives goals, table positions and bookmaker odds,
+and h2h fields count the earlier meetings of each pair in the generated history, so the
+features carry roughly the signal real data does.
+
+python -c "from benchmarks.synthetic import *; write_matches_raw(generate_matches(10_000), 'm.json')"
+"""
+
+LEAGUE_NAMES = [
+    "Premier League",
+    "Ligue 1",
+    "Bundesliga",
+    "Serie A",
+    "Eredivisie",
+    "La Liga",
+    "Primeira Liga",
+    "Championship",
+    "Jupiler Pro League",
+    "Super Lig",
+]
+CITIES = [
+    "Northbridge", "Eastfield", "Westport", "Southam", "Kingsford", "Ashby", "Brookvale",
+    "Carlton", "Dunmore", "Elmstead", "Fairhaven", "Glenrock", "Hartley", "Ironbridge",
+    "Lakeside", "Millbrook", "Newhaven", "Oakridge", "Portland", "Redcliff",
+]  # fmt: skip
+SUFFIXES = ["United", "City", "Athletic", "Rovers", "Wanderers", "Albion", "Town", "FC"]
+KICK_OFFS = np.array(["12:30", "15:00", "17:30", "20:00"])
+SEASON_DAYS = 290
+LAST_SEASON = 2025
+H2H_FIELDS = [
+    "h2h_games_played",
+    "h2h_team1_wins",
+    "h2h_team2_wins",
+    "h2h_draws",
+    "h2h_team1_scored",
+    "h2h_team2_scored",
+    "h2h_team1_home_wins",
+    "h2h_team1_home_draws",
+    "h2h_team1_home_losses",
+    "h2h_team1_home_scored",
+    "h2h_team1_home_conceded",
+    "h2h_team2_home_wins",
+    "h2h_team2_home_draws",
+    "h2h_team2_home_losses",
+    "h2h_team2_home_scored",
+    "h2h_team2_home_conceded",
+]
+RAW_COLUMNS = (
+    ["date", "time", "league", "is_cup", "team1", "team2", "team1_goals", "team2_goals"]
+    + ["team1_rank", "team2_rank"]
+    + H2H_FIELDS
+)
+
+
+def league_names(n_leagues):
+    return [
+        LEAGUE_NAMES[i] if i < len(LEAGUE_NAMES) else f"League {i + 1}" for i in range(n_leagues)
+    ]
+
+
+def team_names(league, teams_per_league):
+    return [
+        f"{CITIES[t % len(CITIES)]} {SUFFIXES[(t // len(CITIES) + league) % len(SUFFIXES)]}"
+        for t in range(teams_per_league)
+    ]
+
+
+def _prior_totals(keys, values):
+    """Per-row sum of values over the earlier rows sharing the row's key (rows date-sorted)."""
+    frame = pd.DataFrame(values)
+    return (frame.groupby(keys, sort=False).cumsum() - frame).to_numpy()
+
+
+def generate_matches(n_matches, n_leagues=None, teams_per_league=20, seed=42, max_seasons=10):
+    """Generate a date-sorted DataFrame with matches_raw.json fields for n_matches matches.
+
+    Odds come as flat home_win/draw/away_win columns (see write_matches_raw for the nested
+    file layout). Without n_leagues, enough leagues are created to fit n_matches into at
+    most max_seasons seasons; the last season is cut short, like a season in progress.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = teams_per_league
+    n_pairs = n_teams * (n_teams - 1)
+    if n_leagues is None:
+        n_leagues = max(8, -(-n_matches // (n_pairs * max_seasons)))
+    n_seasons = max(1, -(-n_matches // (n_leagues * n_pairs)))
+
+    pair_home, pair_away = np.nonzero(~np.eye(n_teams, dtype=bool))
+    season = np.repeat(np.arange(n_seasons), n_leagues * n_pairs)
+    league = np.tile(np.repeat(np.arange(n_leagues), n_pairs), n_seasons)
+    home = np.tile(pair_home, n_seasons * n_leagues)
+    away = np.tile(pair_away, n_seasons * n_leagues)
+    day = rng.integers(0, SEASON_DAYS, len(season))
+    order = np.lexsort((rng.random(len(season)), day, season))[:n_matches]
+    season, league, home, away, day = (a[order] for a in (season, league, home, away, day))
+    n = len(season)
+
+    strength = rng.normal(0, 0.35, (n_leagues, n_teams)) + np.cumsum(
+        rng.normal(0, 0.1, (n_seasons, n_leagues, n_teams)), axis=0
+    )
+    noisy = strength + rng.normal(0, 0.15, strength.shape)
+    rank = np.argsort(np.argsort(-noisy, axis=2), axis=2) + 1
+    diff = strength[season, league, home] - strength[season, league, away]
+    goals1 = rng.poisson(1.45 * np.exp(diff / 2))
+    goals2 = rng.poisson(1.15 * np.exp(-diff / 2))
+
+    weights = np.column_stack(
+        [np.exp(1.3 * (diff + 0.2)), 0.9 * np.exp(-0.3 * np.abs(diff)), np.exp(-1.3 * (diff + 0.2))]
+    )
+    probs = weights / weights.sum(axis=1, keepdims=True)
+    odds = np.maximum(np.round(1 / (probs * 1.06), 2), 1.01)
+
+    win1, draw, win2 = goals1 > goals2, goals1 == goals2, goals1 < goals2
+    team1_low = home < away
+    pair = (league * n_teams + np.minimum(home, away)) * n_teams + np.maximum(home, away)
+    low_win, high_win = np.where(team1_low, win1, win2), np.where(team1_low, win2, win1)
+    low_goals = np.where(team1_low, goals1, goals2)
+    high_goals = np.where(team1_low, goals2, goals1)
+    played, low_w, high_w, draws, low_g, high_g = _prior_totals(
+        pair,
+        {
+            "played": np.ones(n, dtype=int),
+            "low_win": low_win.astype(int),
+            "high_win": high_win.astype(int),
+            "draw": draw.astype(int),
+            "low_goals": low_goals,
+            "high_goals": high_goals,
+        },
+    ).T
+    fixture = (league * n_teams + home) * n_teams + away
+    home_w, home_d, home_l, home_s, home_c = _prior_totals(
+        fixture,
+        {
+            "win": win1.astype(int),
+            "draw": draw.astype(int),
+            "loss": win2.astype(int),
+            "scored": goals1,
+            "conceded": goals2,
+        },
+    ).T
+    t1_wins, t2_wins = np.where(team1_low, low_w, high_w), np.where(team1_low, high_w, low_w)
+    t1_scored = np.where(team1_low, low_g, high_g)
+    t2_scored = np.where(team1_low, high_g, low_g)
+
+    names = np.array([team_names(lg, n_teams) for lg in range(n_leagues)], dtype=object)
+    first_season = LAST_SEASON - n_seasons + 1
+    season_start = pd.to_datetime([f"{first_season + s}-08-01" for s in range(n_seasons)])
+    dates = season_start[season] + pd.to_timedelta(day, unit="D")
+    return pd.DataFrame(
+        {
+            "date": dates.strftime("%d/%m/%Y"),
+            "time": KICK_OFFS[rng.integers(0, len(KICK_OFFS), n)],
+            "league": np.array(league_names(n_leagues), dtype=object)[league],
+            "is_cup": False,
+            "team1": names[league, home],
+            "team2": names[league, away],
+            "team1_goals": goals1,
+            "team2_goals": goals2,
+            "team1_rank": rank[season, league, home],
+            "team2_rank": rank[season, league, away],
+            "h2h_games_played": played,
+            "h2h_team1_wins": t1_wins,
+            "h2h_team2_wins": t2_wins,
+            "h2h_draws": draws,
+            "h2h_team1_scored": t1_scored,
+            "h2h_team2_scored": t2_scored,
+            "h2h_team1_home_wins": home_w,
+            "h2h_team1_home_draws": home_d,
+            "h2h_team1_home_losses": home_l,
+            "h2h_team1_home_scored": home_s,
+            "h2h_team1_home_conceded": home_c,
+            # Team 2's home record against team 1 is what remains of the overall one.
+            "h2h_team2_home_wins": t2_wins - home_l,
+            "h2h_team2_home_draws": draws - home_d,
+            "h2h_team2_home_losses": t1_wins - home_w,
+            "h2h_team2_home_scored": t2_scored - home_c,
+            "h2h_team2_home_conceded": t1_scored - home_s,
+            "home_win": odds[:, 0],
+            "draw": odds[:, 1],
+            "away_win": odds[:, 2],
+        }
+    )
+
+
+def write_matches_raw(df, path):
+    """Write generate_matches output in the matches_raw.json layout (odds nested)."""
+    raw = df[RAW_COLUMNS].copy()
+    raw["odds"] = [
+        {"home_win": h, "draw": d, "away_win": a}
+        for h, d, a in zip(df["home_win"], df["draw"], df["away_win"])
+    ]
+    raw.to_json(path, orient="records", force_ascii=False)
+
+
+def league_config(df, first_id=1000):
+    """config/leagues.json entries for the leagues of a generated frame."""
+    return [{"name": name, "id": first_id + i} for i, name in enumerate(df["league"].unique())]
+
+
+def generate_upcoming_games(df, leagues, n_games, seed=0):
+    """Fixture dicts shaped like api_fetch's upcoming games, for teams in the generated data.
+
+    Ranks, h2h and odds are taken from sampled recent matches and the fixtures are dated
+    in the week after the last generated match.
+    """
+    rng = np.random.default_rng(seed)
+    league_ids = {lg["name"]: lg["id"] for lg in leagues}
+    recent = df.tail(max(n_games, min(len(df), 5000)))
+    rows = recent.iloc[rng.choice(len(recent), n_games, replace=n_games > len(recent))]
+    last = pd.to_datetime(df["date"], dayfirst=True).max()
+    games = []
+    for k, row in enumerate(rows.itertuples(index=False)):
+        game = {
+            "date": (last + pd.Timedelta(days=int(rng.integers(1, 8)))).strftime("%d/%m/%Y"),
+            "time": row.time,
+            "home_name": row.team1,
+            "away_name": row.team2,
+            "home_id": f"{row.league}/{row.team1}",
+            "away_id": f"{row.league}/{row.team2}",
+            "match_id": 10_000_000 + k,
+            "league_id": league_ids[row.league],
+            "is_cup": False,
+            "odds": {"home": row.home_win, "draw": row.draw, "away": row.away_win},
+            "team1_rank": int(row.team1_rank),
+            "team2_rank": int(row.team2_rank),
+        }
+        game.update({field: int(getattr(row, field)) for field in H2H_FIELDS})
+        games.append(game)
+    return games
@@ -1,5 +1,7 @@
 from src.api_fetch import main as update_historical_data
+from src.instrument import PIPELINE_REPORT_PATH, span, start_run, write_report
 from src.train import train_model
+from src.tune import tune_model
 from src.predict import main as run_predictions
 from scripts.check_results import main as check_results
 
@@ -7,31 +9,62 @@ import argparse
 
 """
 python main.py --mode train
+python main.py --mode tune
 python main.py --mode predict
 python main.py --mode full
+python main.py --mode full --force
+python main.py --mode full --profile train --trace-memory
+
+Every run writes per-stage timings to data/stats/pipeline_run.json. --profile takes a
+stage (fetch, train, tune, predict, check_results) or an instrumented function such as
+add_recent_form_features and saves its cProfile output under data/stats/profiles/.
 """
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=["train", "predict", "full"], required=True)
+    parser.add_argument("--mode", choices=["train", "tune", "predict", "full"], required=True)
+    parser.add_argument(
+        "--force", action="store_true", help="Rerun stages even if their inputs are unchanged"
+    )
+    parser.add_argument("--profile", metavar="STAGE", help="Run STAGE under cProfile")
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower)"
+    )
+    parser.add_argument("--report", default=PIPELINE_REPORT_PATH, help="Run report path")
     args = parser.parse_args()
 
-    if args.mode == "train":
-        print("Updating historical data...")
-        update_historical_data()
-        print("Training model...")
-        train_model()
-
-    elif args.mode == "predict":
-        print("Making predictions...")
-        preds = run_predictions()
-        print("Predictions: ", preds)
-
-    elif args.mode == "full":
-        print("Updating historical data...")
-        update_historical_data()
-        print("Training model...")
-        train_model()
-        print("Making predictions...")
-        run_predictions()
-        check_results()
+    start_run(args.mode, profile=args.profile, trace_memory=args.trace_memory)
+    try:
+        if args.mode == "train":
+            print("Updating historical data...")
+            with span("fetch"):
+                update_historical_data()
+            print("Training model...")
+            with span("train"):
+                train_model(force=args.force)
+
+        elif args.mode == "tune":
+            print("Tuning model parameters...")
+            with span("tune"):
+                tune_model()
+
+        elif args.mode == "predict":
+            print("Making predictions...")
+            with span("predict"):
+                preds = run_predictions(force=args.force)
+            print("Predictions: ", preds)
+
+        elif args.mode == "full":
+            print("Updating historical data...")
+            with span("fetch"):
+                update_historical_data()
+            print("Training model...")
+            with span("train"):
+                train_model(force=args.force)
+            print("Making predictions...")
+            with span("predict"):
+                run_predictions(force=args.force)
+            with span("check_results"):
+                check_results(force=args.force)
+    finally:
+        write_report(args.report)
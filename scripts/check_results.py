@@ -3,91 +3,115 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.utils import load_json, save_json
-
-PREDICTIONS_HISTORY_PATH = os.path.join("data", "predict", "predictions_history.json")
-MATCHES_RAW_PATH = os.path.join("data", "raw", "matches_raw.json")
+from src.fingerprint import (
+    data_digest,
+    files_digest,
+    is_up_to_date,
+    save_fingerprint,
+    stage_fingerprint,
+)
+from src.instrument import set_rows
+from src.match_store import read_matches
+from src.prediction_history import HISTORY_DB_PATH, PredictionHistory
+from src.utils import save_json
+
+import logging
+
+FINGERPRINT_PATH = os.path.join("data", "stats", "check_results_fingerprint.json")
+MARKETS = ["winner", "over_2_5", "over_1_5", "double_chance", "btts"]
+
+
+def _fingerprint():
+    return stage_fingerprint(history=files_digest([HISTORY_DB_PATH]), data=data_digest())
+
+
+def score_prediction(pred, team1_goals, team2_goals):
+    """{market: 1 if the predicted class was right, else 0} for a finished match."""
+    winner_pred = pred["predictions"]["winner"]["class"]
+    if winner_pred == 0:
+        winner_correct = team1_goals > team2_goals
+    elif winner_pred == 1:
+        winner_correct = team1_goals == team2_goals
+    elif winner_pred == 2:
+        winner_correct = team1_goals < team2_goals
+    else:
+        winner_correct = False
+
+    over_2_5_pred = pred["predictions"]["over_2_5"]["class"]
+    over_2_5_correct = (
+        (team1_goals + team2_goals > 2.5)
+        if over_2_5_pred == 1
+        else (team1_goals + team2_goals <= 2.5)
+    )
+
+    over_1_5_pred = pred["predictions"]["over_1_5"]["class"]
+    over_1_5_correct = (
+        (team1_goals + team2_goals > 1.5)
+        if over_1_5_pred == 1
+        else (team1_goals + team2_goals <= 1.5)
+    )
+
+    double_chance_pred = pred["predictions"]["double_chance"]["class"]
+    if double_chance_pred == 0:
+        double_chance_correct = team1_goals >= team2_goals
+    elif double_chance_pred == 1:
+        double_chance_correct = team1_goals <= team2_goals
+    elif double_chance_pred == 2:
+        double_chance_correct = team1_goals != team2_goals
+    else:
+        double_chance_correct = False
 
+    btts_pred = pred["predictions"]["btts"]["class"]
+    if btts_pred == 1:
+        btts_correct = team1_goals > 0 and team2_goals > 0
+    else:
+        btts_correct = not (team1_goals > 0 and team2_goals > 0)
 
-def main():
-    predictions = load_json(PREDICTIONS_HISTORY_PATH)
-    matches = load_json(MATCHES_RAW_PATH)
-    matches_by_id = {m["match_id"]: m for m in matches if "match_id" in m}
+    return {
+        "winner": int(winner_correct),
+        "over_2_5": int(over_2_5_correct),
+        "over_1_5": int(over_1_5_correct),
+        "double_chance": int(double_chance_correct),
+        "btts": int(btts_correct),
+    }
 
-    finished_count = 0
-    unfinished_count = 0
 
-    correct = {"winner": 0, "over_2_5": 0, "over_1_5": 0, "double_chance": 0, "btts": 0}
-    total = {"winner": 0, "over_2_5": 0, "over_1_5": 0, "double_chance": 0, "btts": 0}
-    for pred in predictions:
-        match = matches_by_id.get(pred.get("match_id"))
-        team1_goals = match.get("team1_goals") if match else None
-        team2_goals = match.get("team2_goals") if match else None
+def main(force=False):
+    """Score predictions whose matches have finished and write prediction_stats.json.
 
-        if team1_goals is not None and team2_goals is not None:
-            pred["finished"] = True
-            finished_count += 1
-            team1_goals = match.get("team1_goals")
-            team2_goals = match.get("team2_goals")
-            if team1_goals is not None and team2_goals is not None:
-                winner_pred = pred["predictions"]["winner"]["class"]
-                if winner_pred == 0:
-                    winner_correct = team1_goals > team2_goals
-                elif winner_pred == 1:
-                    winner_correct = team1_goals == team2_goals
-                elif winner_pred == 2:
-                    winner_correct = team1_goals < team2_goals
-                else:
-                    winner_correct = False
-                correct["winner"] += int(winner_correct)
-                total["winner"] += 1
-
-                over_2_5_pred = pred["predictions"]["over_2_5"]["class"]
-                over_2_5_correct = (
-                    (team1_goals + team2_goals > 2.5)
-                    if over_2_5_pred == 1
-                    else (team1_goals + team2_goals <= 2.5)
-                )
-                correct["over_2_5"] += int(over_2_5_correct)
-                total["over_2_5"] += 1
-
-                over_1_5_pred = pred["predictions"]["over_1_5"]["class"]
-                over_1_5_correct = (
-                    (team1_goals + team2_goals > 1.5)
-                    if over_1_5_pred == 1
-                    else (team1_goals + team2_goals <= 1.5)
-                )
-                correct["over_1_5"] += int(over_1_5_correct)
-                total["over_1_5"] += 1
-
-                double_chance_pred = pred["predictions"]["double_chance"]["class"]
-                if double_chance_pred == 0:
-                    double_chance_correct = team1_goals >= team2_goals
-                elif double_chance_pred == 1:
-                    double_chance_correct = team1_goals <= team2_goals
-                elif double_chance_pred == 2:
-                    double_chance_correct = team1_goals != team2_goals
-                else:
-                    double_chance_correct = False
-                correct["double_chance"] += int(double_chance_correct)
-                total["double_chance"] += 1
-
-                btts_pred = pred["predictions"]["btts"]["class"]
-                if btts_pred == 1:
-                    btts_correct = team1_goals > 0 and team2_goals > 0
-                else:
-                    btts_correct = not (team1_goals > 0 and team2_goals > 0)
-                correct["btts"] += int(btts_correct)
-                total["btts"] += 1
-        else:
-            pred["finished"] = False
+    Only unfinished records are read; each newly finished one stores its outcome, and the
+    stats are summed from the stored outcomes of every finished record.
+    """
+    stats_path = os.path.join("data", "stats", "prediction_stats.json")
+    if not force and is_up_to_date(FINGERPRINT_PATH, _fingerprint(), [stats_path]):
+        logging.info("[INFO] Predictions history and results unchanged; skipping result check.")
+        return
+    with PredictionHistory() as history:
+        matches = read_matches(columns=["match_id", "team1_goals", "team2_goals"])
+        matches = matches[matches["match_id"].notna()].drop_duplicates("match_id", keep="last")
+        matches = matches.astype(object)
+        matches = matches.where(matches.notna(), None)
+        matches_by_id = matches.set_index("match_id").to_dict("index")
+
+        results = []
+        unfinished_count = 0
+        for pred in history.stream(finished=False):
             unfinished_count += 1
-    save_json(predictions, PREDICTIONS_HISTORY_PATH)
+            match = matches_by_id.get(pred.get("match_id"))
+            team1_goals = match.get("team1_goals") if match else None
+            team2_goals = match.get("team2_goals") if match else None
+            if team1_goals is not None and team2_goals is not None:
+                outcome = score_prediction(pred, team1_goals, team2_goals)
+                results.append((pred["match_id"], pred["run"], outcome))
+        set_rows(unfinished_count)
+        history.mark_finished_many(results)
+        totals = history.outcome_totals()
 
     stats = {}
-    for key in correct:
-        percent = correct[key] / total[key] * 100 if total[key] else 0
-        stats[key] = {"correct": correct[key], "total": total[key], "percent": round(percent, 2)}
+    for key in MARKETS:
+        correct, total = totals.get(key, (0, 0))
+        percent = correct / total * 100 if total else 0
+        stats[key] = {"correct": correct, "total": total, "percent": round(percent, 2)}
 
     if any(stats[k]["total"] > 0 for k in stats):
         best_type = max(stats, key=lambda k: stats[k]["percent"] if stats[k]["total"] > 0 else -1)
@@ -95,9 +119,9 @@ def main():
         best_type = None
     stats["best_type"] = best_type
 
-    stats_path = os.path.join("data", "stats", "prediction_stats.json")
     os.makedirs(os.path.dirname(stats_path), exist_ok=True)
     save_json(stats, stats_path)
+    save_fingerprint(FINGERPRINT_PATH, _fingerprint())
 
 
 if __name__ == "__main__":
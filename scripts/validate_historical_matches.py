@@ -1,5 +1,11 @@
-from pathlib import Path
-import json
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.match_store import read_matches, read_missing_mask
+
+import numpy as np
 import logging
 
 
@@ -30,20 +36,23 @@ def validate_historical_matches():
         "h2h_team2_home_scored",
         "h2h_team2_home_conceded",
     ]
-    data_path = Path("data/raw/matches_raw.json")
-
-    with open(data_path, encoding="utf-8") as f:
-        matches = json.load(f)
+    matches = read_matches(columns=essentials_fields)
 
     errors = []
     warnings = []
 
-    for i, match in enumerate(matches):
-        for field in essentials_fields:
-            if field not in match:
-                errors.append(f"[ERROR] Missing field: {field} in match {i+1}")
-            elif match[field] == "" or match[field] is None:
-                warnings.append(f"[WARNING] Empty field: {field} in match {i+1}")
+    for field in essentials_fields:
+        missing = read_missing_mask(field)
+        if missing is None:
+            missing = np.zeros(len(matches), dtype=bool)
+        empty = matches[field].isna().to_numpy() & ~missing
+        errors.extend(
+            f"[ERROR] Missing field: {field} in match {i+1}" for i in np.flatnonzero(missing)
+        )
+        warnings.extend(
+            f"[WARNING] Empty field: {field} in match {i+1}" for i in np.flatnonzero(empty)
+        )
+
     if errors:
         for err in errors:
             logging.error(err)
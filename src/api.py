@@ -5,8 +5,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from src.api_routes import health, predict
+from src.api_routes import health, models, predict
+from src.batcher import MicroBatcher
+from src.model_registry import ModelRegistry
+from src.serving import FixtureContext, predict_matches
+from src.utils import load_config
 
+import asyncio
+import contextlib
+import logging
 import os
 import json
 
@@ -14,6 +21,14 @@ import json
 PREDICTIONS_PATH = os.path.abspath(os.getenv("PREDICTIONS_PATH", "data/predict/predictions.json"))
 
 
+def load_fixture_context():
+    try:
+        return FixtureContext.from_store()
+    except Exception as e:
+        logging.error(f"[ERROR] Could not build the fixture context for /predict: {e}")
+        return None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
@@ -21,7 +36,41 @@ async def lifespan(app: FastAPI):
             app.state.predictions = json.load(f)
     except FileNotFoundError:
         app.state.predictions = []
+    config = load_config()
+    registry = ModelRegistry.from_config(config)
+    try:
+        registry.refresh()
+    except Exception as e:
+        logging.error(f"[ERROR] No models loaded at startup: {e}")
+    app.state.models = registry
+    app.state.context = load_fixture_context()
+    serving = config.get("serving", {})
+    app.state.max_batch_size = serving.get("max_batch_size", 100)
+
+    def reload_context():
+        # Retrains follow ingests, so fresh models come with fresh match history.
+        app.state.context = load_fixture_context() or app.state.context
+
+    def score_batch(matches):
+        # One registry read per batch: every fixture in it sees the same model set.
+        models = registry.current
+        records = predict_matches(models.bundles, app.state.context, matches)
+        return [(record, models) for record in records]
+
+    app.state.batcher = MicroBatcher(
+        score_batch,
+        max_batch=serving.get("batch_max_items", 64),
+        window=serving.get("batch_window_ms", 2) / 1000,
+    )
+    app.state.batcher.start()
+    watcher = asyncio.create_task(
+        registry.watch(serving.get("reload_interval_seconds", 30), on_reload=reload_context)
+    )
     yield
+    watcher.cancel()
+    await app.state.batcher.stop()
+    with contextlib.suppress(asyncio.CancelledError):
+        await watcher
 
 
 app = FastAPI(
@@ -40,10 +89,11 @@ app.add_middleware(
         "https://football-prediction-murex.vercel.app",
     ],
     allow_credentials=True,
-    allow_methods=["GET"],
+    allow_methods=["GET", "POST"],
     allow_headers=["Authorization", "Content-Type"],
     max_age=3600,
 )
 
 app.include_router(health.router)
+app.include_router(models.router)
 app.include_router(predict.router)
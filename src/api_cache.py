@@ -0,0 +1,209 @@
+from datetime import date, datetime, timedelta
+from src.utils import load_json, save_json
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+
+STANDINGS_CACHE_DIR = "data/cache/standings"
+H2H_CACHE_PATH = "data/cache/h2h.sqlite"
+
+
+def standings_positions(standings):
+    """Map str(team_id) -> position for a standings list, keeping the last entry per team."""
+    positions = {}
+    for team in standings or []:
+        if isinstance(team, dict):
+            positions[str(team.get("team_id"))] = team.get("position", "")
+    return positions
+
+
+class StandingsCache:
+    """League standings memoized by (league_id, snapshot date) as team_id -> position dicts.
+
+    fetch is an async callable taking a league id and returning the raw standings list.
+    Concurrent lookups of the same league share one request. Tables older than ttl are
+    refetched; when cache_dir is set, non-empty tables are also kept on disk so later runs
+    on the same day skip the API.
+    """
+
+    def __init__(self, fetch, ttl=timedelta(hours=6), cache_dir=None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.requests = 0
+        self._tables = {}
+        self._pending = {}
+
+    @classmethod
+    def from_config(cls, fetch, config):
+        """Build a cache from the cache section of config/config.yaml."""
+        settings = config.get("cache", {})
+        return cls(
+            fetch,
+            ttl=timedelta(hours=settings.get("standings_ttl_hours", 6)),
+            cache_dir=settings.get("standings_dir"),
+        )
+
+    def _path(self, key):
+        league_id, snapshot = key
+        return os.path.join(self.cache_dir, f"{league_id}_{snapshot}.json")
+
+    def _fresh(self, entry):
+        return entry is not None and datetime.now() - entry[0] < self.ttl
+
+    def _read_disk(self, key):
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            data = load_json(self._path(key))
+            return datetime.fromisoformat(data["fetched_at"]), data["positions"]
+        except Exception as e:
+            logging.warning(f"[WARNING] Ignoring unreadable standings cache {self._path(key)}: {e}")
+            return None
+
+    def _write_disk(self, key, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        league_id = key[0]
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{league_id}_") and name != os.path.basename(self._path(key)):
+                os.remove(os.path.join(self.cache_dir, name))
+        tmp_path = self._path(key) + ".tmp"
+        save_json({"fetched_at": entry[0].isoformat(), "positions": entry[1]}, tmp_path)
+        os.replace(tmp_path, self._path(key))
+
+    async def _load(self, key, league_id):
+        self.requests += 1
+        entry = (datetime.now(), standings_positions(await self.fetch(league_id)))
+        self._tables[key] = entry
+        if self.cache_dir and entry[1]:
+            self._write_disk(key, entry)
+        return entry[1]
+
+    async def positions(self, league_id, snapshot=None):
+        """Return the team_id -> position dict of a league, fetching it at most once per TTL."""
+        key = (str(league_id), (snapshot or date.today()).isoformat())
+        entry = self._tables.get(key)
+        if not self._fresh(entry):
+            entry = self._read_disk(key)
+            if self._fresh(entry):
+                self._tables[key] = entry
+        if self._fresh(entry):
+            return entry[1]
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, league_id))
+            self._pending[key] = task
+        try:
+            return await task
+        finally:
+            self._pending.pop(key, None)
+
+
+class H2HCache:
+    """Head-to-head stats persisted in SQLite, keyed by the ordered (team1_id, team2_id) pair.
+
+    fetch is an async callable taking the two team ids and returning the h2h stats dict.
+    Entries live for ttl, the table is trimmed to max_entries by least recent use, and
+    invalidate() drops a pair once a new finished match between the two teams is ingested.
+    Empty responses (failed requests) are never stored.
+    """
+
+    def __init__(self, fetch, path=H2H_CACHE_PATH, ttl=timedelta(days=7), max_entries=5000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS h2h (team1_id TEXT, team2_id TEXT, payload TEXT, "
+            "fetched_at REAL, used_at REAL, PRIMARY KEY (team1_id, team2_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS h2h_used_at ON h2h (used_at)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, fetch, config):
+        """Build a cache from the cache section of config/config.yaml."""
+        settings = config.get("cache", {})
+        return cls(
+            fetch,
+            path=settings.get("h2h_path", H2H_CACHE_PATH),
+            ttl=timedelta(days=settings.get("h2h_ttl_days", 7)),
+            max_entries=settings.get("h2h_max_entries", 5000),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM h2h").fetchone()[0]
+
+    def _lookup(self, key):
+        row = self._conn.execute(
+            "SELECT payload, fetched_at FROM h2h WHERE team1_id = ? AND team2_id = ?", key
+        ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl.total_seconds():
+            return None
+        self._conn.execute(
+            "UPDATE h2h SET used_at = ? WHERE team1_id = ? AND team2_id = ?", (time.time(), *key)
+        )
+        self._conn.commit()
+        return json.loads(row[0])
+
+    def _store(self, key, stats):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO h2h VALUES (?, ?, ?, ?, ?)", (*key, json.dumps(stats), now, now)
+        )
+        self._conn.execute(
+            "DELETE FROM h2h WHERE rowid IN (SELECT rowid FROM h2h ORDER BY used_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    async def _load(self, key, team1_id, team2_id):
+        stats = await self.fetch(team1_id, team2_id)
+        if stats:
+            self._store(key, stats)
+        return stats
+
+    async def get(self, team1_id, team2_id):
+        """Return h2h stats for the pair from disk when fresh, otherwise from the API."""
+        key = (str(team1_id), str(team2_id))
+        stats = self._lookup(key)
+        if stats is not None:
+            self.hits += 1
+            return stats
+        self.misses += 1
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, team1_id, team2_id))
+            self._pending[key] = task
+        try:
+            return await task
+        finally:
+            self._pending.pop(key, None)
+
+    def invalidate(self, team1_id, team2_id):
+        """Drop both orientations of a pair, e.g. after a new match between them finished."""
+        self._conn.execute(
+            "DELETE FROM h2h WHERE (team1_id = ? AND team2_id = ?) "
+            "OR (team1_id = ? AND team2_id = ?)",
+            (str(team1_id), str(team2_id), str(team2_id), str(team1_id)),
+        )
+        self._conn.commit()
@@ -0,0 +1,219 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from src.utils import get_api_key
+
+import asyncio
+import heapq
+import httpx
+import itertools
+import logging
+import random
+import time
+
+BASE_URL = "https://api.soccerdataapi.com"
+TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+HEADERS = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+PRIORITY_UPCOMING = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BACKFILL = 10
+
+# Priority of requests issued from the current task; tasks spawned by asyncio.gather inherit it.
+request_priority = ContextVar("request_priority", default=PRIORITY_DEFAULT)
+
+
+@contextmanager
+def prioritized(priority):
+    """Issue the requests made inside the block (and tasks spawned there) at priority."""
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    """Async token bucket refilling at rate tokens per second up to burst tokens."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Hold back every caller for seconds, e.g. after a 429 with Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class PrioritySlots:
+    """Bounded concurrency where waiting callers are admitted lowest priority value first."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+
+def retry_after_seconds(response):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class SoccerDataClient:
+    """Async SoccerDataAPI client: pooled keep-alive connections behind a request scheduler.
+
+    Every request takes a priority slot (see request_priority) and a token from a
+    rate_per_second/burst bucket. 429 and 5xx responses and transport errors are retried
+    up to max_retries times with full-jitter exponential backoff, honoring Retry-After.
+    Requests that still fail are recorded in failures so callers can report them.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        max_concurrency=8,
+        timeout=TIMEOUT,
+        base_url=BASE_URL,
+        rate_per_second=5.0,
+        burst=10,
+        max_retries=5,
+        backoff_base=1.0,
+        backoff_max=60.0,
+        transport=None,
+    ):
+        self.api_key = api_key or get_api_key()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.slots = PrioritySlots(max_concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.failures = []
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def _send(self, path, params, priority):
+        await self.slots.acquire(priority)
+        try:
+            await self.bucket.acquire()
+            self.requests += 1
+            return await self._client.get(path, params=params)
+        finally:
+            self.slots.release()
+
+    async def get(self, path, **params):
+        """GET an API path with the auth token added, scheduled and retried as described above."""
+        query = {**params, "auth_token": self.api_key}
+        priority = request_priority.get()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._send(path, query, priority)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    self.failures.append({"path": path, "params": params, "error": repr(e)})
+                    raise
+                delay = self._backoff(attempt)
+                reason = repr(e)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt == self.max_retries:
+                    self.failures.append(
+                        {"path": path, "params": params, "error": response.status_code}
+                    )
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                elif response.status_code == 429:
+                    self.bucket.pause(delay)
+                reason = response.status_code
+            self.retries += 1
+            logging.warning(
+                f"[WARNING] {path} {params} failed ({reason}); retry {attempt + 1} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    def log_failures(self):
+        """Log a summary of requests that were still failing after every retry."""
+        if self.failures:
+            logging.error(
+                f"[ERROR] {len(self.failures)} SoccerDataAPI requests failed after "
+                f"{self.max_retries} retries: {self.failures}"
+            )
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code such as main.py."""
+    return asyncio.run(coro)
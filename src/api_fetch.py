@@ -1,13 +1,27 @@
-from pathlib import Path
 from datetime import datetime, timedelta
-from src.utils import get_api_key, load_json
-
-import json
-import requests
+from functools import partial
+from src.api_cache import H2HCache, StandingsCache
+from src.api_client import (
+    BASE_URL,
+    PRIORITY_BACKFILL,
+    PRIORITY_UPCOMING,
+    SoccerDataClient,
+    prioritized,
+    run_sync,
+)
+from src.instrument import instrumented, set_rows
+from src.match_store import (
+    MATCHES_RAW_PATH,
+    append_segment,
+    compact_segments,
+    load_match_ids,
+    pending_segments,
+)
+from src.utils import load_config, load_json
+
+import asyncio
 import logging
-
-SESSION = requests.Session()
-TIMEOUT = (10, 30)
+import os
 
 
 def get_leagues_id(json_path="config/leagues.json"):
@@ -19,96 +33,132 @@ def get_leagues_id(json_path="config/leagues.json"):
     return [lg["id"] for lg in data]
 
 
-def get_historical_data(leagues_id=None, weeks=1):
-    """Fetches historical match data from the SoccerDataAPI for the specified leagues and time frame."""
-
-    api_key = get_api_key()
-
+def _resolve_leagues(leagues_id):
     if leagues_id is None:
         try:
             leagues_id = get_leagues_id()
         except ValueError as e:
             logging.error(f"[Error] loading leagues: {e}")
             raise ValueError(f"Leagues configuration is invalid: {e}")
+    return leagues_id
+
+
+def new_client():
+    """Create a SoccerDataClient configured from the api section of config/config.yaml.
+
+    The API_BASE_URL environment variable overrides api.base_url, e.g. to point the fetch
+    path at the offline stand-in in benchmarks/fake_api.py.
+    """
+    api = load_config().get("api", {})
+    return SoccerDataClient(
+        base_url=os.getenv("API_BASE_URL", api.get("base_url", BASE_URL)),
+        max_concurrency=api.get("max_concurrency", 8),
+        rate_per_second=api.get("rate_per_second", 5.0),
+        burst=api.get("burst", 10),
+        max_retries=api.get("max_retries", 5),
+        backoff_base=api.get("backoff_base", 1.0),
+        backoff_max=api.get("backoff_max", 60.0),
+    )
+
+
+async def _league_matches(client, league_id):
+    """Return the /matches/ payload of a league as a list of competitions, or None on failure."""
+    try:
+        response = await client.get("/matches/", league_id=league_id)
+        data = response.json()
+    except Exception as e:
+        logging.error(f"[ERROR] Request or JSON decode failed for league {league_id}: {e}")
+        return None
+
+    if isinstance(data, dict):
+        data = [data]
+    elif not isinstance(data, list):
+        logging.warning(f"[WARNING] Unexpected data type: {type(data)} for league {league_id}")
+        return None
+    return data
+
+
+def _dated_matches(data):
+    """Yield (competition, match, match_date) for every match with a parseable date."""
+    for obj in data:
+        if not isinstance(obj, dict):
+            logging.warning(f"[WARNING] Unexpected data format: {obj}")
+            continue
+        for stage in obj.get("stage", []):
+            for match in stage.get("matches", []):
+                match_date_str = match.get("date")
+                if not match_date_str:
+                    continue
+                try:
+                    match_date = datetime.strptime(match_date_str, "%d/%m/%Y")
+                except Exception as e:
+                    logging.warning(f"[WARNING] Date parsing failed: {match_date_str} ({e})")
+                    continue
+                yield obj, match, match_date
+
+
+async def _matches_in_window(client, leagues_id, start, end):
+    """Fetch every league concurrently and return (league_id, competition, match) in order."""
+    payloads = await asyncio.gather(*(_league_matches(client, lg) for lg in leagues_id))
+    found = []
+    for league_id, data in zip(leagues_id, payloads):
+        if data is None:
+            continue
+        for obj, match, match_date in _dated_matches(data):
+            if start <= match_date.date() <= end:
+                found.append((league_id, obj, match))
+    return found
+
+
+async def get_historical_data_async(client, leagues_id=None, weeks=1):
+    """Async version of get_historical_data using a shared client."""
+
+    leagues_id = _resolve_leagues(leagues_id)
 
     today_dt = datetime.now()
     now = today_dt - timedelta(hours=1)
     start_dt = today_dt - timedelta(weeks=weeks)
     games = []
 
-    for league_id in leagues_id:
-        url = "https://api.soccerdataapi.com/matches/"
-        query = {"league_id": league_id, "auth_token": api_key}
-        headers = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
-        try:
-            response = SESSION.get(url, headers=headers, params=query, timeout=TIMEOUT)
-            data = response.json()
-        except Exception as e:
-            logging.error(f"[ERROR] Request or JSON decode failed for league {league_id}: {e}")
-            continue
+    for league_id, obj, match in await _matches_in_window(
+        client, leagues_id, start_dt.date(), now.date()
+    ):
+        home_team = match.get("teams", {}).get("home", {})
+        away_team = match.get("teams", {}).get("away", {})
+
+        is_cup = match.get("is_cup")
+
+        odds = match.get("odds", {}).get("match_winner", {})
+        if not isinstance(odds, dict):
+            odds = None
 
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            logging.warning(f"[WARNING] Unexpected data type: {type(data)} for league {league_id}")
+        if is_cup is None:
+            is_cup = obj.get("is_cup")
+
+        if not home_team or not away_team or not isinstance(odds, dict) or not odds:
             continue
 
-        for obj in data:
-            if not isinstance(obj, dict):
-                logging.warning(f"[WARNING] Unexpected data format: {obj}")
-                continue
-            for stage in obj.get("stage", []):
-                for match in stage.get("matches", []):
-                    match_date_str = match.get("date")
-                    if not match_date_str:
-                        continue
-                    try:
-                        match_date = datetime.strptime(match_date_str, "%d/%m/%Y")
-                    except Exception as e:
-                        logging.warning(f"[WARNING] Date parsing failed: {match_date_str} ({e})")
-                        continue
-                    if start_dt.date() <= match_date.date() <= now.date():
-                        home_team = match.get("teams", {}).get("home", {})
-                        away_team = match.get("teams", {}).get("away", {})
-
-                        is_cup = match.get("is_cup")
-
-                        odds = match.get("odds", {}).get("match_winner", {})
-                        if not isinstance(odds, dict):
-                            odds = None
-
-                        if is_cup is None:
-                            is_cup = obj.get("is_cup")
-
-                        if not home_team or not away_team or not isinstance(odds, dict) or not odds:
-                            continue
-
-                        games.append(
-                            {
-                                "date": match["date"],
-                                "time": match.get("time", ""),
-                                "home_name": home_team.get("name", "?"),
-                                "away_name": away_team.get("name", "?"),
-                                "home_id": home_team.get("id", "?"),
-                                "away_id": away_team.get("id", "?"),
-                                "match_id": match.get("id"),
-                                "league_id": league_id,
-                                "is_cup": is_cup,
-                                "odds": odds,
-                            }
-                        )
+        games.append(
+            {
+                "date": match["date"],
+                "time": match.get("time", ""),
+                "home_name": home_team.get("name", "?"),
+                "away_name": away_team.get("name", "?"),
+                "home_id": home_team.get("id", "?"),
+                "away_id": away_team.get("id", "?"),
+                "match_id": match.get("id"),
+                "league_id": league_id,
+                "is_cup": is_cup,
+                "odds": odds,
+            }
+        )
     return games
 
 
-def get_matches_details(match_id):
-    """Fetches detailed information for a specific match by its ID."""
-
-    api_key = get_api_key()
+async def get_matches_details_async(client, match_id):
+    """Async version of get_matches_details."""
 
-    url = "https://api.soccerdataapi.com/match/"
-    querystring = {"match_id": match_id, "auth_token": api_key}
-    headers = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
-    response = SESSION.get(url, headers=headers, params=querystring, timeout=TIMEOUT)
+    response = await client.get("/match/", match_id=match_id)
     try:
         return response.json()
     except Exception as e:
@@ -116,16 +166,11 @@ def get_matches_details(match_id):
         return None
 
 
-def get_h2h(team1_id, team2_id):
-    """Fetches head-to-head statistics between two teams by their IDs."""
+async def get_h2h_async(client, team1_id, team2_id):
+    """Async version of get_h2h."""
 
-    api_key = get_api_key()
-
-    url = "https://api.soccerdataapi.com/head-to-head/"
-    querystring = {"team_1_id": team1_id, "team_2_id": team2_id, "auth_token": api_key}
-    headers = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
     try:
-        resp = SESSION.get(url, headers=headers, params=querystring, timeout=TIMEOUT)
+        resp = await client.get("/head-to-head/", team_1_id=team1_id, team_2_id=team2_id)
         resp.raise_for_status()
         data = resp.json()
     except Exception as e:
@@ -137,15 +182,10 @@ def get_h2h(team1_id, team2_id):
     return {}
 
 
-def get_standings(league_id):
-    """Fetches the current standings for a specific league by its ID."""
+async def get_standings_async(client, league_id):
+    """Async version of get_standings."""
 
-    api_key = get_api_key()
-
-    url = "https://api.soccerdataapi.com/standing/"
-    query = {"league_id": league_id, "auth_token": api_key}
-    headers = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
-    response = SESSION.get(url, headers=headers, params=query, timeout=TIMEOUT)
+    response = await client.get("/standing/", league_id=league_id)
     try:
         response.raise_for_status()
         data = response.json()
@@ -167,323 +207,392 @@ def get_standings(league_id):
     return []
 
 
-def main():
-    """Main function to fetch historical match data and save it to a JSON file."""
+async def _standings_or_empty(client, league_id):
+    try:
+        return await get_standings_async(client, league_id)
+    except Exception as e:
+        logging.warning(f"Error getting standings for league_id {league_id}: {e}")
+        return []
+
+
+def new_standings_cache(client):
+    """Per-run standings cache backed by client, configured from config/config.yaml."""
+    return StandingsCache.from_config(partial(_standings_or_empty, client), load_config())
+
+
+def new_h2h_cache(client):
+    """Persistent h2h cache backed by client, configured from config/config.yaml."""
+    return H2HCache.from_config(partial(get_h2h_async, client), load_config())
+
+
+async def _no_result(value):
+    return value
+
+
+async def _with_client(func, *args):
+    async with new_client() as client:
+        try:
+            return await func(client, *args)
+        finally:
+            client.log_failures()
+
+
+def get_historical_data(leagues_id=None, weeks=1):
+    """Fetches historical match data from the SoccerDataAPI for the specified leagues and time frame."""
+    return run_sync(_with_client(get_historical_data_async, leagues_id, weeks))
+
+
+def get_matches_details(match_id):
+    """Fetches detailed information for a specific match by its ID."""
+    return run_sync(_with_client(get_matches_details_async, match_id))
+
+
+def get_h2h(team1_id, team2_id):
+    """Fetches head-to-head statistics between two teams by their IDs."""
+    return run_sync(_with_client(get_h2h_async, team1_id, team2_id))
+
+
+def get_standings(league_id):
+    """Fetches the current standings for a specific league by its ID."""
+    return run_sync(_with_client(get_standings_async, league_id))
+
+
+async def _finished_match_data(client, match, standings, h2h):
+    """Fetch details, standings and h2h for one historical match and build its record.
 
-    matches = get_historical_data()
-    logging.info(f"[INFO] Fetched {len(matches)} historical matches.")
+    Returns None when the match is not finished. Standings and h2h are requested
+    concurrently once the details reveal the league and team ids; the match is new, so
+    any cached h2h for the pair predates it and is invalidated first.
+    """
+    match_id = match["match_id"]
+    is_cup = match.get("is_cup")
+    odds = match.get("odds", {})
+    details = await get_matches_details_async(client, match_id)
+    if not details or details.get("status") != "finished":
+        return None
+    date = details.get("date", "")
+    time = details.get("time", "")
+    league = details.get("league", {}).get("name", "")
+    team1 = details.get("teams", {}).get("home", {}).get("name", "")
+    team2 = details.get("teams", {}).get("away", {}).get("name", "")
+    team1_goals = details.get("goals", {}).get("home_ft_goals", "")
+    team2_goals = details.get("goals", {}).get("away_ft_goals", "")
+
+    team1_id = details.get("teams", {}).get("home", {}).get("id", None)
+    team2_id = details.get("teams", {}).get("away", {}).get("id", None)
+
+    team1_rank = team2_rank = ""
+    league_id = details.get("league", {}).get("id", None)
+    if team1_id and team2_id:
+        h2h.invalidate(team1_id, team2_id)
+    positions, h2h_data = await asyncio.gather(
+        standings.positions(league_id) if league_id else _no_result({}),
+        h2h.get(team1_id, team2_id) if team1_id and team2_id else _no_result(None),
+    )
+    if team1_id:
+        team1_rank = positions.get(str(team1_id), "")
+    if team2_id:
+        team2_rank = positions.get(str(team2_id), "")
+
+    h2h_games_played = h2h_team1_wins = h2h_team2_wins = h2h_draws = ""
+    h2h_team1_scored = h2h_team2_scored = ""
+    h2h_team1_home_wins = h2h_team1_home_draws = h2h_team1_home_losses = ""
+    h2h_team1_home_scored = h2h_team1_home_conceded = ""
+    h2h_team2_home_wins = h2h_team2_home_draws = h2h_team2_home_losses = ""
+    h2h_team2_home_scored = h2h_team2_home_conceded = ""
+    if h2h_data is not None:
+        stats = h2h_data.get("overall", {}) if isinstance(h2h_data, dict) else {}
+        h2h_games_played = stats.get("overall_games_played", "")
+        h2h_team1_wins = stats.get("overall_team1_wins", "")
+        h2h_team2_wins = stats.get("overall_team2_wins", "")
+        h2h_draws = stats.get("overall_draws", "")
+        h2h_team1_scored = stats.get("overall_team1_scored", "")
+        h2h_team2_scored = stats.get("overall_team2_scored", "")
+        t1_home = h2h_data.get("team1_at_home", {})
+        h2h_team1_home_wins = t1_home.get("team1_wins_at_home", "")
+        h2h_team1_home_draws = t1_home.get("team1_draws_at_home", "")
+        h2h_team1_home_losses = t1_home.get("team1_losses_at_home", "")
+        h2h_team1_home_scored = t1_home.get("team1_scored_at_home", "")
+        h2h_team1_home_conceded = t1_home.get("team1_conceded_at_home", "")
+        t2_home = h2h_data.get("team2_at_home", {})
+        h2h_team2_home_wins = t2_home.get("team2_wins_at_home", "")
+        h2h_team2_home_draws = t2_home.get("team2_draws_at_home", "")
+        h2h_team2_home_losses = t2_home.get("team2_losses_at_home", "")
+        h2h_team2_home_scored = t2_home.get("team2_scored_at_home", "")
+        h2h_team2_home_conceded = t2_home.get("team2_conceded_at_home", "")
+
+    return {
+        "match_id": match_id,
+        "date": date,
+        "time": time,
+        "league": league,
+        "is_cup": is_cup,
+        "team1": team1,
+        "team2": team2,
+        "team1_goals": team1_goals,
+        "team2_goals": team2_goals,
+        "team1_rank": team1_rank,
+        "team2_rank": team2_rank,
+        "h2h_games_played": h2h_games_played,
+        "h2h_team1_wins": h2h_team1_wins,
+        "h2h_team2_wins": h2h_team2_wins,
+        "h2h_draws": h2h_draws,
+        "h2h_team1_scored": h2h_team1_scored,
+        "h2h_team2_scored": h2h_team2_scored,
+        "h2h_team1_home_wins": h2h_team1_home_wins,
+        "h2h_team1_home_draws": h2h_team1_home_draws,
+        "h2h_team1_home_losses": h2h_team1_home_losses,
+        "h2h_team1_home_scored": h2h_team1_home_scored,
+        "h2h_team1_home_conceded": h2h_team1_home_conceded,
+        "h2h_team2_home_wins": h2h_team2_home_wins,
+        "h2h_team2_home_draws": h2h_team2_home_draws,
+        "h2h_team2_home_losses": h2h_team2_home_losses,
+        "h2h_team2_home_scored": h2h_team2_home_scored,
+        "h2h_team2_home_conceded": h2h_team2_home_conceded,
+        "odds": odds,
+    }
+
+
+async def _guarded(coro, match):
+    """Run one per-match lookup, logging instead of raising so the batch keeps going."""
+    try:
+        return await coro
+    except Exception as e:
+        logging.error(
+            f"[ERROR] Unexpected error processing match {match.get('match_id', '?')}: {e}"
+        )
+        return None
 
-    output_path = Path("data/raw/matches_raw.json")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+async def _fetch_finished_matches(existing_ids):
+    """Fetch recent fixtures and look up every not-yet-stored one concurrently.
+
+    Requests run at backfill priority. A match whose lookups still fail after the
+    client's retries is not stored, so its id stays unknown and the next run retries it.
+    """
+    with prioritized(PRIORITY_BACKFILL):
+        async with new_client() as client:
+            matches = await get_historical_data_async(client)
+            logging.info(f"[INFO] Fetched {len(matches)} historical matches.")
+            known = [m for m in matches if str(m.get("match_id")) in existing_ids]
+            for match in known:
+                logging.info(f"[SKIPPED] Duplicate match_id {match.get('match_id')}")
+            candidates = [m for m in matches if str(m.get("match_id")) not in existing_ids]
+            standings = new_standings_cache(client)
+            with new_h2h_cache(client) as h2h:
+                records = await asyncio.gather(
+                    *(
+                        _guarded(_finished_match_data(client, m, standings, h2h), m)
+                        for m in candidates
+                    )
+                )
+                logging.info(f"[INFO] H2H cache hits: {h2h.hits}, misses: {h2h.misses}")
+            logging.info(f"[INFO] Standings requests: {standings.requests}")
+            logging.info(f"[INFO] API requests: {client.requests}, retries: {client.retries}")
+            client.log_failures()
+    return len(known), list(zip(candidates, records))
+
+
+def main(compact_after=None):
+    """Fetch finished matches and commit the new ones as an append-only ingest segment.
+
+    Per-match details, standings and h2h lookups run concurrently through one pooled
+    client. Segments are folded into matches_raw.json and the columnar store once
+    compact_after of them are pending (ingest.compact_after_segments in config/config.yaml),
+    or right away when matches_raw.json does not exist yet. Between compactions the JSON
+    file can be up to compact_after runs stale; read matches through src.match_store
+    (read_match_records, load_match_ids) instead.
+    """
+
+    if compact_after is None:
+        compact_after = load_config().get("ingest", {}).get("compact_after_segments", 30)
 
     total_saved = 0
     total_ignored = 0
 
     try:
-        if output_path.exists():
-            try:
-                with open(output_path, "r", encoding="utf-8") as f:
-                    existing_matches = json.load(f)
-            except Exception as e:
-                logging.warning(f"[WARNING] Could not read existing matches: {e}")
-                existing_matches = []
-        else:
-            existing_matches = []
-
-        existing_ids = set(str(m.get("match_id")) for m in existing_matches if "match_id" in m)
-
-        for match in matches:
-            try:
-                match_id = match["match_id"]
-                is_cup = match.get("is_cup")
-                odds = match.get("odds", {})
-                details = get_matches_details(match_id)
-                if not details or details.get("status") != "finished":
-                    continue
-                date = details.get("date", "")
-                time = details.get("time", "")
-                league = details.get("league", {}).get("name", "")
-                team1 = details.get("teams", {}).get("home", {}).get("name", "")
-                team2 = details.get("teams", {}).get("away", {}).get("name", "")
-                team1_goals = details.get("goals", {}).get("home_ft_goals", "")
-                team2_goals = details.get("goals", {}).get("away_ft_goals", "")
-
-                team1_id = details.get("teams", {}).get("home", {}).get("id", None)
-                team2_id = details.get("teams", {}).get("away", {}).get("id", None)
-
-                team1_rank = team2_rank = ""
-                league_id = details.get("league", {}).get("id", None)
-                standings = []
-                if league_id:
-                    try:
-                        standings = get_standings(league_id)
-                    except Exception as e:
-                        logging.warning(f"Error getting standings for league_id {league_id}: {e}")
-                if standings:
-                    for team in standings:
-                        if team1_id and str(team.get("team_id")) == str(team1_id):
-                            team1_rank = team.get("position", "")
-                        if team2_id and str(team.get("team_id")) == str(team2_id):
-                            team2_rank = team.get("position", "")
-
-                h2h_games_played = h2h_team1_wins = h2h_team2_wins = h2h_draws = ""
-                h2h_team1_scored = h2h_team2_scored = ""
-                h2h_team1_home_wins = h2h_team1_home_draws = h2h_team1_home_losses = ""
-                h2h_team1_home_scored = h2h_team1_home_conceded = ""
-                h2h_team2_home_wins = h2h_team2_home_draws = h2h_team2_home_losses = ""
-                h2h_team2_home_scored = h2h_team2_home_conceded = ""
-                if team1_id and team2_id:
-                    h2h_data = get_h2h(team1_id, team2_id)
-                    stats = h2h_data.get("overall", {}) if isinstance(h2h_data, dict) else {}
-                    h2h_games_played = stats.get("overall_games_played", "")
-                    h2h_team1_wins = stats.get("overall_team1_wins", "")
-                    h2h_team2_wins = stats.get("overall_team2_wins", "")
-                    h2h_draws = stats.get("overall_draws", "")
-                    h2h_team1_scored = stats.get("overall_team1_scored", "")
-                    h2h_team2_scored = stats.get("overall_team2_scored", "")
-                    t1_home = h2h_data.get("team1_at_home", {})
-                    h2h_team1_home_wins = t1_home.get("team1_wins_at_home", "")
-                    h2h_team1_home_draws = t1_home.get("team1_draws_at_home", "")
-                    h2h_team1_home_losses = t1_home.get("team1_losses_at_home", "")
-                    h2h_team1_home_scored = t1_home.get("team1_scored_at_home", "")
-                    h2h_team1_home_conceded = t1_home.get("team1_conceded_at_home", "")
-                    t2_home = h2h_data.get("team2_at_home", {})
-                    h2h_team2_home_wins = t2_home.get("team2_wins_at_home", "")
-                    h2h_team2_home_draws = t2_home.get("team2_draws_at_home", "")
-                    h2h_team2_home_losses = t2_home.get("team2_losses_at_home", "")
-                    h2h_team2_home_scored = t2_home.get("team2_scored_at_home", "")
-                    h2h_team2_home_conceded = t2_home.get("team2_conceded_at_home", "")
-
-                match_data = {
-                    "match_id": match_id,
-                    "date": date,
-                    "time": time,
-                    "league": league,
-                    "is_cup": is_cup,
-                    "team1": team1,
-                    "team2": team2,
-                    "team1_goals": team1_goals,
-                    "team2_goals": team2_goals,
-                    "team1_rank": team1_rank,
-                    "team2_rank": team2_rank,
-                    "h2h_games_played": h2h_games_played,
-                    "h2h_team1_wins": h2h_team1_wins,
-                    "h2h_team2_wins": h2h_team2_wins,
-                    "h2h_draws": h2h_draws,
-                    "h2h_team1_scored": h2h_team1_scored,
-                    "h2h_team2_scored": h2h_team2_scored,
-                    "h2h_team1_home_wins": h2h_team1_home_wins,
-                    "h2h_team1_home_draws": h2h_team1_home_draws,
-                    "h2h_team1_home_losses": h2h_team1_home_losses,
-                    "h2h_team1_home_scored": h2h_team1_home_scored,
-                    "h2h_team1_home_conceded": h2h_team1_home_conceded,
-                    "h2h_team2_home_wins": h2h_team2_home_wins,
-                    "h2h_team2_home_draws": h2h_team2_home_draws,
-                    "h2h_team2_home_losses": h2h_team2_home_losses,
-                    "h2h_team2_home_scored": h2h_team2_home_scored,
-                    "h2h_team2_home_conceded": h2h_team2_home_conceded,
-                    "odds": odds,
-                }
-
-                rank_indexes = ["team1_rank", "team2_rank"]
-                if is_cup is True:
-                    essential_fields = [v for k, v in match_data.items() if k not in rank_indexes]
-                else:
-                    essential_fields = list(match_data.values())
-                if all(str(x).strip() != "" for x in essential_fields):
-                    if str(match_id) not in existing_ids:
-                        existing_matches.append(match_data)
-                        existing_ids.add(str(match_id))
-                        total_saved += 1
-                    else:
-                        total_ignored += 1
-                        logging.info(
-                            f"[SKIPPED] Duplicate match_id {match_id} | {team1} vs {team2}"
-                        )
+        try:
+            existing_ids = load_match_ids()
+        except Exception as e:
+            logging.warning(f"[WARNING] Could not read existing match ids: {e}")
+            existing_ids = set()
+        new_matches = []
+
+        total_ignored, results = run_sync(_fetch_finished_matches(existing_ids))
+        for match, match_data in results:
+            if match_data is None:
+                continue
+            match_id = match_data["match_id"]
+            is_cup = match_data["is_cup"]
+            team1 = match_data["team1"]
+            team2 = match_data["team2"]
+
+            rank_indexes = ["team1_rank", "team2_rank"]
+            if is_cup is True:
+                essential_fields = [v for k, v in match_data.items() if k not in rank_indexes]
+            else:
+                essential_fields = list(match_data.values())
+            if all(str(x).strip() != "" for x in essential_fields):
+                if str(match_id) not in existing_ids:
+                    new_matches.append(match_data)
+                    existing_ids.add(str(match_id))
+                    total_saved += 1
                 else:
                     total_ignored += 1
-                    empty_fields = [
-                        k
-                        for k, v in match_data.items()
-                        if (str(v).strip() == "")
-                        and ((is_cup is True and k not in rank_indexes) or (is_cup is not True))
-                    ]
-                    logging.info(
-                        f"[SKIPPED] Match {team1} vs {team2} | Empty essential fields: {empty_fields}"
-                    )
-            except Exception as e:
-                logging.error(
-                    f"[ERROR] Unexpected error processing match {match.get('match_id', '?')}: {e}"
+                    logging.info(f"[SKIPPED] Duplicate match_id {match_id} | {team1} vs {team2}")
+            else:
+                total_ignored += 1
+                empty_fields = [
+                    k
+                    for k, v in match_data.items()
+                    if (str(v).strip() == "")
+                    and ((is_cup is True and k not in rank_indexes) or (is_cup is not True))
+                ]
+                logging.info(
+                    f"[SKIPPED] Match {team1} vs {team2} | Empty essential fields: {empty_fields}"
                 )
-        with open(output_path, "w", encoding="utf-8") as f:
-            logging.info(f"[INFO] Writing data to {output_path}")
-            json.dump(existing_matches, f, ensure_ascii=False, indent=2)
+        set_rows(total_saved)
+        append_segment(new_matches)
+        if len(pending_segments()) >= compact_after or not os.path.exists(MATCHES_RAW_PATH):
+            compact_segments()
         logging.info(f"[INFO] Total saved matches: {total_saved}")
         logging.info(f"[INFO] Total games skipped: {total_ignored}")
     except Exception as e:
         logging.critical(f"[CRITICAL] Fatal error in main loop: {e}")
 
 
-def fetch_upcoming_matches(leagues_id=None, weeks=1):
-    """Fetch upcoming match data from the API for specified leagues over the next given weeks."""
-    api_key = get_api_key()
-    if leagues_id is None:
-        try:
-            leagues_id = get_leagues_id()
-        except ValueError as e:
-            logging.error(f"[Error] loading leagues: {e}")
-            raise ValueError(f"Leagues configuration is invalid: {e}")
-
-    today_dt = datetime.now()
-    now = today_dt - timedelta(hours=1)
-    finish_dt = today_dt + timedelta(weeks=weeks)
-    games = []
-
-    for league_id in leagues_id:
-        url = "https://api.soccerdataapi.com/matches/"
-        query = {"league_id": league_id, "auth_token": api_key}
-        headers = {"Accept-Encoding": "gzip", "Content-Type": "application/json"}
+async def _upcoming_game(client, league_id, obj, match, standings, h2h):
+    """Look up standings and h2h for one upcoming fixture and build its game dict, or None."""
+    home_team = match.get("teams", {}).get("home", {})
+    away_team = match.get("teams", {}).get("away", {})
+
+    is_cup = match.get("is_cup")
+    odds = match.get("odds", {}).get("match_winner", {})
+    if not isinstance(odds, dict):
+        odds = None
+    if is_cup is None:
+        is_cup = obj.get("is_cup")
+
+    home_id = home_team.get("id")
+    away_id = away_team.get("id")
+    positions, h2h_data = await asyncio.gather(
+        standings.positions(league_id),
+        h2h.get(home_id, away_id) if home_id and away_id else _no_result(None),
+    )
+
+    team1_rank = positions.get(str(home_id), "")
+    team2_rank = positions.get(str(away_id), "")
+
+    h2h_games_played = h2h_team1_wins = h2h_team2_wins = h2h_draws = ""
+    h2h_team1_scored = h2h_team2_scored = ""
+    h2h_team1_home_wins = h2h_team1_home_draws = h2h_team1_home_losses = ""
+    h2h_team1_home_scored = h2h_team1_home_conceded = ""
+    h2h_team2_home_wins = h2h_team2_home_draws = h2h_team2_home_losses = ""
+    h2h_team2_home_scored = h2h_team2_home_conceded = ""
+    h2h_valid = True
+    if h2h_data is not None:
+        h2h_data = h2h_data if isinstance(h2h_data, dict) else {}
+        stats = h2h_data.get("overall", {})
+        stats = stats if isinstance(stats, dict) else {}
+
+        def safe_get(d, k):
+            v = d.get(k, 0) if isinstance(d, dict) else 0
+            return v if isinstance(v, (int, float)) else 0
+
+        h2h_games_played = safe_get(stats, "overall_games_played")
+        h2h_team1_wins = safe_get(stats, "overall_team1_wins")
+        h2h_team2_wins = safe_get(stats, "overall_team2_wins")
+        h2h_draws = safe_get(stats, "overall_draws")
+        h2h_team1_scored = safe_get(stats, "overall_team1_scored")
+        h2h_team2_scored = safe_get(stats, "overall_team2_scored")
+        t1_home = h2h_data.get("team1_at_home", {})
+        t1_home = t1_home if isinstance(t1_home, dict) else {}
+        h2h_team1_home_wins = safe_get(t1_home, "team1_wins_at_home")
+        h2h_team1_home_draws = safe_get(t1_home, "team1_draws_at_home")
+        h2h_team1_home_losses = safe_get(t1_home, "team1_losses_at_home")
+        h2h_team1_home_scored = safe_get(t1_home, "team1_scored_at_home")
+        h2h_team1_home_conceded = safe_get(t1_home, "team1_conceded_at_home")
+        t2_home = h2h_data.get("team2_at_home", {})
+        t2_home = t2_home if isinstance(t2_home, dict) else {}
+        h2h_team2_home_wins = safe_get(t2_home, "team2_wins_at_home")
+        h2h_team2_home_draws = safe_get(t2_home, "team2_draws_at_home")
+        h2h_team2_home_losses = safe_get(t2_home, "team2_losses_at_home")
+        h2h_team2_home_scored = safe_get(t2_home, "team2_scored_at_home")
+        h2h_team2_home_conceded = safe_get(t2_home, "team2_conceded_at_home")
+        if h2h_games_played == 0:
+            h2h_valid = False
+    else:
+        h2h_valid = False
+
+    home_name = home_team.get("name", "")
+    away_name = away_team.get("name", "")
+    if not home_name or not away_name or not isinstance(odds, dict) or not odds or not h2h_valid:
+        return None
+    return {
+        "date": match["date"],
+        "time": match.get("time", ""),
+        "home_name": home_name,
+        "away_name": away_name,
+        "home_id": home_team.get("id", "?"),
+        "away_id": away_team.get("id", "?"),
+        "match_id": match.get("id"),
+        "league_id": league_id,
+        "is_cup": is_cup,
+        "odds": odds,
+        "team1_rank": team1_rank,
+        "team2_rank": team2_rank,
+        "h2h_games_played": h2h_games_played,
+        "h2h_team1_wins": h2h_team1_wins,
+        "h2h_team2_wins": h2h_team2_wins,
+        "h2h_draws": h2h_draws,
+        "h2h_team1_scored": h2h_team1_scored,
+        "h2h_team2_scored": h2h_team2_scored,
+        "h2h_team1_home_wins": h2h_team1_home_wins,
+        "h2h_team1_home_draws": h2h_team1_home_draws,
+        "h2h_team1_home_losses": h2h_team1_home_losses,
+        "h2h_team1_home_scored": h2h_team1_home_scored,
+        "h2h_team1_home_conceded": h2h_team1_home_conceded,
+        "h2h_team2_home_wins": h2h_team2_home_wins,
+        "h2h_team2_home_draws": h2h_team2_home_draws,
+        "h2h_team2_home_losses": h2h_team2_home_losses,
+        "h2h_team2_home_scored": h2h_team2_home_scored,
+        "h2h_team2_home_conceded": h2h_team2_home_conceded,
+    }
+
+
+async def fetch_upcoming_matches_async(client, leagues_id=None, weeks=1, standings=None):
+    """Async version of fetch_upcoming_matches using a shared client.
+
+    Standings are looked up once per league through standings (a StandingsCache), which
+    defaults to a fresh per-run cache; h2h stats go through the persistent H2HCache.
+    Requests run at upcoming priority, ahead of any backfill sharing the client.
+    """
+    with prioritized(PRIORITY_UPCOMING):
+        leagues_id = _resolve_leagues(leagues_id)
+        if standings is None:
+            standings = new_standings_cache(client)
+
+        today_dt = datetime.now()
+        now = today_dt - timedelta(hours=1)
+        finish_dt = today_dt + timedelta(weeks=weeks)
+
+        fixtures = await _matches_in_window(client, leagues_id, now.date(), finish_dt.date())
+        with new_h2h_cache(client) as h2h:
+            games = await asyncio.gather(
+                *(
+                    _upcoming_game(client, league_id, obj, match, standings, h2h)
+                    for league_id, obj, match in fixtures
+                )
+            )
+            logging.info(f"[INFO] H2H cache hits: {h2h.hits}, misses: {h2h.misses}")
+    return [game for game in games if game is not None]
 
-        try:
-            response = SESSION.get(url, headers=headers, params=query, timeout=TIMEOUT)
-            data = response.json()
-        except Exception as e:
-            logging.error(f"[ERROR] Request or JSON decode failed for league {league_id}: {e}")
-            continue
 
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            logging.warning(f"[WARNING] Unexpected data type: {type(data)} for league {league_id}")
-            continue
+@instrumented(rows=len)
+def fetch_upcoming_matches(leagues_id=None, weeks=1):
+    """Fetch upcoming match data from the API for specified leagues over the next given weeks."""
+    return run_sync(_with_client(fetch_upcoming_matches_async, leagues_id, weeks))
 
-        for obj in data:
-            if not isinstance(obj, dict):
-                logging.warning(f"[WARNING] Unexpected data format: {obj}")
-                continue
 
-            for stage in obj.get("stage", []):
-                for match in stage.get("matches", []):
-                    match_date_str = match.get("date")
-                    if not match_date_str:
-                        continue
-                    try:
-                        match_date = datetime.strptime(match_date_str, "%d/%m/%Y")
-                    except Exception as e:
-                        logging.warning(f"[WARNING] Date parsing failed: {match_date_str} ({e})")
-                        continue
-                    if now.date() <= match_date.date() <= finish_dt.date():
-                        home_team = match.get("teams", {}).get("home", {})
-                        away_team = match.get("teams", {}).get("away", {})
-
-                        is_cup = match.get("is_cup")
-                        odds = match.get("odds", {}).get("match_winner", {})
-                        if not isinstance(odds, dict):
-                            odds = None
-                        if is_cup is None:
-                            is_cup = obj.get("is_cup")
-
-                        team1_rank = team2_rank = ""
-                        standings = []
-                        try:
-                            standings = get_standings(league_id)
-                        except Exception as e:
-                            logging.warning(
-                                f"Error getting standings for league_id {league_id}: {e}"
-                            )
-                        if standings:
-                            for team in standings:
-                                if str(team.get("team_id")) == str(home_team.get("id")):
-                                    team1_rank = team.get("position", "")
-                                if str(team.get("team_id")) == str(away_team.get("id")):
-                                    team2_rank = team.get("position", "")
-                                if team1_rank and team2_rank:
-                                    break
-
-                        h2h_games_played = h2h_team1_wins = h2h_team2_wins = h2h_draws = ""
-                        h2h_team1_scored = h2h_team2_scored = ""
-                        h2h_team1_home_wins = h2h_team1_home_draws = h2h_team1_home_losses = ""
-                        h2h_team1_home_scored = h2h_team1_home_conceded = ""
-                        h2h_team2_home_wins = h2h_team2_home_draws = h2h_team2_home_losses = ""
-                        h2h_team2_home_scored = h2h_team2_home_conceded = ""
-                        home_id = home_team.get("id")
-                        away_id = away_team.get("id")
-                        h2h_valid = True
-                        if home_id and away_id:
-                            h2h_data = get_h2h(home_id, away_id)
-                            h2h_data = h2h_data if isinstance(h2h_data, dict) else {}
-                            stats = h2h_data.get("overall", {})
-                            stats = stats if isinstance(stats, dict) else {}
-
-                            def safe_get(d, k):
-                                v = d.get(k, 0) if isinstance(d, dict) else 0
-                                return v if isinstance(v, (int, float)) else 0
-
-                            h2h_games_played = safe_get(stats, "overall_games_played")
-                            h2h_team1_wins = safe_get(stats, "overall_team1_wins")
-                            h2h_team2_wins = safe_get(stats, "overall_team2_wins")
-                            h2h_draws = safe_get(stats, "overall_draws")
-                            h2h_team1_scored = safe_get(stats, "overall_team1_scored")
-                            h2h_team2_scored = safe_get(stats, "overall_team2_scored")
-                            t1_home = h2h_data.get("team1_at_home", {})
-                            t1_home = t1_home if isinstance(t1_home, dict) else {}
-                            h2h_team1_home_wins = safe_get(t1_home, "team1_wins_at_home")
-                            h2h_team1_home_draws = safe_get(t1_home, "team1_draws_at_home")
-                            h2h_team1_home_losses = safe_get(t1_home, "team1_losses_at_home")
-                            h2h_team1_home_scored = safe_get(t1_home, "team1_scored_at_home")
-                            h2h_team1_home_conceded = safe_get(t1_home, "team1_conceded_at_home")
-                            t2_home = h2h_data.get("team2_at_home", {})
-                            t2_home = t2_home if isinstance(t2_home, dict) else {}
-                            h2h_team2_home_wins = safe_get(t2_home, "team2_wins_at_home")
-                            h2h_team2_home_draws = safe_get(t2_home, "team2_draws_at_home")
-                            h2h_team2_home_losses = safe_get(t2_home, "team2_losses_at_home")
-                            h2h_team2_home_scored = safe_get(t2_home, "team2_scored_at_home")
-                            h2h_team2_home_conceded = safe_get(t2_home, "team2_conceded_at_home")
-                            if h2h_games_played == 0:
-                                h2h_valid = False
-                        else:
-                            h2h_valid = False
-
-                        home_name = home_team.get("name", "")
-                        away_name = away_team.get("name", "")
-                        if (
-                            not home_name
-                            or not away_name
-                            or not isinstance(odds, dict)
-                            or not odds
-                            or not h2h_valid
-                        ):
-                            continue
-                        games.append(
-                            {
-                                "date": match["date"],
-                                "time": match.get("time", ""),
-                                "home_name": home_name,
-                                "away_name": away_name,
-                                "home_id": home_team.get("id", "?"),
-                                "away_id": away_team.get("id", "?"),
-                                "match_id": match.get("id"),
-                                "league_id": league_id,
-                                "is_cup": is_cup,
-                                "odds": odds,
-                                "team1_rank": team1_rank,
-                                "team2_rank": team2_rank,
-                                "h2h_games_played": h2h_games_played,
-                                "h2h_team1_wins": h2h_team1_wins,
-                                "h2h_team2_wins": h2h_team2_wins,
-                                "h2h_draws": h2h_draws,
-                                "h2h_team1_scored": h2h_team1_scored,
-                                "h2h_team2_scored": h2h_team2_scored,
-                                "h2h_team1_home_wins": h2h_team1_home_wins,
-                                "h2h_team1_home_draws": h2h_team1_home_draws,
-                                "h2h_team1_home_losses": h2h_team1_home_losses,
-                                "h2h_team1_home_scored": h2h_team1_home_scored,
-                                "h2h_team1_home_conceded": h2h_team1_home_conceded,
-                                "h2h_team2_home_wins": h2h_team2_home_wins,
-                                "h2h_team2_home_draws": h2h_team2_home_draws,
-                                "h2h_team2_home_losses": h2h_team2_home_losses,
-                                "h2h_team2_home_scored": h2h_team2_home_scored,
-                                "h2h_team2_home_conceded": h2h_team2_home_conceded,
-                            }
-                        )
-    return games
+if __name__ == "__main__":
+    main()
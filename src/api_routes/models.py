@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Request, HTTPException, Depends
+from src.auth import verify_token
+
+router = APIRouter()
+
+
+@router.get("/models", tags=["Models"])
+def get_models(request: Request, token: bool = Depends(verify_token)):
+    models = request.app.state.models.current
+    if models is None:
+        raise HTTPException(status_code=503, detail="No models loaded.")
+    return models.info()
+
+
+@router.get("/metrics", tags=["Models"])
+def get_metrics(request: Request, token: bool = Depends(verify_token)):
+    return {"batcher": request.app.state.batcher.metrics()}
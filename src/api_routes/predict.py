@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Request, Response, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Union
 from src.auth import verify_token
 
+import asyncio
 import os
 import json
 import config
@@ -26,6 +27,39 @@ class MatchInput(BaseModel):
     odds: Optional[Odds] = None
 
 
+@router.post("/predict", tags=["Predictions"])
+async def predict_fixtures(
+    payload: Union[MatchInput, List[MatchInput]],
+    request: Request,
+    response: Response,
+    token: bool = Depends(verify_token),
+):
+    """Score one fixture (object body) or several (array body) with the loaded models.
+
+    Fixtures go through the app's MicroBatcher, which scores concurrent requests together.
+    Each prediction names the model version and fingerprint that scored it, since a hot
+    reload between batches can split one request across model sets; the X-Model-Version
+    and X-Model-Fingerprint headers are only set when every prediction shares one.
+    """
+    if request.app.state.models.current is None or request.app.state.context is None:
+        raise HTTPException(status_code=503, detail="Models are not loaded.")
+    matches = payload if isinstance(payload, list) else [payload]
+    if len(matches) > request.app.state.max_batch_size:
+        raise HTTPException(status_code=413, detail="Too many fixtures in one request.")
+    if not matches:
+        return []
+    batcher = request.app.state.batcher
+    results = await asyncio.gather(*(batcher.submit(m.model_dump()) for m in matches))
+    records = [
+        {**record, "model": {"version": models.version, "fingerprint": models.fingerprint}}
+        for record, models in results
+    ]
+    if len({models.fingerprint for _, models in results}) == 1:
+        response.headers["X-Model-Version"] = results[0][1].version
+        response.headers["X-Model-Fingerprint"] = results[0][1].fingerprint
+    return records if isinstance(payload, list) else records[0]
+
+
 @router.get("/predictions", tags=["Predictions"])
 def get_predictions(request: Request, token: bool = Depends(verify_token)):
     return request.app.state.predictions
@@ -0,0 +1,149 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import logging
+import time
+import numpy as np
+
+"""
+Coalesces concurrent single-item calls into batched calls of a handler.
+
+    batcher = MicroBatcher(lambda items: [x * 2 for x in items], max_batch=64, window=0.002)
+    batcher.start()
+    result = await batcher.submit(21)
+
+The first queued item opens a window of `window` seconds (or until max_batch items are
+queued); everything queued by then goes to one handler call on a single worker thread, so
+the event loop keeps accepting requests, which queue up for the next batch meanwhile.
+With window=0 nothing waits and batches hold whatever queued while the previous batch ran,
+which suits back-to-back load; a window helps when requests arrive spread out.
+"""
+
+
+class MicroBatcher:
+    def __init__(self, handler, max_batch=64, window=0.002, samples=2048):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batcher")
+        self._task = None
+        self._window = None
+        self._inflight = []
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self._batch_sizes = deque(maxlen=samples)
+        self._waits = deque(maxlen=samples)
+        self._run_seconds = deque(maxlen=samples)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop batching; requests still queued or in the running batch fail."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending = self._inflight
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+        self._inflight = []
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        """Queue one item and wait for its result from a batched handler call."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        if self._window is not None and not self._window.done() and self._batch_full():
+            self._window.set_result(None)
+        return await future
+
+    def _batch_full(self):
+        # While collecting, the batch's first item has already been taken off the queue.
+        return 1 + self._queue.qsize() >= self.max_batch
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        if not self._batch_full():
+            # One timer per batch; submit() closes the window early once a batch is full.
+            loop = asyncio.get_running_loop()
+            self._window = loop.create_future()
+            timer = loop.call_later(self.window, self._window.set_result, None)
+            try:
+                await self._window
+            finally:
+                timer.cancel()
+                self._window = None
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            start = time.perf_counter()
+            # Requests whose callers went away (cancelled futures) are not worth computing.
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            self._inflight = batch
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.handler, [item for item, _, _ in batch]
+                )
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Handler returned {len(results)} results for {len(batch)}")
+            except Exception as e:
+                logging.error(f"[ERROR] Batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self._inflight = []
+            self.batches += 1
+            self.items += len(batch)
+            self._batch_sizes.append(len(batch))
+            self._waits.extend(start - queued for _, _, queued in batch)
+            self._run_seconds.append(time.perf_counter() - start)
+
+    def metrics(self):
+        """Counters plus batch size, queue wait and handler time over the recent batches."""
+
+        def summary(values, scale=1):
+            if not values:
+                return None
+            values = np.asarray(values) * scale
+            return {
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p99": round(float(np.percentile(values, 99)), 3),
+                "max": round(float(values.max()), 3),
+            }
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "max_batch": self.max_batch,
+            "window_ms": self.window * 1000,
+            "batch_size": summary(self._batch_sizes),
+            "wait_ms": summary(self._waits, 1000),
+            "handler_ms": summary(self._run_seconds, 1000),
+        }
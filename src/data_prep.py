@@ -1,51 +1,17 @@
 from sklearn.preprocessing import StandardScaler
-from src.features import add_recent_form_features, apply_all_features
-from src.utils import load_json
+from src.features import add_recent_form_features, apply_row_features, encode_league
+from src.feature_store import FEATURE_STORE_PATH, build_features
+from src.instrument import instrumented
+from src.match_store import MATCHES_RAW_PATH, read_matches
 
 import pandas as pd
-import joblib
 import logging
 import json
-import os
-
-
-def preprocess_data(targets=None, cleanup_models=True):
-    """Preprocess historical match data for ML. Returns DataFrame, feature columns, and optionally targets."""
-    if cleanup_models:
-        models_dir = "models"
-        if os.path.exists(models_dir):
-            for fname in ["le_league.pkl", "feature_scaler.pkl", "feature_columns.json"]:
-                fpath = os.path.join(models_dir, fname)
-                if os.path.exists(fpath):
-                    try:
-                        os.remove(fpath)
-                    except Exception as e:
-                        logging.warning(f"[WARNING] Could not delete {fpath}: {e}")
-
-    path = "data/raw/matches_raw.json"
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Missing data file: {path}")
-    try:
-        data = load_json(path)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in {path}: {e}") from e
-
-    df = pd.DataFrame(data)
-    df.rename(
-        columns={
-            "team1_goals": "Team1Goals",
-            "team2_goals": "Team2Goals",
-            "league": "League",
-        },
-        inplace=True,
-    )
 
-    for gcol in ("Team1Goals", "Team2Goals"):
-        df[gcol] = pd.to_numeric(df[gcol], errors="coerce")
-    df = df.dropna(subset=["Team1Goals", "Team2Goals"])
 
-    df, le_league = apply_all_features(df)
-    df = add_recent_form_features(df, n_games=5)
+def engineer_row_features(df):
+    """Add every engineered column that only depends on the match itself."""
+    df = apply_row_features(df)
 
     h2h_cols = [
         "team1_rank",
@@ -78,6 +44,53 @@ def preprocess_data(targets=None, cleanup_models=True):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
+    odds_cols = [
+        ("home_win", "home_win"),
+        ("draw", "draw"),
+        ("away_win", "away_win"),
+    ]
+    if "odds" in df.columns:
+        for k, col in odds_cols:
+            df[col] = df["odds"].apply(lambda x: x.get(k) if isinstance(x, dict) else None)
+    else:
+        for k, col in odds_cols:
+            if f"odds_{k}" in df.columns:
+                df[col] = df[f"odds_{k}"]
+    return df
+
+
+@instrumented(rows=lambda result: len(result[0]))
+def preprocess_data(targets=None, feature_store_path=FEATURE_STORE_PATH):
+    """Preprocess historical match data for ML. Returns DataFrame, feature columns, and optionally targets.
+
+    Engineered columns are cached per match in the feature store at feature_store_path, so
+    only new or edited matches are recomputed; pass None to rebuild everything in memory.
+    """
+    try:
+        df = read_matches(categorical=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in {MATCHES_RAW_PATH}: {e}") from e
+
+    df.rename(
+        columns={
+            "team1_goals": "Team1Goals",
+            "team2_goals": "Team2Goals",
+            "league": "League",
+        },
+        inplace=True,
+    )
+
+    for gcol in ("Team1Goals", "Team2Goals"):
+        df[gcol] = pd.to_numeric(df[gcol], errors="coerce")
+    df = df.dropna(subset=["Team1Goals", "Team2Goals"])
+
+    _, le_league = encode_league(df[["League"]].copy())
+    if feature_store_path:
+        df = build_features(df, engineer_row_features, path=feature_store_path, n_games=5)
+    else:
+        df = add_recent_form_features(engineer_row_features(df), n_games=5)
+    df["League_Encoded"] = le_league.transform(df["League"])
+
     feature_columns = [
         "team1_rank",
         "team2_rank",
@@ -116,15 +129,6 @@ def preprocess_data(targets=None, cleanup_models=True):
         "implied_prob_diff",
     ]
 
-    if "odds" in df.columns:
-        odds_cols = [
-            ("home_win", "home_win"),
-            ("draw", "draw"),
-            ("away_win", "away_win"),
-        ]
-        for k, col in odds_cols:
-            df[col] = df["odds"].apply(lambda x: x.get(k) if isinstance(x, dict) else None)
-
     feature_columns_valid = [
         col for col in feature_columns if col in df.columns and not df[col].isna().all()
     ]
@@ -138,12 +142,6 @@ def preprocess_data(targets=None, cleanup_models=True):
     scaler = StandardScaler()
     df[feature_columns_valid] = scaler.fit_transform(df[feature_columns_valid])
 
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(le_league, "models/le_league.pkl")
-    joblib.dump(scaler, "models/feature_scaler.pkl")
-    with open("models/feature_columns.json", "w") as f:
-        json.dump(feature_columns_valid, f)
-
     if targets is not None:
         target_aligned = df.loc[:, targets].copy()
         return df, feature_columns_valid, target_aligned, scaler, le_league
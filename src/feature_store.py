@@ -0,0 +1,194 @@
+from datetime import datetime
+from src import features
+from src.features import add_recent_form_features, form_group_columns, update_recent_form
+from src.instrument import instrumented
+from src.utils import load_json, save_json
+
+import numpy as np
+import pandas as pd
+import hashlib
+import inspect
+import logging
+import shutil
+import warnings
+import os
+
+"""
+Engineered features per match, stored column by column: one .npy file per column
+plus a meta.json with the column kinds, the feature version and the row count.
+
+    data/features/store/meta.json
+    data/features/store/<column>.npy         values, or string codes for text columns
+    data/features/store/<column>.mask.npy    missing flags of nullable (Int64, boolean) columns
+
+Numeric and date columns are memory-mapped on read, and load_feature_store can read
+a subset of columns. Object columns holding anything other than strings (mixed raw
+JSON values) are saved as pickled object arrays so they round-trip unchanged.
+"""
+
+FEATURE_STORE_PATH = os.path.join("data", "features", "store")
+STORE_FORMAT = 2
+
+
+def feature_version(row_features, n_games=5):
+    """Fingerprint of the feature code, so editing any feature function invalidates the store."""
+    source = inspect.getsource(features) + inspect.getsource(row_features)
+    payload = f"{STORE_FORMAT}:{n_games}:{source}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def match_keys(df):
+    """Key each match by match_id, falling back to date, league and teams when it is missing."""
+    keys = (
+        df["date"].astype(str)
+        + "|"
+        + df["League"].astype(str)
+        + "|"
+        + df["team1"].astype(str)
+        + "|"
+        + df["team2"].astype(str)
+    )
+    if "match_id" in df.columns:
+        ids = pd.to_numeric(df["match_id"], errors="coerce").astype("Int64")
+        keys = ("id:" + ids.astype(str)).where(ids.notna(), keys)
+    dup = keys.groupby(keys).cumcount()
+    return keys.where(dup == 0, keys + "#" + dup.astype(str))
+
+
+def row_hashes(df):
+    """Content hash of each raw match record, used to detect edited matches."""
+    raw = df[sorted(df.columns)].astype(str)
+    return pd.util.hash_pandas_object(raw, index=False)
+
+
+def _column_file(path, name, suffix=""):
+    return os.path.join(path, f"{name}{suffix}.npy")
+
+
+def _encode_column(series):
+    """(kind, {file suffix: array}, extra meta) for one frame column."""
+    dtype = series.dtype
+    if pd.api.types.is_extension_array_dtype(dtype) and hasattr(dtype, "numpy_dtype"):
+        values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return "masked", {"": values, ".mask": series.isna().to_numpy()}, {"dtype": str(dtype)}
+    if pd.api.types.is_object_dtype(dtype):
+        values = series.to_numpy()
+        if all(isinstance(v, str) for v in values):
+            codes, uniques = pd.factorize(values)
+            return "string", {"": codes.astype(np.int32)}, {"categories": list(uniques)}
+        return "object", {"": values}, {}
+    return "array", {"": series.to_numpy()}, {}
+
+
+def _read_column(path, name, spec, mmap_mode="r"):
+    kind = spec["kind"]
+    if kind == "object":
+        return np.load(_column_file(path, name), allow_pickle=True)
+    values = np.load(_column_file(path, name), mmap_mode=mmap_mode)
+    if kind == "string":
+        return np.array(spec["categories"], dtype=object)[values]
+    if kind == "masked":
+        array = pd.array(np.asarray(values), dtype=spec["dtype"])
+        array[np.load(_column_file(path, name, ".mask"))] = pd.NA
+        return array
+    return values
+
+
+def load_feature_store(path=FEATURE_STORE_PATH, version=None, columns=None):
+    """Load the stored feature frame, or None if it is missing or built by other feature code.
+
+    columns restricts the read to those columns (plus match_key, the index).
+    """
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        meta = load_json(meta_path)
+        if meta.get("format") != STORE_FORMAT:
+            return None
+        if version is not None and meta.get("version") != version:
+            logging.info("[INFO] Feature code changed since the store was built. Rebuilding.")
+            return None
+        names = [n for n in meta["columns"] if columns is None or n in columns or n == "match_key"]
+        data = {n: _read_column(path, n, meta["columns"][n]) for n in names}
+    except Exception as e:
+        logging.warning(f"[WARNING] Could not read feature store {path}: {e}")
+        return None
+    return pd.DataFrame(data).set_index("match_key", drop=False)
+
+
+def save_feature_store(frame, version, path=FEATURE_STORE_PATH):
+    """Write the feature frame column by column together with its version stamp.
+
+    The new store is built next to the old one and swapped in once complete, so a crash
+    mid-write leaves the previous store untouched.
+    """
+    tmp_dir = f"{path}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = {}
+    for name in frame.columns:
+        kind, arrays, extra = _encode_column(frame[name])
+        for suffix, values in arrays.items():
+            np.save(_column_file(tmp_dir, name, suffix), values)
+        columns[name] = {"kind": kind, **extra}
+    meta = {
+        "format": STORE_FORMAT,
+        "version": version,
+        "rows": len(frame),
+        "columns": columns,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    save_json(meta, os.path.join(tmp_dir, "meta.json"))
+
+    old_dir = f"{path}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_dir)
+    os.replace(tmp_dir, path)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+@instrumented(rows=len)
+def build_features(df, row_features, path=FEATURE_STORE_PATH, n_games=5):
+    """Return unscaled engineered features for df, computing only new or changed matches.
+
+    row_features computes the per-row columns for a slice of matches. Matches whose raw
+    record is unchanged since the last run are read back from the store; recent form is
+    then recomputed only for rows whose window a new, edited or removed match falls in.
+    """
+    df = df.copy()
+    df["match_key"] = match_keys(df)
+    df["row_hash"] = row_hashes(df.drop(columns="match_key"))
+    version = feature_version(row_features, n_games)
+    stored = load_feature_store(path, version)
+
+    if stored is None:
+        frame = add_recent_form_features(row_features(df), n_games=n_games)
+        logging.info(f"[INFO] Feature store rebuilt with {len(frame)} matches.")
+    else:
+        stored_hash = stored["row_hash"].astype(object).reindex(df["match_key"]).to_numpy()
+        same = stored_hash == df["row_hash"].to_numpy()
+        kept = stored.loc[df.loc[same, "match_key"]].set_axis(df.index[same])
+        changes = stored.drop(index=df.loc[same, "match_key"])
+        fresh = row_features(df.loc[~same].copy())
+        fresh["date"] = pd.to_datetime(fresh["date"], errors="coerce", dayfirst=True)
+        fresh = fresh.dropna(subset=["date"])
+        with warnings.catch_warnings():
+            # Columns that are all-NA on one side keep the other side's dtype.
+            warnings.simplefilter("ignore", FutureWarning)
+            frame = pd.concat([kept, fresh]) if len(fresh) else kept
+        frame = frame.sort_index()
+        frame = frame.sort_values(form_group_columns(frame) + ["date"])
+        if fresh.empty and changes.empty:
+            logging.info("[INFO] Feature store is up to date.")
+            return frame.drop(columns=["match_key", "row_hash"])
+        rows = frame.index.isin(fresh.index).nonzero()[0]
+        frame = update_recent_form(frame, rows, changes, n_games=n_games)
+        logging.info(
+            f"[INFO] Feature store updated: {len(fresh)} new or changed, "
+            f"{len(changes)} replaced or removed matches."
+        )
+
+    save_feature_store(frame.set_index("match_key", drop=False), version, path)
+    return frame.drop(columns=["match_key", "row_hash"])
@@ -1,4 +1,7 @@
 from sklearn.preprocessing import LabelEncoder
+from src.instrument import instrumented
+from src.match_store import read_matches
+from src.utils import load_json
 
 import numpy as np
 import pandas as pd
@@ -74,6 +77,7 @@ def encode_league(df):
     return df, le_league
 
 
+@instrumented(rows=len)
 def add_recent_form_features(df, n_games=5):
     """Add features based on recent form of both teams, grouped by league and season."""
     df = df.copy()
@@ -86,73 +90,186 @@ def add_recent_form_features(df, n_games=5):
 
     df = df.dropna(subset=["date"])
 
-    season_col = None
+    group_cols = form_group_columns(df)
+    df = df.sort_values(group_cols + ["date"])
+
+    keys = [df[col].to_numpy() for col in group_cols]
+    points, goals = _rolling_team_form(
+        keys,
+        df["date"].to_numpy(),
+        df["team1"].to_numpy(),
+        df["team2"].to_numpy(),
+        df["Team1Goals"].to_numpy(dtype=float),
+        df["Team2Goals"].to_numpy(dtype=float),
+        n_games,
+    )
+    n = len(df)
+    df["team1_last5_avg_points"] = points[:n]
+    df["team2_last5_avg_points"] = points[n:]
+    df["team1_last5_avg_goals"] = goals[:n]
+    df["team2_last5_avg_goals"] = goals[n:]
+    return df
+
+
+def form_group_columns(df):
+    """Columns that bound a recent-form window: the league plus the season, if present."""
     for col in ["season", "ano", "year"]:
         if col in df.columns:
-            season_col = col
-            break
+            return ["League", col]
+    return ["League"]
 
-    group_cols = ["League"]
-    if season_col:
-        group_cols.append(season_col)
 
-    df = df.sort_values(group_cols + ["date"])
+def update_recent_form(df, rows, changes, n_games=5):
+    """Recompute recent form only where a changed match can enter a team's window.
 
-    team1_form, team2_form = [], []
-    team1_goals, team2_goals = [], []
-    for idx, row in df.iterrows():
-        t1 = row["team1"]
-        t2 = row["team2"]
-        date = row["date"]
-        league = row["League"]
-        season_val = row[season_col] if season_col else None
-
-        mask_t1 = df["League"] == league
-        mask_t2 = df["League"] == league
-        if season_col:
-            mask_t1 &= df[season_col] == season_val
-            mask_t2 &= df[season_col] == season_val
-
-        prev_t1 = df[
-            mask_t1 & ((df["team1"] == t1) | (df["team2"] == t1)) & (df["date"] < date)
-        ].tail(n_games)
-        prev_t2 = df[
-            mask_t2 & ((df["team1"] == t2) | (df["team2"] == t2)) & (df["date"] < date)
-        ].tail(n_games)
-
-        def calc_stats(prev, team):
-            if prev.empty:
-                return 0, 0
-            points = 0
-            goals = 0
-            for _, g in prev.iterrows():
-                if g["team1"] == team:
-                    goals += g["Team1Goals"]
-                    if g["Team1Goals"] > g["Team2Goals"]:
-                        points += 3
-                    elif g["Team1Goals"] == g["Team2Goals"]:
-                        points += 1
-                else:
-                    goals += g["Team2Goals"]
-                    if g["Team2Goals"] > g["Team1Goals"]:
-                        points += 3
-                    elif g["Team2Goals"] == g["Team1Goals"]:
-                        points += 1
-            return points / n_games, goals / n_games
-
-        t1_points, t1_avg_goals = calc_stats(prev_t1, t1)
-        t2_points, t2_avg_goals = calc_stats(prev_t2, t2)
-        team1_form.append(t1_points)
-        team2_form.append(t2_points)
-        team1_goals.append(t1_avg_goals)
-        team2_goals.append(t2_avg_goals)
-    df["team1_last5_avg_points"] = team1_form
-    df["team2_last5_avg_points"] = team2_form
-    df["team1_last5_avg_goals"] = team1_goals
-    df["team2_last5_avg_goals"] = team2_goals
+    df is a frame already sorted as returned by add_recent_form_features. rows are the
+    positions of new or changed matches in df; changes holds the group columns, date,
+    team1 and team2 of matches that moved or were removed. A match dated d touches at
+    most the next n_games dates each of its teams plays on after d, and recomputing a
+    row only needs each team's last n_games matches before the earliest touched row.
+    """
+    df = df.copy()
+    group_cols = form_group_columns(df)
+    n = len(df)
+    sides = pd.DataFrame(
+        {
+            **{col: np.concatenate([df[col], df[col]]) for col in group_cols},
+            "team": np.concatenate([df["team1"], df["team2"]]),
+            "row": np.concatenate([np.arange(n), np.arange(n)]),
+        }
+    )
+    runs = {
+        key: np.sort(sides["row"].to_numpy()[pos])
+        for key, pos in sides.groupby(group_cols + ["team"], sort=False).indices.items()
+    }
+    day = df["date"].to_numpy().astype("datetime64[ns]").view(np.int64)
+
+    event_cols = group_cols + ["date", "team1", "team2"]
+    events = pd.concat(
+        [df.iloc[list(rows)][event_cols], changes.reindex(columns=event_cols)], ignore_index=True
+    )
+    events["date"] = pd.to_datetime(events["date"], errors="coerce", dayfirst=True)
+    events = events.dropna(subset=["date"])
+    affected = np.zeros(n, dtype=bool)
+    affected[list(rows)] = True
+    for event in events.itertuples(index=False):
+        values = [getattr(event, col) for col in group_cols]
+        when = pd.Timestamp(event.date).value
+        for team in (event.team1, event.team2):
+            run = runs.get(tuple(values) + (team,))
+            if run is None:
+                continue
+            later = run[day[run] > when]
+            if len(later):
+                last = day[later[min(n_games, len(later)) - 1]]
+                affected[later[day[later] <= last]] = True
+
+    targets = np.flatnonzero(affected)
+    if not len(targets):
+        return df
+    needed = affected.copy()
+    first_touch = {}
+    for row in targets:
+        values = [df[col].iat[row] for col in group_cols]
+        for team in (df["team1"].iat[row], df["team2"].iat[row]):
+            key = tuple(values) + (team,)
+            first_touch[key] = min(first_touch.get(key, day[row]), day[row])
+    for key, when in first_touch.items():
+        run = runs.get(key)
+        if run is None:
+            continue
+        start = max(int(np.searchsorted(day[run], when, side="left")) - n_games, 0)
+        needed[run[start:]] = True
+
+    subset = np.flatnonzero(needed)
+    part = df.iloc[subset]
+    points, goals = _rolling_team_form(
+        [part[col].to_numpy() for col in group_cols],
+        part["date"].to_numpy(),
+        part["team1"].to_numpy(),
+        part["team2"].to_numpy(),
+        part["Team1Goals"].to_numpy(dtype=float),
+        part["Team2Goals"].to_numpy(dtype=float),
+        n_games,
+    )
+    take = np.searchsorted(subset, targets)
+    m = len(subset)
+    columns = {
+        "team1_last5_avg_points": points[take],
+        "team2_last5_avg_points": points[m + take],
+        "team1_last5_avg_goals": goals[take],
+        "team2_last5_avg_goals": goals[m + take],
+    }
+    for col, values in columns.items():
+        if col not in df.columns:
+            df[col] = np.nan
+        df.iloc[targets, df.columns.get_loc(col)] = values
     return df
 
 
+def _match_points(own_goals, opp_goals):
+    """Return 3/1/0 points for each match from the team's perspective."""
+    return np.where(own_goals > opp_goals, 3.0, np.where(own_goals == opp_goals, 1.0, 0.0))
+
+
+def _rolling_team_form(keys, dates, team1, team2, goals1, goals2, n_games):
+    """Average points and goals over each team's previous n_games within its group.
+
+    Every match is split into a home and an away perspective row. Rows are ordered by
+    (group, team, date, match position) and a cumulative sum gives each window total in
+    O(1), so the whole pass is a single sort plus linear scans. Only games played strictly
+    before the match date count, matching the original per-row filter. Returns two arrays
+    of length 2 * len(dates): home perspectives first, then away perspectives.
+    """
+    n = len(dates)
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+
+    group_codes = np.zeros(n, dtype=np.int64)
+    valid = np.ones(n, dtype=bool)
+    for key in keys:
+        codes, uniques = pd.factorize(key)
+        valid &= codes >= 0
+        group_codes = group_codes * (len(uniques) + 1) + codes + 1
+    team_codes, _ = pd.factorize(np.concatenate([team1, team2]))
+
+    group = np.concatenate([group_codes, group_codes])
+    valid = np.concatenate([valid, valid]) & (team_codes >= 0)
+    day = np.concatenate([dates, dates]).astype("datetime64[ns]").view(np.int64)
+    position = np.concatenate([np.arange(n), np.arange(n)])
+    own = np.concatenate([goals1, goals2])
+    opp = np.concatenate([goals2, goals1])
+
+    order = np.lexsort((position, day, team_codes, group))
+    group, team_codes, day = group[order], team_codes[order], day[order]
+    own, opp = own[order], opp[order]
+
+    idx = np.arange(2 * n)
+    new_team = np.ones(2 * n, dtype=bool)
+    new_team[1:] = (group[1:] != group[:-1]) | (team_codes[1:] != team_codes[:-1])
+    new_day = new_team.copy()
+    new_day[1:] |= day[1:] != day[:-1]
+    team_start = np.maximum.accumulate(np.where(new_team, idx, 0))
+    day_start = np.maximum.accumulate(np.where(new_day, idx, 0))
+    window_start = np.maximum(day_start - n_games, team_start)
+
+    def window_sum(values):
+        nan = np.isnan(values)
+        totals = np.concatenate([[0.0], np.cumsum(np.where(nan, 0.0, values))])
+        nans = np.concatenate([[0], np.cumsum(nan)])
+        out = totals[day_start] - totals[window_start]
+        out[nans[day_start] - nans[window_start] > 0] = np.nan
+        return out
+
+    points = np.empty(2 * n)
+    goals = np.empty(2 * n)
+    points[order] = window_sum(_match_points(own, opp)) / n_games
+    goals[order] = window_sum(own) / n_games
+    points[~valid] = 0.0
+    goals[~valid] = 0.0
+    return points, goals
+
+
 def add_odds_features(df):
     """Add features derived from odds: ratios, min/max, implied probabilities, etc."""
     if all(col in df.columns for col in ["home_win", "draw", "away_win"]):
@@ -171,8 +288,8 @@ def add_odds_features(df):
     return df
 
 
-def apply_all_features(df):
-    """Apply all feature engineering functions to the DataFrame."""
+def apply_row_features(df):
+    """Apply the feature engineering functions that only depend on each row."""
     df = add_winner_feature(df)
     df = add_double_chance_feature(df)
     df = add_over_feature(df)
@@ -180,68 +297,100 @@ def apply_all_features(df):
     df = add_rank_diff_feature(df)
     df = add_h2h_feature(df)
     df = add_odds_features(df)
+    return df
+
+
+def apply_all_features(df):
+    """Apply all feature engineering functions to the DataFrame."""
+    df = apply_row_features(df)
     df, le_league = encode_league(df)
     return df, le_league
 
 
+class TeamHistoryIndex:
+    """Per-(league, team) date-sorted points and goals for fast last-N form lookups.
+
+    Built once from the historical matches, so every upcoming fixture costs a binary
+    search and a short slice sum instead of a scan over the whole history.
+    """
+
+    def __init__(self, historical_df):
+        historical_df = historical_df.rename(
+            columns={"league": "League", "team1_goals": "Team1Goals", "team2_goals": "Team2Goals"}
+        )
+        goals1 = pd.to_numeric(historical_df["Team1Goals"], errors="coerce").to_numpy(dtype=float)
+        goals2 = pd.to_numeric(historical_df["Team2Goals"], errors="coerce").to_numpy(dtype=float)
+        dates = pd.to_datetime(historical_df["date"], errors="coerce", dayfirst=True)
+        frame = pd.DataFrame(
+            {
+                "League": np.concatenate([historical_df["League"], historical_df["League"]]),
+                "team": np.concatenate([historical_df["team1"], historical_df["team2"]]),
+                "date": np.concatenate([dates, dates]),
+                "points": np.concatenate(
+                    [_match_points(goals1, goals2), _match_points(goals2, goals1)]
+                ),
+                "goals": np.concatenate([goals1, goals2]),
+            }
+        )
+        frame = frame.dropna(subset=["date"]).sort_values("date", kind="stable")
+        day = frame["date"].to_numpy().astype("datetime64[ns]").view(np.int64)
+        points = frame["points"].to_numpy()
+        goals = frame["goals"].to_numpy()
+        self._teams = {
+            key: (day[pos], points[pos], goals[pos])
+            for key, pos in frame.groupby(["League", "team"], sort=False).indices.items()
+        }
+
+    @classmethod
+    def from_json(cls, path="data/raw/matches_raw.json"):
+        """Build the index from a historical matches JSON file."""
+        return cls(pd.DataFrame(load_json(path)))
+
+    @classmethod
+    @instrumented("TeamHistoryIndex.from_store")
+    def from_store(cls, **kwargs):
+        """Build the index from the columnar match store, reading only the columns it needs."""
+        columns = ["date", "league", "team1", "team2", "team1_goals", "team2_goals"]
+        return cls(read_matches(columns=columns, categorical=False, **kwargs))
+
+    def __len__(self):
+        return len(self._teams)
+
+    def recent_form(self, league, team, date, n_games=5):
+        """Return (avg points, avg goals) over the team's last n_games before date."""
+        history = self._teams.get((league, team))
+        if history is None or pd.isna(date):
+            return 0, 0
+        days, points, goals = history
+        end = int(np.searchsorted(days, pd.Timestamp(date).value, side="left"))
+        if end == 0:
+            return 0, 0
+        start = max(end - n_games, 0)
+        return points[start:end].sum() / n_games, goals[start:end].sum() / n_games
+
+
 def add_recent_form_to_upcoming(upcoming_df, historical_df, n_games=5):
-    """Add recent form features to upcoming matches based on historical data."""
-    historical_df = historical_df.copy()
+    """Add recent form features to upcoming matches based on historical data.
+
+    historical_df may be the raw historical DataFrame or a prebuilt TeamHistoryIndex.
+    """
+    if isinstance(historical_df, TeamHistoryIndex):
+        index = historical_df
+    else:
+        index = TeamHistoryIndex(historical_df)
     upcoming_df = upcoming_df.copy()
-    historical_df["date"] = pd.to_datetime(historical_df["date"], errors="coerce", dayfirst=True)
     upcoming_df["date"] = pd.to_datetime(upcoming_df["date"], errors="coerce", dayfirst=True)
 
     team1_form, team2_form = [], []
     team1_goals, team2_goals = [], []
-
-    for idx, row in upcoming_df.iterrows():
-        t1 = row["home_name"]
-        t2 = row["away_name"]
-        date = row["date"]
-        league = row["League"]
-
-        prev_t1 = (
-            historical_df[
-                (historical_df["League"] == league)
-                & ((historical_df["team1"] == t1) | (historical_df["team2"] == t1))
-                & (historical_df["date"] < date)
-            ]
-            .sort_values("date")
-            .tail(n_games)
-        )
-
-        prev_t2 = (
-            historical_df[
-                (historical_df["League"] == league)
-                & ((historical_df["team1"] == t2) | (historical_df["team2"] == t2))
-                & (historical_df["date"] < date)
-            ]
-            .sort_values("date")
-            .tail(n_games)
-        )
-
-        def calc_stats(prev, team):
-            if prev.empty:
-                return 0, 0
-            points = 0
-            goals = 0
-            for _, g in prev.iterrows():
-                if g["team1"] == team:
-                    goals += g["Team1Goals"]
-                    if g["Team1Goals"] > g["Team2Goals"]:
-                        points += 3
-                    elif g["Team1Goals"] == g["Team2Goals"]:
-                        points += 1
-                else:
-                    goals += g["Team2Goals"]
-                    if g["Team2Goals"] > g["Team1Goals"]:
-                        points += 3
-                    elif g["Team2Goals"] == g["Team1Goals"]:
-                        points += 1
-            return points / n_games, goals / n_games
-
-        t1_points, t1_avg_goals = calc_stats(prev_t1, t1)
-        t2_points, t2_avg_goals = calc_stats(prev_t2, t2)
+    for league, t1, t2, date in zip(
+        upcoming_df["League"],
+        upcoming_df["home_name"],
+        upcoming_df["away_name"],
+        upcoming_df["date"],
+    ):
+        t1_points, t1_avg_goals = index.recent_form(league, t1, date, n_games)
+        t2_points, t2_avg_goals = index.recent_form(league, t2, date, n_games)
         team1_form.append(t1_points)
         team2_form.append(t2_points)
         team1_goals.append(t1_avg_goals)
@@ -0,0 +1,50 @@
+from src.match_store import INGEST_DIR, MATCHES_RAW_PATH, pending_segments
+from src.utils import load_json, save_json
+
+import hashlib
+import json
+import logging
+import os
+
+
+def file_digest(path):
+    """sha256 of a file's bytes, or None when it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_digest(paths):
+    """Digest of several files keyed by path, so renames and reorderings change it too."""
+    return {path: file_digest(path) for path in sorted(paths)}
+
+
+def data_digest(json_path=MATCHES_RAW_PATH, ingest_dir=INGEST_DIR):
+    """Digest of the historical match data: matches_raw.json plus pending ingest segments."""
+    return files_digest([json_path, *pending_segments(ingest_dir)])
+
+
+def stage_fingerprint(**inputs):
+    """Single hash over a stage's named inputs (digests, config sections, ...)."""
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_up_to_date(path, fingerprint, outputs=()):
+    """True when the fingerprint recorded at path matches and every output still exists."""
+    if not os.path.exists(path) or not all(os.path.exists(o) for o in outputs):
+        return False
+    try:
+        return load_json(path).get("fingerprint") == fingerprint
+    except Exception as e:
+        logging.warning(f"[WARNING] Ignoring unreadable fingerprint {path}: {e}")
+        return False
+
+
+def save_fingerprint(path, fingerprint):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    save_json({"fingerprint": fingerprint}, path)
@@ -0,0 +1,92 @@
+import numpy as np
+
+"""
+Array-based inference for fitted RandomForestClassifier models.
+
+sklearn's predict_proba validates input, dispatches one job per tree and allocates per-tree
+outputs, which dominates the cost at the batch sizes we serve (one fixture to a few tens).
+CompiledForest flattens every tree into shared node arrays once and walks all trees for a
+whole batch with a handful of NumPy operations per tree level.
+"""
+
+
+class CompiledForest:
+    """Flat-array copy of a fitted forest with sklearn-compatible predict_proba/predict.
+
+    Node i of the concatenated trees splits on feature[i] at threshold[i] and continues at
+    children[2 * i] (left) or children[2 * i + 1] (right); leaves point at themselves, so
+    a fixed number of steps (the deepest tree's depth) lands every sample on its leaf.
+    value[i] holds the leaf's class distribution, one row per output.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+
+    @classmethod
+    def from_forest(cls, model):
+        """Export the trees of a fitted forest; classes_/n_classes_ are kept for decoding."""
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            ids = np.arange(tree.node_count) + offset
+            leaf = tree.children_left < 0
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            left = np.where(leaf, ids, tree.children_left + offset)
+            right = np.where(leaf, ids, tree.children_right + offset)
+            children.append(np.column_stack([left, right]).ravel())
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            values.append(tree.value / tree.value.sum(axis=2, keepdims=True).clip(min=1e-12))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        engine = cls(
+            np.concatenate(features).astype(np.intp),
+            np.concatenate(thresholds).astype(np.float64),
+            np.concatenate(children).astype(np.intp),
+            np.concatenate(missing),
+            np.concatenate(values),
+            np.asarray(roots, dtype=np.intp),
+            depth,
+        )
+        engine.classes_ = model.classes_
+        engine.n_classes_ = model.n_classes_
+        engine.n_outputs_ = model.n_outputs_
+        return engine
+
+    def apply(self, X):
+        """Leaf node index of every (sample, tree) pair, shape (n_samples, n_trees)."""
+        # sklearn trees compare float32 features against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_samples, n_features = X.shape
+        flat = X.ravel()
+        has_nan = np.isnan(flat).any()
+        row_start = (np.arange(n_samples) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_samples, len(self.roots)))
+        for _ in range(self.depth):
+            x = np.take(flat, row_start + np.take(self.feature, node))
+            go_right = x > np.take(self.threshold, node)
+            if has_nan:
+                go_right |= np.isnan(x) & ~np.take(self.missing_left, node)
+            node = np.take(self.children, 2 * node + go_right)
+        return node
+
+    def predict_proba(self, X):
+        """Mean leaf distribution over trees; a list per output for multi-output forests."""
+        proba = np.take(self.value, self.apply(X), axis=0).mean(axis=1)
+        if self.n_outputs_ == 1:
+            return proba[:, 0, : self.n_classes_]
+        return [proba[:, k, :n] for k, n in enumerate(self.n_classes_)]
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        if self.n_outputs_ == 1:
+            return self.classes_[proba.argmax(axis=1)]
+        return np.column_stack([c[p.argmax(axis=1)] for c, p in zip(self.classes_, proba)])
@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from src.utils import save_json
+
+import cProfile
+import io
+import logging
+import os
+import platform
+import pstats
+import resource
+import time
+import tracemalloc
+
+"""
+Stage spans for pipeline runs.
+
+    start_run("full", profile="train", trace_memory=True)
+    with span("train"):
+        train_model()
+    write_report()
+
+Spans nest, and each one records wall and CPU seconds, the process's peak RSS so far,
+the tracemalloc peak inside the span and how far it rose above the memory traced when
+the span opened (with trace_memory), and an optional row count (set_rows). Outside a
+run, span() and @instrumented cost a couple of attribute lookups.
+"""
+
+PIPELINE_REPORT_PATH = os.path.join("data", "stats", "pipeline_run.json")
+PROFILE_DIR = os.path.join("data", "stats", "profiles")
+
+_run = None
+
+
+def _max_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    scale = 2**20 if platform.system() == "Darwin" else 2**10
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def start_run(name, profile=None, trace_memory=False):
+    """Begin collecting spans; profile names the span to run under cProfile."""
+    global _run
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _run = {
+        "name": name,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "start": time.perf_counter(),
+        "cpu": time.process_time(),
+        "profile": profile,
+        "trace_memory": trace_memory,
+        "spans": [],
+        "stack": [],
+    }
+
+
+def set_rows(rows):
+    """Attach a row count to the innermost open span."""
+    if _run is not None and _run["stack"]:
+        _run["stack"][-1]["rows"] = int(rows)
+
+
+@contextmanager
+def span(name):
+    if _run is None:
+        yield
+        return
+    stack = _run["stack"]
+    record = {
+        "name": name,
+        "path": "/".join([s["name"] for s in stack] + [name]),
+        "depth": len(stack),
+    }
+    if _run["trace_memory"] and tracemalloc.is_tracing():
+        # reset_peak() would hide the parent's peak so far, so hand it up first.
+        if stack:
+            stack[-1]["_peak"] = max(stack[-1]["_peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record["_peak"] = 0
+        record["_traced_start"] = tracemalloc.get_traced_memory()[0]
+    _run["spans"].append(record)
+    stack.append(record)
+    profiler = cProfile.Profile() if _run["profile"] == name else None
+    start, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        record["cpu_seconds"] = round(time.process_time() - cpu, 4)
+        record["max_rss_mb"] = _max_rss_mb()
+        if "_peak" in record:
+            peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+            record["peak_traced_mb"] = round(peak / 2**20, 2)
+            growth = peak - record.pop("_traced_start")
+            record["peak_growth_mb"] = round(growth / 2**20, 2)
+            if len(stack) > 1:
+                stack[-2]["_peak"] = max(stack[-2]["_peak"], peak)
+        stack.pop()
+        if profiler:
+            record["profile"] = _save_profile(profiler, record["path"])
+
+
+def instrumented(name=None, rows=None):
+    """Decorator running a function inside span(name); rows maps its result to a row count."""
+
+    def decorator(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _run is None:
+                return func(*args, **kwargs)
+            with span(label):
+                result = func(*args, **kwargs)
+                if rows is not None and result is not None:
+                    set_rows(rows(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def _save_profile(profiler, path, top=25):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, path.replace("/", "."))
+    profiler.dump_stats(f"{base}.prof")
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+    logging.info(f"[INFO] cProfile output for '{path}' saved in {base}.prof and {base}.txt")
+    return f"{base}.prof"
+
+
+def write_report(path=PIPELINE_REPORT_PATH):
+    """Write the spans of the current run as JSON and end the run."""
+    global _run
+    if _run is None:
+        return None
+    report = {
+        "run": _run["name"],
+        "started_at": _run["started_at"],
+        "seconds": round(time.perf_counter() - _run["start"], 4),
+        "cpu_seconds": round(time.process_time() - _run["cpu"], 4),
+        "max_rss_mb": _max_rss_mb(),
+        "trace_memory": _run["trace_memory"],
+        "python": platform.python_version(),
+        "spans": _run["spans"],
+    }
+    if _run["trace_memory"]:
+        tracemalloc.stop()
+    _run = None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    save_json(report, path)
+    logging.info(f"[INFO] Pipeline run report saved in {path}")
+    return report
@@ -1,6 +1,7 @@
 import typer
 
 from src.train import train_model as train_main
+from src.tune import tune_model as tune_main
 from src.predict import main as predict_main
 from scripts.validate_historical_matches import validate_historical_matches as validate_main
 
@@ -15,15 +16,25 @@ app = typer.Typer(help="Football Prediction Project CLI")
 
 
 @app.command()
-def train():
+def train(
+    force: bool = typer.Option(False, "--force", help="Retrain even if inputs are unchanged")
+):
     """Train the models and save artifacts."""
-    train_main()
+    train_main(force=force)
 
 
 @app.command()
-def predict():
+def tune():
+    """Search forest parameters per target and save them as an overlay for training."""
+    tune_main()
+
+
+@app.command()
+def predict(
+    force: bool = typer.Option(False, "--force", help="Predict even if inputs are unchanged")
+):
     """Make predictions on upcoming matches."""
-    predict_main()
+    predict_main(force=force)
 
 
 @app.command()
@@ -0,0 +1,418 @@
+from datetime import datetime
+from src.instrument import instrumented
+from src.utils import load_json, save_json
+
+import numpy as np
+import pandas as pd
+import hashlib
+import logging
+import shutil
+import json
+import time
+import os
+import re
+
+MATCHES_RAW_PATH = os.path.join("data", "raw", "matches_raw.json")
+MATCH_STORE_DIR = os.path.join("data", "raw", "matches")
+INGEST_DIR = os.path.join("data", "raw", "ingest")
+MATCH_IDS_FILE = "match_ids.txt"
+SEGMENT_PATTERN = re.compile(r"segment-\d+\.jsonl")
+STORE_FORMAT = 1
+
+CATEGORICAL_COLUMNS = ["league", "team1", "team2", "time"]
+NESTED_COLUMNS = ["odds"]
+
+
+def _column_file(store_dir, name, suffix=""):
+    return os.path.join(store_dir, f"{name}{suffix}.npy")
+
+
+def _encode_column(name, values):
+    """Turn one list of JSON values into (kind, array, extra meta)."""
+    if name == "date":
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), format="%d/%m/%Y", errors="coerce")
+        return "date", parsed.to_numpy().astype("datetime64[D]"), {}
+    if name in CATEGORICAL_COLUMNS:
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).replace("", None))
+        return "category", codes.astype(np.int32), {"categories": [str(u) for u in uniques]}
+    present = [v for v in values if v is not None and v != ""]
+    if present and all(isinstance(v, bool) for v in present):
+        return "bool", np.array([-1 if v in (None, "") else int(v) for v in values], np.int8), {}
+    numeric = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    if numeric.notna().sum() == len(present):
+        if numeric.notna().all() and (numeric == numeric.round()).all():
+            return "int", numeric.to_numpy(dtype=np.int64), {}
+        return "float", numeric.to_numpy(dtype=np.float64), {}
+    # Mixed types are stored as strings; missing values keep the missing code (-1).
+    labels = [None if v is None or v == "" or v != v else str(v) for v in values]
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+    return "category", codes.astype(np.int32), {"categories": list(uniques)}
+
+
+def flatten_record(record):
+    """Flatten nested dict fields such as odds into odds_<key> columns."""
+    flat = {}
+    for key, value in record.items():
+        if key in NESTED_COLUMNS and isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}_{sub_key}"] = sub_value
+        elif key not in NESTED_COLUMNS:
+            flat[key] = value
+    return flat
+
+
+def source_signature(json_path, digest=True):
+    """Size, mtime and (with digest) sha256 of the JSON file a store is converted from."""
+    stat = os.stat(json_path)
+    signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if digest:
+        sha = hashlib.sha256()
+        with open(json_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        signature["sha256"] = sha.hexdigest()
+    return signature
+
+
+def write_match_store(records, store_dir=MATCH_STORE_DIR, source=None):
+    """Write match records as one .npy file per column plus a meta.json schema.
+
+    source is the source_signature of the JSON file the records came from.
+
+    The new store is built next to the old one and swapped in once complete, so a crash
+    mid-write leaves the previous store untouched.
+    """
+    flat = [flatten_record(r) for r in records]
+    names = list(dict.fromkeys(k for r in flat for k in r))
+    tmp_dir = f"{store_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    for name in names:
+        missing = np.array([name not in r for r in flat])
+        kind, values, extra = _encode_column(name, [r.get(name) for r in flat])
+        np.save(_column_file(tmp_dir, name), values)
+        columns[name] = {"kind": kind, "dtype": str(values.dtype), **extra}
+        if missing.any():
+            np.save(_column_file(tmp_dir, name, ".missing"), missing)
+            columns[name]["sparse"] = True
+    meta = {
+        "format": STORE_FORMAT,
+        "rows": len(flat),
+        "columns": columns,
+        "source": source,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    save_json(meta, os.path.join(tmp_dir, "meta.json"))
+
+    old_dir = f"{store_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return meta
+
+
+def convert_json_to_store(json_path=MATCHES_RAW_PATH, store_dir=MATCH_STORE_DIR):
+    """One-shot conversion of the historical matches JSON into the columnar store."""
+    records = load_json(json_path)
+    meta = write_match_store(records, store_dir, source=source_signature(json_path))
+    logging.info(f"[INFO] Converted {meta['rows']} matches from {json_path} into {store_dir}")
+    return meta
+
+
+def load_store_meta(store_dir=MATCH_STORE_DIR):
+    """Return the store schema, or None if there is no readable store."""
+    path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(path):
+        return None
+    meta = load_json(path)
+    return meta if meta.get("format") == STORE_FORMAT else None
+
+
+def _is_current(meta, json_path, store_dir):
+    """Whether the store was converted from the JSON file's current contents.
+
+    Size and mtime are checked first; when they differ (a fresh checkout, a restored cache)
+    the file is hashed, and an unchanged hash only refreshes the recorded stat fields.
+    """
+    recorded = meta.get("source") or {}
+    if not recorded.get("sha256"):
+        return False
+    current = source_signature(json_path, digest=False)
+    if all(recorded.get(k) == v for k, v in current.items()):
+        return True
+    current = source_signature(json_path)
+    if current["sha256"] != recorded["sha256"]:
+        return False
+    meta["source"] = current
+    save_json(meta, os.path.join(store_dir, "meta.json"))
+    return True
+
+
+def ensure_match_store(store_dir=MATCH_STORE_DIR, json_path=MATCHES_RAW_PATH):
+    """Return the store schema, converting from JSON first if the store is missing or stale."""
+    meta = load_store_meta(store_dir)
+    if os.path.exists(json_path):
+        if meta is None or not _is_current(meta, json_path, store_dir):
+            logging.info(f"[INFO] Match store at {store_dir} is missing or stale. Converting.")
+            meta = convert_json_to_store(json_path, store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"Missing data file: {json_path}")
+    return meta
+
+
+def _read_column(store_dir, name, spec, mmap_mode):
+    values = np.load(_column_file(store_dir, name), mmap_mode=mmap_mode)
+    kind = spec["kind"]
+    if kind == "category":
+        return pd.Categorical.from_codes(values, categories=spec["categories"])
+    if kind == "date":
+        return values.astype("datetime64[ns]")
+    if kind == "bool":
+        return pd.array(np.where(values < 0, None, values == 1), dtype="boolean")
+    if name == "match_id":
+        return pd.array(values, dtype="Int64")
+    return values
+
+
+def _segment_records(ingest_dir=INGEST_DIR):
+    """All records in committed ingest segments, oldest segment first."""
+    records = []
+    for path in pending_segments(ingest_dir):
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def _pending_records(store_dir, ingest_dir):
+    """Segment records that are not yet part of the main store, deduplicated by match_id."""
+    records = _segment_records(ingest_dir)
+    if not records:
+        return []
+    spec = load_store_meta(store_dir)["columns"].get("match_id") if store_dir else None
+    seen = set()
+    if spec is not None:
+        seen = set(_read_column(store_dir, "match_id", spec, "r").dropna().astype(str))
+    pending = []
+    for record in records:
+        key = str(record.get("match_id"))
+        if "match_id" in record and key in seen:
+            continue
+        seen.add(key)
+        pending.append(record)
+    return pending
+
+
+def _records_frame(records, meta, names):
+    """Type a handful of raw records the same way the store types its columns."""
+    flat = pd.DataFrame([flatten_record(r) for r in records])
+    data = {}
+    for name in names:
+        col = flat[name] if name in flat.columns else pd.Series([None] * len(flat), dtype=object)
+        kind = meta["columns"].get(name, {}).get("kind")
+        if kind == "date":
+            col = pd.to_datetime(col, format="%d/%m/%Y", errors="coerce")
+        elif kind == "category":
+            col = col.replace("", None).astype(object)
+        elif kind == "bool":
+            col = col.map(lambda v: None if v in (None, "") else bool(v)).astype("boolean")
+        elif kind in ("int", "float"):
+            col = pd.to_numeric(col, errors="coerce")
+            if name == "match_id":
+                col = col.astype("Int64")
+        data[name] = col.to_numpy() if kind in ("date", "category") else col.array
+    return pd.DataFrame(data)
+
+
+@instrumented(rows=len)
+def read_matches(
+    columns=None,
+    store_dir=MATCH_STORE_DIR,
+    json_path=MATCHES_RAW_PATH,
+    mmap=True,
+    categorical=True,
+    ingest_dir=INGEST_DIR,
+):
+    """Load historical matches as a typed DataFrame, reading only the requested columns.
+
+    Column files are memory-mapped, so projected reads cost what the selected columns
+    cost regardless of how many other fields the store holds. Nested odds appear as
+    odds_<key> columns and leagues, teams and kick-off times as categoricals, or as plain
+    strings when categorical is False. Matches still sitting in ingest segments are
+    appended after the stored ones.
+    """
+    meta = ensure_match_store(store_dir, json_path)
+    pending = _pending_records(store_dir, ingest_dir) if ingest_dir else []
+    names = list(meta["columns"]) if columns is None else columns
+    if columns is None and pending:
+        names += [k for k in dict.fromkeys(k for r in pending for k in flatten_record(r))]
+        names = list(dict.fromkeys(names))
+    mmap_mode = "r" if mmap else None
+    data = {}
+    for name in names:
+        spec = meta["columns"].get(name)
+        if spec is None:
+            data[name] = np.full(meta["rows"], np.nan)
+            continue
+        data[name] = _read_column(store_dir, name, spec, mmap_mode)
+        if (pending or not categorical) and spec["kind"] == "category":
+            data[name] = np.asarray(data[name], dtype=object)
+    df = pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]), copy=False)
+    if pending:
+        df = pd.concat([df, _records_frame(pending, meta, names)], ignore_index=True)
+        if categorical:
+            for name in names:
+                if meta["columns"].get(name, {}).get("kind") == "category":
+                    df[name] = df[name].astype("category")
+    return df
+
+
+def read_missing_mask(name, store_dir=MATCH_STORE_DIR, ingest_dir=INGEST_DIR):
+    """Boolean mask of records that did not have the field at all, or None if none lacked it."""
+    path = _column_file(store_dir, name, ".missing")
+    meta = load_store_meta(store_dir)
+    if os.path.exists(path):
+        mask = np.load(path)
+    elif meta is None:
+        mask = np.zeros(0, dtype=bool)
+    else:
+        mask = np.full(meta["rows"], name not in meta["columns"])
+    if ingest_dir:
+        pending = _pending_records(store_dir, ingest_dir)
+        mask = np.concatenate([mask, [name not in flatten_record(r) for r in pending]])
+    return mask if mask.any() else None
+
+
+def read_match_records(
+    store_dir=MATCH_STORE_DIR, json_path=MATCHES_RAW_PATH, ingest_dir=INGEST_DIR
+):
+    """Compatibility reader returning records shaped like matches_raw.json.
+
+    Fields a record never had are left out and nested odds are rebuilt into a dict. Empty
+    values come back as None. Pending ingest records are returned as written.
+    """
+    meta = ensure_match_store(store_dir, json_path)
+    df = read_matches(store_dir=store_dir, json_path=json_path, ingest_dir=None)
+    out = pd.DataFrame(index=df.index)
+    for name, spec in meta["columns"].items():
+        col = df[name]
+        if spec["kind"] == "date":
+            col = col.dt.strftime("%d/%m/%Y")
+        out[name] = col.astype(object).where(col.notna(), None)
+    masks = {
+        name: read_missing_mask(name, store_dir, ingest_dir=None)
+        for name, spec in meta["columns"].items()
+        if spec.get("sparse")
+    }
+    records = out.to_dict("records")
+    for i, record in enumerate(records):
+        for name, mask in masks.items():
+            if mask[i]:
+                del record[name]
+        for nested in NESTED_COLUMNS:
+            prefix = f"{nested}_"
+            keys = [k for k in record if k.startswith(prefix)]
+            if keys:
+                record[nested] = {k[len(prefix) :]: record.pop(k) for k in keys}
+    if ingest_dir:
+        records.extend(_pending_records(store_dir, ingest_dir))
+    return records
+
+
+def pending_segments(ingest_dir=INGEST_DIR):
+    """Paths of committed ingest segments, oldest first."""
+    if not os.path.isdir(ingest_dir):
+        return []
+    names = sorted(n for n in os.listdir(ingest_dir) if SEGMENT_PATTERN.fullmatch(n))
+    return [os.path.join(ingest_dir, n) for n in names]
+
+
+def _append_lines(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def append_segment(records, ingest_dir=INGEST_DIR):
+    """Commit new match records as one JSON Lines segment and record their match_ids.
+
+    The segment is written to a temporary file and renamed into place, so readers see
+    either the whole segment or none of it.
+    """
+    if not records:
+        return None
+    os.makedirs(ingest_dir, exist_ok=True)
+    path = os.path.join(ingest_dir, f"segment-{time.time_ns()}.jsonl")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    ids = [f"{r['match_id']}\n" for r in records if r.get("match_id") is not None]
+    _append_lines(os.path.join(ingest_dir, MATCH_IDS_FILE), ids)
+    logging.info(f"[INFO] Committed {len(records)} matches to {path}")
+    return path
+
+
+def load_match_ids(store_dir=MATCH_STORE_DIR, json_path=MATCHES_RAW_PATH, ingest_dir=INGEST_DIR):
+    """Set of every known match_id, as strings, from the persistent id index.
+
+    The index is seeded from the main store the first time it is needed. Ids found in
+    pending segments are always included, so a crash between committing a segment and
+    updating the index cannot cause a match to be ingested twice.
+    """
+    ids_path = os.path.join(ingest_dir, MATCH_IDS_FILE)
+    if not os.path.exists(ids_path):
+        os.makedirs(ingest_dir, exist_ok=True)
+        stored = read_matches(
+            columns=["match_id"], store_dir=store_dir, json_path=json_path, ingest_dir=None
+        )
+        _append_lines(ids_path, [f"{i}\n" for i in stored["match_id"].dropna()])
+    with open(ids_path, encoding="utf-8") as f:
+        ids = {line.strip() for line in f if line.strip()}
+    ids.update(str(r["match_id"]) for r in _segment_records(ingest_dir) if "match_id" in r)
+    return ids
+
+
+def compact_segments(json_path=MATCHES_RAW_PATH, store_dir=MATCH_STORE_DIR, ingest_dir=INGEST_DIR):
+    """Fold pending ingest segments into matches_raw.json and the columnar store.
+
+    Until this runs, matches_raw.json lags behind the fetched history by up to
+    ingest.compact_after_segments runs, so readers go through read_matches,
+    read_match_records or load_match_ids rather than the JSON file. A missing JSON file
+    is treated as an empty history. The JSON file is replaced atomically before any segment is removed, and readers skip
+    segment records already present in the store, so an interrupted compaction is safe to
+    rerun.
+    """
+    segments = pending_segments(ingest_dir)
+    if not segments:
+        return 0
+    if os.path.exists(json_path):
+        ensure_match_store(store_dir, json_path)
+        records = load_json(json_path)
+        pending = _pending_records(store_dir, ingest_dir)
+    else:
+        # First compaction without matches_raw.json: the segments are the whole history.
+        records = []
+        pending = _pending_records(None, ingest_dir)
+    records.extend(pending)
+    tmp_path = f"{json_path}.tmp"
+    save_json(records, tmp_path)
+    os.replace(tmp_path, json_path)
+    write_match_store(records, store_dir, source=source_signature(json_path))
+    for path in segments:
+        os.remove(path)
+    logging.info(
+        f"[INFO] Compacted {len(segments)} segments ({len(pending)} matches) into {json_path}"
+    )
+    return len(pending)
+
+
+if __name__ == "__main__":
+    convert_json_to_store()
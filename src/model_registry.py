@@ -0,0 +1,150 @@
+from datetime import datetime
+from src.fingerprint import file_digest
+from src.model_store import MANIFEST_FILE, MULTI_OUTPUT_BUNDLE, BundleLoader
+from src.utils import load_config
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+
+"""
+Serving-side view of models/: every bundle loaded once, swapped as a whole on retrain.
+
+    registry = ModelRegistry.from_config()
+    registry.refresh()
+    models = registry.current   # read once per request; later swaps never mutate it
+
+refresh() reloads only when a bundle file or the manifest changed on disk, and swaps in
+the new ModelSet with a single assignment once every bundle loaded and matched the
+manifest, so requests holding the previous set finish on it undisturbed. A retrain caught
+half-written is retried at the next poll of watch().
+"""
+
+
+class ModelSet:
+    """Loaded bundles plus the version and fingerprint they came from; bundles never change."""
+
+    def __init__(self, bundles, version, fingerprint, signature, generation):
+        self.bundles = bundles
+        self.version = version
+        self.fingerprint = fingerprint
+        self.signature = signature
+        self.generation = generation
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+
+    def info(self):
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "generation": self.generation,
+            "loaded_at": self.loaded_at,
+            "models": {
+                name: {
+                    "targets": bundle.get("targets", [name]),
+                    "n_trees": len(bundle["model"].estimators_),
+                    "preprocess": bundle.get("preprocess"),
+                }
+                for name, bundle in self.bundles.items()
+            },
+        }
+
+
+class ModelRegistry:
+    def __init__(self, model_dir="models", targets=None, multi_output=False):
+        self.model_dir = model_dir
+        self.targets = targets or ["Winner", "Over_2_5", "Over_1_5", "Double_Chance", "BTTS"]
+        self.multi_output = multi_output
+        self.current = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config=None):
+        config = config or load_config()
+        return cls(
+            model_dir=config.get("paths", {}).get("model_dir", "models/"),
+            targets=config.get("targets"),
+            multi_output=config.get("train_params", {}).get("multi_output", False),
+        )
+
+    def paths(self):
+        if self.multi_output:
+            return {"multi_output": os.path.join(self.model_dir, MULTI_OUTPUT_BUNDLE)}
+        return {t: os.path.join(self.model_dir, f"bundle_{t}.pkl") for t in self.targets}
+
+    def signature(self):
+        """(path, mtime_ns, size) of every bundle and the manifest; cheap enough to poll."""
+        files = sorted(self.paths().values()) + [os.path.join(self.model_dir, MANIFEST_FILE)]
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def load(self, signature=None):
+        """Load every bundle into a new ModelSet; raises when none load or files are mid-write."""
+        loader = BundleLoader(self.model_dir, compiled=True)
+        entries = loader.manifest.get("models", {})
+        bundles, digests = {}, {}
+        for name, path in self.paths().items():
+            if not os.path.exists(path):
+                logging.warning(f"[WARNING] Model bundle for {name} not found at {path}")
+                continue
+            digest = file_digest(path)
+            expected = entries.get(name, {}).get("sha256")
+            if expected and expected != digest:
+                raise RuntimeError(f"{path} does not match the manifest (retrain in progress?)")
+            bundles[name] = loader.load(path)
+            digests[name] = digest
+        if not bundles:
+            raise RuntimeError(f"No model bundles found in {self.model_dir}")
+        fingerprint = hashlib.sha256(
+            "\n".join(f"{name}:{digests[name]}" for name in sorted(digests)).encode()
+        ).hexdigest()[:16]
+        version = loader.manifest.get("created_at") or datetime.fromtimestamp(
+            max(os.path.getmtime(p) for p in self.paths().values() if os.path.exists(p))
+        ).isoformat(timespec="seconds")
+        return ModelSet(bundles, version, fingerprint, signature, self._generation + 1)
+
+    def refresh(self):
+        """Swap in freshly loaded bundles if the files changed; returns True on a swap."""
+        with self._lock:
+            signature = self.signature()
+            if self.current is not None and signature == self.current.signature:
+                return False
+            try:
+                models = self.load(signature)
+            except Exception as e:
+                if self.current is None:
+                    raise
+                logging.warning(f"[WARNING] Keeping models {self.current.version}: {e}")
+                return False
+            if self.current is not None and models.fingerprint == self.current.fingerprint:
+                # Touched but identical files: keep the loaded set, remember the new stats.
+                self.current.signature = signature
+                return False
+            self._generation = models.generation
+            self.current = models
+        logging.info(
+            f"[INFO] Loaded models {models.version} (fingerprint {models.fingerprint}, "
+            f"{len(models.bundles)} bundles)"
+        )
+        return True
+
+    async def watch(self, interval, on_reload=None):
+        """Poll for changed model files every interval seconds, loading in a worker thread.
+
+        on_reload, if given, runs in the worker thread after each swap.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.refresh) and on_reload is not None:
+                    await asyncio.to_thread(on_reload)
+            except Exception as e:
+                logging.error(f"[ERROR] Model reload failed: {e}")
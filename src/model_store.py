@@ -0,0 +1,135 @@
+from datetime import datetime
+from src.fingerprint import file_digest
+from src.forest_engine import CompiledForest
+from src.utils import load_json, save_json
+
+import hashlib
+import io
+import joblib
+import logging
+import os
+import numpy as np
+import sklearn
+
+"""
+Model artifact layout under models/:
+
+    preprocess/<digest>.pkl   scaler, league encoder and feature columns, stored once
+    bundle_<name>.pkl         slim bundle: model, label encoder(s) and a "preprocess" digest
+    manifest.json             format version, library versions and an entry per bundle
+
+Preprocessing artifacts are content-addressed, so targets trained in the same run share
+one file and a warm-started target keeps pointing at the scaler its trees were fitted on.
+"""
+
+FORMAT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+MULTI_OUTPUT_BUNDLE = "bundle_multi_output.pkl"
+PREPROCESS_DIR = "preprocess"
+SHARED_KEYS = ("feature_columns", "scaler", "le_league")
+
+
+def _dump_bytes(obj):
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.getvalue()
+
+
+def save_preprocess(shared, model_dir):
+    """Store {feature_columns, scaler, le_league} under its content digest; returns the digest."""
+    data = _dump_bytes({k: shared[k] for k in SHARED_KEYS})
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    path = os.path.join(model_dir, PREPROCESS_DIR, f"{digest}.pkl")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def save_bundle(bundle, path):
+    """Write bundle as a slim file referencing its shared preprocessing; returns the digest.
+
+    The file is written next to path and renamed into place, so a reader never sees a
+    half-written bundle.
+    """
+    model_dir = os.path.dirname(path) or "."
+    digest = save_preprocess(bundle, model_dir)
+    slim = {k: v for k, v in bundle.items() if k not in SHARED_KEYS}
+    slim["preprocess"] = digest
+    tmp_path = f"{path}.tmp"
+    joblib.dump(slim, tmp_path)
+    os.replace(tmp_path, path)
+    return digest
+
+
+def write_manifest(model_dir, entries):
+    """Rewrite the manifest from entries and drop preprocessing artifacts nothing references.
+
+    entries maps a bundle name to {"path": ..., "preprocess": digest, ...extra metadata} and
+    must list every bundle of the current model set; bundles of earlier runs are not kept.
+    """
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    models = {name: {**e, "sha256": file_digest(e["path"])} for name, e in entries.items()}
+    referenced = {entry["preprocess"] for entry in models.values()}
+    preprocess_dir = os.path.join(model_dir, PREPROCESS_DIR)
+    for fname in sorted(os.listdir(preprocess_dir)) if os.path.isdir(preprocess_dir) else []:
+        if fname.endswith(".pkl") and fname[: -len(".pkl")] not in referenced:
+            os.remove(os.path.join(preprocess_dir, fname))
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "preprocess": {
+            digest: {"path": os.path.join(preprocess_dir, f"{digest}.pkl")}
+            for digest in sorted(referenced)
+        },
+        "models": models,
+    }
+    save_json(manifest, manifest_path)
+    return manifest
+
+
+class BundleLoader:
+    """Loads bundles, unpickling each shared preprocessing artifact only once.
+
+    Bundles referencing the same digest get the very same scaler and encoder objects.
+    Bundles written before the shared layout (with their own scaler) load unchanged. With
+    compiled, each bundle also gets an "engine": the model exported to a CompiledForest.
+    """
+
+    def __init__(self, model_dir="models", compiled=False):
+        self.model_dir = model_dir
+        self.compiled = compiled
+        self.shared = {}
+        manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+        self.manifest = load_json(manifest_path) if os.path.exists(manifest_path) else {}
+        version = self.manifest.get("format_version", FORMAT_VERSION)
+        if version > FORMAT_VERSION:
+            raise RuntimeError(
+                f"Model artifacts in {model_dir} use format {version}; "
+                f"this code reads up to {FORMAT_VERSION}."
+            )
+        trained_with = self.manifest.get("sklearn_version")
+        if trained_with and trained_with != sklearn.__version__:
+            logging.warning(
+                f"[WARNING] Models were trained with scikit-learn {trained_with}, "
+                f"running {sklearn.__version__}."
+            )
+
+    def preprocess(self, digest):
+        if digest not in self.shared:
+            path = os.path.join(self.model_dir, PREPROCESS_DIR, f"{digest}.pkl")
+            self.shared[digest] = joblib.load(path)
+        return self.shared[digest]
+
+    def load(self, path):
+        bundle = joblib.load(path)
+        if "preprocess" in bundle:
+            bundle = {**bundle, **self.preprocess(bundle["preprocess"])}
+        if self.compiled:
+            bundle["engine"] = CompiledForest.from_forest(bundle["model"])
+        return bundle
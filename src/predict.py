@@ -1,28 +1,51 @@
 import os
 import sys
 import json
-import joblib
 import pandas as pd
 import logging
+from datetime import datetime
 from src.api_fetch import fetch_upcoming_matches
+from src.fingerprint import (
+    data_digest,
+    files_digest,
+    is_up_to_date,
+    save_fingerprint,
+    stage_fingerprint,
+)
+from src.instrument import instrumented, set_rows, span
+from src.model_store import MULTI_OUTPUT_BUNDLE, BundleLoader
+from src.prediction_history import HISTORY_DB_PATH, PredictionHistory
+from src.utils import load_config
 from src.features import (
     add_rank_diff_feature,
     add_h2h_feature,
     add_odds_features,
     add_recent_form_to_upcoming,
+    TeamHistoryIndex,
 )
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+PREDICT_FINGERPRINT_FILE = "predict_fingerprint.json"
+PREDICT_SOURCES = ["src/features.py", "src/forest_engine.py", "src/predict.py"]
+
 
-def prepare_features(games, feature_columns, scaler=None, encoders=None):
-    """Prepare features for prediction from raw game data."""
+@instrumented(rows=len)
+def build_feature_frame(games, le_league, history=None):
+    """Unscaled feature frame for upcoming games, with every column any bundle may select.
+
+    Built once per run and shared by all bundles encoding leagues with le_league; also
+    copies each game's parsed odds back onto the game dicts. history is a prebuilt
+    TeamHistoryIndex; when omitted it is built from the match store. Games that already
+    carry a League name skip the league_id lookup in config/leagues.json.
+    """
 
     df = pd.DataFrame(games)
-    with open("config/leagues.json", encoding="utf-8") as f:
-        leagues = json.load(f)
-    id_to_name = {str(lg["id"]): lg["name"] for lg in leagues}
-    df["League"] = df["league_id"].astype(str).map(id_to_name)
+    if "League" not in df.columns:
+        with open("config/leagues.json", encoding="utf-8") as f:
+            leagues = json.load(f)
+        id_to_name = {str(lg["id"]): lg["name"] for lg in leagues}
+        df["League"] = df["league_id"].astype(str).map(id_to_name)
     df = add_rank_diff_feature(df)
     df = add_h2h_feature(df)
     df = add_odds_features(df)
@@ -30,47 +53,166 @@ def prepare_features(games, feature_columns, scaler=None, encoders=None):
         df[col] = df["odds"].apply(
             lambda x: x.get(key) if isinstance(x, dict) and key in x else None
         )
-    if encoders and "le_league" in encoders:
-        le = encoders["le_league"]
-        known = set(le.classes_)
-        placeholder = next(iter(known)) if len(known) else None
-        safe_leagues = df["League"].where(df["League"].isin(known), placeholder)
-        df["League_Encoded"] = le.transform(safe_leagues)
-    else:
+    if le_league is None:
         raise RuntimeError("Missing league encoder in prediction bundle.")
-    with open("data/raw/matches_raw.json", encoding="utf-8") as f:
-        historical = pd.DataFrame(json.load(f))
-    if "League" not in historical.columns and "league" in historical.columns:
-        historical["League"] = historical["league"]
-    if "Team1Goals" not in historical.columns and "team1_goals" in historical.columns:
-        historical["Team1Goals"] = historical["team1_goals"]
-    if "Team2Goals" not in historical.columns and "team2_goals" in historical.columns:
-        historical["Team2Goals"] = historical["team2_goals"]
-    df = add_recent_form_to_upcoming(df, historical, n_games=5)
+    known = set(le_league.classes_)
+    placeholder = next(iter(known)) if len(known) else None
+    safe_leagues = df["League"].where(df["League"].isin(known), placeholder)
+    df["League_Encoded"] = le_league.transform(safe_leagues)
+    if history is None:
+        history = TeamHistoryIndex.from_store()
+    df = add_recent_form_to_upcoming(df, history, n_games=5)
     for i, game in enumerate(games):
         for odd_col in ["home_win", "draw", "away_win"]:
             if odd_col in df.columns:
                 game[odd_col] = df.loc[i, odd_col]
-    missing = [c for c in feature_columns if c not in df.columns]
-    for c in missing:
-        df[c] = 0
-    X = df[feature_columns].copy()
+    return df
+
+
+def project_features(frame, feature_columns, scaler=None):
+    """Select a bundle's feature columns from a shared frame (missing ones as 0) and scale."""
+    X = frame.reindex(columns=feature_columns, fill_value=0)
     if scaler:
         X = pd.DataFrame(scaler.transform(X), columns=feature_columns)
     return X
 
 
-def main():
-    """Load models and make predictions on upcoming matches."""
+@instrumented(rows=len)
+def prepare_features(games, feature_columns, scaler=None, encoders=None, history=None):
+    """Prepare features for prediction from raw game data (one bundle's matrix)."""
+    le_league = (encoders or {}).get("le_league")
+    return project_features(build_feature_frame(games, le_league, history), feature_columns, scaler)
+
+
+def predict_games(bundles, games, history=None):
+    """Score games with every bundle, storing prediction_<target>/confidence_<target> on them.
+
+    Bundles from one training run share their encoder and scaler objects (BundleLoader),
+    so the frame is built once per league encoding and scaled once per scaler. A bundle
+    that fails to predict leaves None predictions with zero confidence for its targets.
+    """
+    frames, matrices = {}, {}
+    for name, bundle in bundles.items():
+        model = bundle["model"]
+        # A multi-output bundle lists the targets it predicts, in output order.
+        bundle_targets = bundle.get("targets", [name])
+        feature_columns = bundle.get("feature_columns", [])
+        scaler = bundle.get("scaler", None)
+        le_league = bundle.get("le_league", None)
+        try:
+            encoding = None if le_league is None else tuple(le_league.classes_)
+            if encoding not in frames:
+                frames[encoding] = build_feature_frame(games, le_league, history)
+            key = (encoding, id(scaler), tuple(feature_columns))
+            if key not in matrices:
+                matrices[key] = project_features(frames[encoding], feature_columns, scaler)
+            X = matrices[key]
+            with span(f"predict_proba.{name}"):
+                probs = bundle.get("engine", model).predict_proba(X)
+            if "targets" in bundle:
+                outputs = list(zip(probs, model.classes_))
+            else:
+                outputs = [(probs, model.classes_)]
+            target_preds = {
+                t: (classes[p.argmax(axis=1)], p.max(axis=1))
+                for t, (p, classes) in zip(bundle_targets, outputs)
+            }
+        except Exception as e:
+            logging.error(f"[ERROR] Error predicting {name}: {e}")
+            target_preds = {t: ([None] * len(games), [0.0] * len(games)) for t in bundle_targets}
+        for t, (preds, confs) in target_preds.items():
+            for i, game in enumerate(games):
+                game[f"prediction_{t}"] = preds[i]
+                game[f"confidence_{t}"] = confs[i]
+    return games
+
+
+def prediction_record(game):
+    """Output entry (predictions.json layout) for a game scored by predict_games."""
+    return {
+        "match_id": game.get("match_id"),
+        "date": game.get("date"),
+        "time": game.get("time"),
+        "league": game.get("League"),
+        "home_team": game.get("home_name"),
+        "away_team": game.get("away_name"),
+        "odds": {
+            "home": game.get("home_win"),
+            "draw": game.get("draw"),
+            "away": game.get("away_win"),
+        },
+        "predictions": {
+            "winner": {
+                "class": (
+                    int(game.get("prediction_Winner", -1))
+                    if game.get("prediction_Winner") is not None
+                    else None
+                ),
+                "confidence": float(game.get("confidence_Winner", 0)),
+            },
+            "over_2_5": {
+                "class": (
+                    int(game.get("prediction_Over_2_5", -1))
+                    if game.get("prediction_Over_2_5") is not None
+                    else None
+                ),
+                "confidence": float(game.get("confidence_Over_2_5", 0)),
+            },
+            "over_1_5": {
+                "class": (
+                    int(game.get("prediction_Over_1_5", -1))
+                    if game.get("prediction_Over_1_5") is not None
+                    else None
+                ),
+                "confidence": float(game.get("confidence_Over_1_5", 0)),
+            },
+            "double_chance": {
+                "class": (
+                    int(game.get("prediction_Double_Chance", -1))
+                    if game.get("prediction_Double_Chance") is not None
+                    else None
+                ),
+                "confidence": float(game.get("confidence_Double_Chance", 0)),
+            },
+            "btts": {
+                "class": (
+                    int(game.get("prediction_BTTS", -1))
+                    if game.get("prediction_BTTS") is not None
+                    else None
+                ),
+                "confidence": float(game.get("confidence_BTTS", 0)),
+            },
+        },
+        "finished": False,
+    }
+
+
+def main(force=False):
+    """Load models and make predictions on upcoming matches.
+
+    Skipped (unless force) when the fetched fixtures, model files, match data and
+    prediction code are identical to the run recorded in the prediction fingerprint.
+    """
 
     targets = ["Winner", "Over_2_5", "Over_1_5", "Double_Chance", "BTTS"]
     bundles = {}
-    for t in targets:
-        path = f"models/bundle_{t}.pkl"
+    bundle_paths = []
+    loader = BundleLoader("models", compiled=True)
+    if load_config().get("train_params", {}).get("multi_output", False):
+        path = os.path.join("models", MULTI_OUTPUT_BUNDLE)
         try:
-            bundles[t] = joblib.load(path)
+            bundles["multi_output"] = loader.load(path)
+            bundle_paths.append(path)
         except Exception as e:
-            logging.error(f"[ERROR] Could not load model bundle for {t}: {e}")
+            logging.error(f"[ERROR] Could not load multi-output model bundle: {e}")
+    else:
+        for t in targets:
+            path = f"models/bundle_{t}.pkl"
+            try:
+                bundles[t] = loader.load(path)
+                bundle_paths.append(path)
+            except Exception as e:
+                logging.error(f"[ERROR] Could not load model bundle for {t}: {e}")
     if not bundles:
         logging.critical("[CRITICAL] No models loaded. Exiting prediction.")
         return
@@ -78,114 +220,45 @@ def main():
     if not games:
         logging.warning("[WARNING] No upcoming matches found.")
         return
-    for name, bundle in bundles.items():
-        model = bundle["model"]
-        feature_columns = bundle.get("feature_columns", [])
-        scaler = bundle.get("scaler", None)
-        le_league = bundle.get("le_league", None)
-        try:
-            X = prepare_features(
-                games, feature_columns, scaler=scaler, encoders={"le_league": le_league}
-            )
-            probs = model.predict_proba(X)
-            preds = model.classes_[probs.argmax(axis=1)]
-            confs = probs.max(axis=1)
-        except Exception as e:
-            logging.error(f"[ERROR] Error predicting {name}: {e}")
-            preds = [None] * len(games)
-            confs = [0.0] * len(games)
-        for i, game in enumerate(games):
-            game[f"prediction_{name}"] = preds[i]
-            game[f"confidence_{name}"] = confs[i]
+    set_rows(len(games))
+    output_dir = os.path.join("data", "predict")
+    predictions_path = os.path.join(output_dir, "predictions.json")
+    fingerprint_path = os.path.join(output_dir, PREDICT_FINGERPRINT_FILE)
+    fingerprint = stage_fingerprint(
+        games=games,
+        models=files_digest(bundle_paths),
+        data=data_digest(),
+        sources=files_digest(PREDICT_SOURCES),
+    )
+    if not force and is_up_to_date(fingerprint_path, fingerprint, [predictions_path]):
+        logging.info(
+            "[INFO] Fixtures and models unchanged since the last run; skipping predictions."
+        )
+        return
+    predict_games(bundles, games, TeamHistoryIndex.from_store())
     with open("config/leagues.json", encoding="utf-8") as f:
         leagues = json.load(f)
     id_to_name = {str(lg["id"]): lg["name"] for lg in leagues}
     for game in games:
         game["League"] = id_to_name.get(str(game["league_id"]), "?")
-    results = []
-    for game in games:
-        result = {
-            "match_id": game.get("match_id"),
-            "date": game.get("date"),
-            "time": game.get("time"),
-            "league": game.get("League"),
-            "home_team": game.get("home_name"),
-            "away_team": game.get("away_name"),
-            "odds": {
-                "home": game.get("home_win"),
-                "draw": game.get("draw"),
-                "away": game.get("away_win"),
-            },
-            "predictions": {
-                "winner": {
-                    "class": (
-                        int(game.get("prediction_Winner", -1))
-                        if game.get("prediction_Winner") is not None
-                        else None
-                    ),
-                    "confidence": float(game.get("confidence_Winner", 0)),
-                },
-                "over_2_5": {
-                    "class": (
-                        int(game.get("prediction_Over_2_5", -1))
-                        if game.get("prediction_Over_2_5") is not None
-                        else None
-                    ),
-                    "confidence": float(game.get("confidence_Over_2_5", 0)),
-                },
-                "over_1_5": {
-                    "class": (
-                        int(game.get("prediction_Over_1_5", -1))
-                        if game.get("prediction_Over_1_5") is not None
-                        else None
-                    ),
-                    "confidence": float(game.get("confidence_Over_1_5", 0)),
-                },
-                "double_chance": {
-                    "class": (
-                        int(game.get("prediction_Double_Chance", -1))
-                        if game.get("prediction_Double_Chance") is not None
-                        else None
-                    ),
-                    "confidence": float(game.get("confidence_Double_Chance", 0)),
-                },
-                "btts": {
-                    "class": (
-                        int(game.get("prediction_BTTS", -1))
-                        if game.get("prediction_BTTS") is not None
-                        else None
-                    ),
-                    "confidence": float(game.get("confidence_BTTS", 0)),
-                },
-            },
-            "finished": False,
-        }
-        results.append(result)
+    results = [prediction_record(game) for game in games]
 
     results_sorted = sorted(
         results, key=lambda x: x["predictions"]["winner"]["confidence"], reverse=True
     )
     top_results = results_sorted[:7]
-    output_dir = os.path.join("data", "predict")
     os.makedirs(output_dir, exist_ok=True)
-    predictions_path = os.path.join(output_dir, "predictions.json")
     with open(predictions_path, "w", encoding="utf-8") as f:
         json.dump(top_results, f, ensure_ascii=False, indent=2)
     logging.info(f"[INFO] Predictions saved to {predictions_path} (top 7 by confidence)")
 
-    history_path = os.path.join(output_dir, "predictions_history.json")
     try:
-        if os.path.exists(history_path):
-            with open(history_path, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-        else:
-            existing = []
-        existing.extend(top_results)
-        with open(history_path, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=2)
-        logging.info(f"[INFO] Appended top 7 predictions to {history_path}")
+        with PredictionHistory() as history:
+            history.append(datetime.now().isoformat(timespec="seconds"), top_results)
+        logging.info(f"[INFO] Appended top 7 predictions to {HISTORY_DB_PATH}")
     except Exception as e:
         logging.error(f"[ERROR] Error saving predictions history: {e}")
+    save_fingerprint(fingerprint_path, fingerprint)
     return
 
 
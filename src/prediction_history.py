@@ -0,0 +1,198 @@
+from collections import Counter
+from src.utils import load_json
+
+import json
+import logging
+import os
+import sqlite3
+import textwrap
+
+"""
+Predictions history in SQLite (WAL), one row per (match_id, run).
+
+    with PredictionHistory() as history:
+        history.append("2025-11-01T09:00:00", top_results)
+        for record in history.stream(finished=False):   # streamed in insertion order
+            ...
+        history.mark_finished_many([(954076, "2025-11-01T09:00:00", {"winner": 1})])
+        history.outcome_totals()                         # {"winner": (correct, total)}
+
+A prediction run costs one insert per new record and a result check one keyed update
+per newly finished record, whatever the size of the history: finished records keep
+their per-market outcome, so they are never read back to recompute the stats. The first
+open imports an existing predictions_history.json, whose entries from before run ids
+get "legacy-<n>" runs (the n-th prediction of that match) and are left unfinished for
+the next result check to score.
+
+predictions_history.json is no longer rewritten by the pipeline; export it on demand
+with python -m src.prediction_history.
+"""
+
+HISTORY_DB_PATH = os.path.join("data", "predict", "predictions_history.sqlite")
+HISTORY_JSON_PATH = os.path.join("data", "predict", "predictions_history.json")
+
+
+class PredictionHistory:
+    def __init__(self, path=HISTORY_DB_PATH, legacy_json=HISTORY_JSON_PATH):
+        is_new = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions (id INTEGER PRIMARY KEY, match_id, "
+            "run TEXT NOT NULL, finished INTEGER NOT NULL DEFAULT 0, payload TEXT NOT NULL, "
+            "outcome TEXT, UNIQUE (match_id, run))"
+        )
+        # check_results streams only the unfinished records.
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_finished ON predictions(finished)"
+        )
+        self._conn.commit()
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            self._import_json(legacy_json)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Closing the last connection checkpoints the WAL back into the database file.
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def _import_json(self, path):
+        records = load_json(path)
+        seen = Counter()
+        pairs = []
+        for record in records:
+            seen[record.get("match_id")] += 1
+            run = record.get("run") or f"legacy-{seen[record.get('match_id')]:03d}"
+            # Legacy entries carry no outcome, so the next result check scores them again.
+            pairs.append((run, {**record, "finished": False}))
+        self._upsert(pairs)
+        logging.info(f"[INFO] Imported {len(records)} predictions from {path} into {self.path}")
+
+    def _upsert(self, pairs):
+        rows = []
+        for run, record in pairs:
+            payload = {k: v for k, v in record.items() if k not in ("run", "finished")}
+            rows.append(
+                (
+                    record.get("match_id"),
+                    run,
+                    int(bool(record.get("finished", False))),
+                    json.dumps(payload, ensure_ascii=False),
+                )
+            )
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO predictions (match_id, run, finished, payload) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (match_id, run) DO UPDATE SET "
+                "finished = excluded.finished, payload = excluded.payload, outcome = NULL",
+                rows,
+            )
+        return len(rows)
+
+    def append(self, run, records):
+        """Store records of one prediction run; a record already stored for the run is replaced."""
+        return self._upsert([(run, record) for record in records])
+
+    def get(self, match_id, run):
+        row = self._conn.execute(
+            "SELECT match_id, run, finished, payload FROM predictions "
+            "WHERE match_id = ? AND run = ?",
+            (match_id, run),
+        ).fetchone()
+        return None if row is None else _record(row)
+
+    def set_finished(self, match_id, run, finished=True):
+        """Set one record's finished flag; returns True if it changed."""
+        return self.set_finished_many([(match_id, run, finished)]) > 0
+
+    def set_finished_many(self, changes):
+        """Apply (match_id, run, finished) flags in one transaction; returns how many changed."""
+        with self._conn:
+            cursor = self._conn.executemany(
+                "UPDATE predictions SET finished = ? "
+                "WHERE match_id = ? AND run = ? AND finished != ?",
+                [(int(f), match_id, run, int(f)) for match_id, run, f in changes],
+            )
+        return cursor.rowcount
+
+    def mark_finished_many(self, results):
+        """Mark (match_id, run, outcome) records finished, storing each outcome dict.
+
+        outcome maps a market to 1 (correct) or 0; records already finished are left as
+        they are. Returns how many records were marked.
+        """
+        with self._conn:
+            cursor = self._conn.executemany(
+                "UPDATE predictions SET finished = 1, outcome = ? "
+                "WHERE match_id = ? AND run = ? AND finished = 0",
+                [(json.dumps(outcome), match_id, run) for match_id, run, outcome in results],
+            )
+        return cursor.rowcount
+
+    def outcome_totals(self):
+        """{market: (correct, total)} over the outcomes of finished records."""
+        rows = self._conn.execute(
+            "SELECT o.key, SUM(o.value), COUNT(*) FROM predictions, json_each(outcome) AS o "
+            "WHERE finished = 1 AND outcome IS NOT NULL GROUP BY o.key"
+        ).fetchall()
+        return {key: (correct, total) for key, correct, total in rows}
+
+    def stream(self, finished=None, batch_size=500):
+        """Yield records in insertion order, optionally only (un)finished ones."""
+        query = "SELECT match_id, run, finished, payload FROM predictions"
+        params = ()
+        if finished is not None:
+            query += " WHERE finished = ?"
+            params = (int(finished),)
+        cursor = self._conn.execute(query + " ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _record(row)
+
+    def __iter__(self):
+        return self.stream()
+
+    def export_json(self, path=HISTORY_JSON_PATH):
+        """Write every record as a JSON list (json.dump indent=2 layout), streaming.
+
+        Entries have the predictions_history.json layout: the prediction record followed
+        by its finished flag, without the run.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for record in self.stream():
+                del record["run"]
+                record["finished"] = record.pop("finished")
+                text = json.dumps(record, ensure_ascii=False, indent=2)
+                f.write(("," if count else "") + "\n" + textwrap.indent(text, "  "))
+                count += 1
+            f.write("\n]" if count else "]")
+        os.replace(tmp_path, path)
+        logging.info(f"[INFO] Exported {count} predictions to {path}")
+        return count
+
+
+def _record(row):
+    match_id, run, finished, payload = row
+    return {**json.loads(payload), "run": run, "finished": bool(finished)}
+
+
+if __name__ == "__main__":
+    with PredictionHistory() as history:
+        history.export_json()
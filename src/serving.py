@@ -0,0 +1,220 @@
+from sklearn.preprocessing import StandardScaler
+from src.features import TeamHistoryIndex
+from src.match_store import read_matches
+from src.predict import predict_games, prediction_record
+
+import numpy as np
+import pandas as pd
+
+"""
+Online scoring of fixtures posted to the API as MatchInput payloads.
+
+A MatchInput names its league and teams but carries no API ids, so ranks and h2h stats
+come from the newest stored match of each team and team pair (the standings and h2h
+snapshots the fetch stage saved with it) and form from a TeamHistoryIndex, all held in
+memory.
+
+Building a pandas frame and running sklearn's input validation costs over 10 ms for a
+single fixture, so feature sets made only of FAST_COLUMNS are assembled as one NumPy
+matrix and standardized in place, giving the same values as build_feature_frame and
+project_features. Bundles selecting any other column go through predict_games.
+"""
+
+H2H_FIELDS = [
+    "h2h_games_played",
+    "h2h_team1_wins",
+    "h2h_team2_wins",
+    "h2h_draws",
+    "h2h_team1_scored",
+    "h2h_team2_scored",
+    "h2h_team1_home_wins",
+    "h2h_team1_home_draws",
+    "h2h_team1_home_losses",
+    "h2h_team1_home_scored",
+    "h2h_team1_home_conceded",
+    "h2h_team2_home_wins",
+    "h2h_team2_home_draws",
+    "h2h_team2_home_losses",
+    "h2h_team2_home_scored",
+    "h2h_team2_home_conceded",
+]
+# Field names of the same h2h stats seen from the other team's side.
+H2H_SWAPPED = {
+    field: field.replace("team1", "#").replace("team2", "team1").replace("#", "team2")
+    for field in H2H_FIELDS
+}
+ODDS_COLUMNS = {"home_win": "home", "draw": "draw", "away_win": "away"}
+FORM_COLUMNS = [
+    "team1_last5_avg_points",
+    "team2_last5_avg_points",
+    "team1_last5_avg_goals",
+    "team2_last5_avg_goals",
+]
+FAST_COLUMNS = [
+    "team1_rank",
+    "team2_rank",
+    *H2H_FIELDS,
+    "Rank_Diff",
+    "League_Encoded",
+    *FORM_COLUMNS,
+    *ODDS_COLUMNS,
+]
+
+
+class FixtureContext:
+    """Latest ranks, h2h stats and form for teams of the historical matches."""
+
+    def __init__(self, historical_df):
+        df = historical_df.assign(
+            date=pd.to_datetime(historical_df["date"], errors="coerce", dayfirst=True)
+        ).sort_values("date", kind="stable")
+        self.history = TeamHistoryIndex(df)
+        sides = pd.concat(
+            [
+                df[["league", "team1", "team1_rank"]].set_axis(["league", "team", "rank"], axis=1),
+                df[["league", "team2", "team2_rank"]].set_axis(["league", "team", "rank"], axis=1),
+            ]
+        ).iloc[np.argsort(np.tile(np.arange(len(df)), 2), kind="stable")]
+        sides = sides.dropna(subset=["rank"]).drop_duplicates(["league", "team"], keep="last")
+        self.ranks = dict(zip(zip(sides["league"], sides["team"]), sides["rank"].tolist()))
+        pairs = pd.concat(
+            [
+                df[["league", "team1", "team2", *H2H_FIELDS]],
+                df[["league", "team2", "team1", *H2H_FIELDS]]
+                .set_axis(["league", "team1", "team2", *H2H_FIELDS], axis=1)
+                .rename(columns=H2H_SWAPPED),
+            ]
+        ).iloc[np.argsort(np.tile(np.arange(len(df)), 2), kind="stable")]
+        pairs = pairs.drop_duplicates(["league", "team1", "team2"], keep="last")
+        keys = zip(pairs["league"], pairs["team1"], pairs["team2"])
+        self.h2h = dict(zip(keys, pairs[H2H_FIELDS].to_dict("records")))
+
+    @classmethod
+    def from_store(cls, **kwargs):
+        """Build the context from the columnar match store, reading only the columns it needs."""
+        columns = ["date", "league", "team1", "team2", "team1_goals", "team2_goals"]
+        columns += ["team1_rank", "team2_rank", *H2H_FIELDS]
+        return cls(read_matches(columns=columns, categorical=False, **kwargs))
+
+    def game(self, match):
+        """Game dict (api_fetch layout, League by name) for a MatchInput-shaped dict."""
+        league, home, away = match["league"], match["home_team"], match["away_team"]
+        odds = match.get("odds")
+        game = {
+            "match_id": match.get("match_id"),
+            "date": match.get("date"),
+            "time": match.get("time"),
+            "League": league,
+            "home_name": home,
+            "away_name": away,
+            "is_cup": False,
+            "odds": dict(odds) if odds else None,
+            "team1_rank": self.ranks.get((league, home), ""),
+            "team2_rank": self.ranks.get((league, away), ""),
+        }
+        game.update(self.h2h.get((league, home, away), dict.fromkeys(H2H_FIELDS, np.nan)))
+        return game
+
+
+def _numeric(values):
+    """Floats for numbers and NaN for anything else, like pd.to_numeric(errors="coerce")."""
+    return np.fromiter(
+        (
+            v if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else np.nan
+            for v in values
+        ),
+        dtype=float,
+        count=len(values),
+    )
+
+
+def _league_codes(leagues, le_league):
+    # Same fallback as build_feature_frame: unknown leagues take an arbitrary known code.
+    codes = {league: code for code, league in enumerate(le_league.classes_)}
+    placeholder = codes[next(iter(set(le_league.classes_)))] if codes else 0
+    return np.array([codes.get(league, placeholder) for league in leagues], dtype=float)
+
+
+def fast_feature_matrix(games, le_league, history):
+    """(n_games, len(FAST_COLUMNS)) matrix of unscaled features, as build_feature_frame."""
+    dates = pd.to_datetime(pd.Series([g["date"] for g in games]), errors="coerce", dayfirst=True)
+    columns = {c: _numeric([g.get(c) for g in games]) for c in ["team1_rank", "team2_rank"]}
+    columns.update({c: _numeric([g.get(c) for g in games]) for c in H2H_FIELDS})
+    columns["Rank_Diff"] = columns["team1_rank"] - columns["team2_rank"]
+    columns["League_Encoded"] = _league_codes([g["League"] for g in games], le_league)
+    form = np.array(
+        [
+            history.recent_form(g["League"], g[side], date, n_games=5)
+            for g, date in zip(games, dates)
+            for side in ("home_name", "away_name")
+        ],
+        dtype=float,
+    ).reshape(len(games), 2, 2)
+    columns["team1_last5_avg_points"] = form[:, 0, 0]
+    columns["team2_last5_avg_points"] = form[:, 1, 0]
+    columns["team1_last5_avg_goals"] = form[:, 0, 1]
+    columns["team2_last5_avg_goals"] = form[:, 1, 1]
+    for col, key in ODDS_COLUMNS.items():
+        columns[col] = _numeric([(g.get("odds") or {}).get(key) for g in games])
+    return np.column_stack([columns[c] for c in FAST_COLUMNS])
+
+
+def _standardize(X, scaler):
+    if scaler is None:
+        return X
+    if type(scaler) is not StandardScaler:
+        return scaler.transform(X)
+    if scaler.with_mean:
+        X = X - scaler.mean_
+    if scaler.with_std:
+        X = X / scaler.scale_
+    return X
+
+
+def fast_predict_games(bundles, games, history):
+    """predict_games for bundles whose features are all FAST_COLUMNS, without pandas."""
+    position = {c: i for i, c in enumerate(FAST_COLUMNS)}
+    matrices, projected = {}, {}
+    for name, bundle in bundles.items():
+        model = bundle["model"]
+        le_league = bundle["le_league"]
+        encoding = tuple(le_league.classes_)
+        if encoding not in matrices:
+            matrices[encoding] = fast_feature_matrix(games, le_league, history)
+        feature_columns = bundle["feature_columns"]
+        key = (encoding, id(bundle.get("scaler")), tuple(feature_columns))
+        if key not in projected:
+            X = matrices[encoding][:, [position[c] for c in feature_columns]]
+            projected[key] = _standardize(X, bundle.get("scaler"))
+        engine = bundle.get("engine")
+        if engine is None:
+            probs = model.predict_proba(pd.DataFrame(projected[key], columns=feature_columns))
+        else:
+            probs = engine.predict_proba(projected[key])
+        if "targets" in bundle:
+            outputs = list(zip(probs, model.classes_))
+        else:
+            outputs = [(probs, model.classes_)]
+        for t, (p, classes) in zip(bundle.get("targets", [name]), outputs):
+            preds, confs = classes[p.argmax(axis=1)], p.max(axis=1)
+            for i, game in enumerate(games):
+                game[f"prediction_{t}"] = preds[i]
+                game[f"confidence_{t}"] = confs[i]
+    for game in games:
+        for col, key in ODDS_COLUMNS.items():
+            game[col] = (game.get("odds") or {}).get(key)
+    return games
+
+
+def predict_matches(bundles, context, matches):
+    """Score MatchInput-shaped dicts with every bundle; one predictions.json entry per match."""
+    games = [context.game(match) for match in matches]
+    fast = set(FAST_COLUMNS)
+    if all(
+        b.get("le_league") is not None and set(b.get("feature_columns", [])) <= fast
+        for b in bundles.values()
+    ):
+        fast_predict_games(bundles, games, context.history)
+    else:
+        predict_games(bundles, games, context.history)
+    return [prediction_record(game) for game in games]
@@ -1,83 +1,495 @@
-import joblib
+import copy
 import os
+import time
 import logging
 import numpy as np
 import pandas as pd
+import yaml
 
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from src.utils import setup_logging, save_json, load_config
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold
+from src.utils import setup_logging, save_json, load_config, load_json
 from src.data_prep import preprocess_data
+from src.feature_store import FEATURE_STORE_PATH, match_keys
+from src.instrument import set_rows, span
+from src.model_store import MULTI_OUTPUT_BUNDLE, BundleLoader, save_bundle, write_manifest
+from src.fingerprint import (
+    data_digest,
+    files_digest,
+    is_up_to_date,
+    save_fingerprint,
+    stage_fingerprint,
+)
 
 setup_logging()
 
+TRAIN_STATE_FILE = "train_state.json"
+TRAIN_FINGERPRINT_FILE = "train_fingerprint.json"
+TUNED_PARAMS_PATH = "config/tuned_params.yaml"
+TRAIN_SOURCES = [
+    "src/data_prep.py",
+    "src/feature_store.py",
+    "src/features.py",
+    "src/forest_engine.py",
+    "src/model_store.py",
+    "src/train.py",
+]
 
-def train_model():
+
+def parallel_plan(n_jobs, n_targets, cv_folds, parallelism="targets"):
+    """Split a core budget into (target workers, CV jobs per target, tree jobs per forest).
+
+    "targets" runs targets in separate processes and splits the rest of each worker's
+    share between CV folds and trees; "trees" trains targets one at a time and gives the
+    whole budget to each forest. The product never exceeds n_jobs, so nothing oversubscribes.
+    """
+    if n_jobs is None or n_jobs == 0:
+        n_jobs = 1
+    elif n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    if parallelism == "trees":
+        return 1, 1, n_jobs
+    if parallelism != "targets":
+        raise ValueError(f"Unknown train_params.parallelism: {parallelism!r}")
+    workers = max(1, min(n_jobs, n_targets))
+    share = max(1, n_jobs // workers)
+    cv_jobs = max(1, min(cv_folds, share))
+    return workers, cv_jobs, max(1, share // cv_jobs)
+
+
+def fold_indices(n_rows, cv_folds, random_seed):
+    """Shuffled K-fold (train_idx, val_idx) pairs, computed once and shared by every target."""
+    kfold = KFold(n_splits=cv_folds, shuffle=True, random_state=random_seed)
+    return list(kfold.split(np.arange(n_rows)))
+
+
+def forest(train_params, n_estimators, random_state, n_jobs=None):
+    return RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=train_params.get("max_depth", 5),
+        min_samples_leaf=train_params.get("min_samples_leaf", 10),
+        max_features=train_params.get("max_features", "sqrt"),
+        max_samples=train_params.get("max_samples"),
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+
+
+def _fit_fold(X, y, train_idx, train_params, n_estimators, random_state, n_jobs):
+    model = forest(train_params, n_estimators, random_state, n_jobs)
+    model.fit(X.iloc[train_idx], y[train_idx])
+    return model
+
+
+def _output_classes(model):
+    return model.classes_ if isinstance(model.classes_, list) else [model.classes_]
+
+
+def pool_forests(models):
+    """One forest voting with every tree of models, which must share the same classes."""
+    pooled = copy.deepcopy(models[0])
+    pooled.estimators_ = [tree for model in models for tree in model.estimators_]
+    pooled.n_estimators = len(pooled.estimators_)
+    return pooled
+
+
+def _encode_target(y):
+    """(encoded labels, LabelEncoder or None) for one target column."""
+    if y.dtype == object or y.dtype.name == "category":
+        encoder = LabelEncoder()
+        return encoder.fit_transform(y), encoder
+    return np.asarray(y), None
+
+
+def fold_tree_count(train_params, n_folds):
+    """Trees each fold forest fits: n_estimators / n_folds when pooling, else n_estimators."""
+    n_estimators = train_params.get("n_estimators", 100)
+    if train_params.get("final_model", "pooled") == "pooled":
+        return -(-n_estimators // n_folds)
+    return n_estimators
+
+
+def cross_fit(X, y, folds, train_params, random_seed, cv_jobs=1, tree_jobs=1, label="target"):
+    """Fit one forest per shared fold and build the final model from them.
+
+    y is 1-D, or 2-D with one column per output for a multi-output forest. Each fold's
+    forest predicts its held-out rows; those out-of-fold predictions give the CV metrics.
+    With train_params.final_model "pooled" (default) each fold fits n_estimators /
+    cv_folds trees and the final model pools them, so the whole fit costs one forest's
+    worth of trees. "refit" fits full-size fold forests and then one more on all rows.
+
+    In pooled mode the CV metrics are therefore per-fold sub-forest scores, not scores of
+    the saved model: every held-out row is predicted by the fold_tree_count trees that
+    never saw it, while the pooled model also holds trees trained on that row.
+
+    Returns (model, oof_pred, fold_scores) where fold_scores has one row per fold and
+    one column per output.
+    """
+    n_estimators = train_params.get("n_estimators", 100)
+    final_mode = train_params.get("final_model", "pooled")
+    if final_mode not in ("pooled", "refit"):
+        raise ValueError(f"Unknown train_params.final_model: {final_mode!r}")
+    fold_trees = fold_tree_count(train_params, len(folds))
+    models = Parallel(n_jobs=cv_jobs)(
+        delayed(_fit_fold)(X, y, train_idx, train_params, fold_trees, random_seed + i, tree_jobs)
+        for i, (train_idx, _) in enumerate(folds)
+    )
+
+    y_2d = y.reshape(len(y), -1)
+    oof_pred = np.empty_like(y_2d)
+    fold_scores = []
+    for model, (_, val_idx) in zip(models, folds):
+        oof_pred[val_idx] = model.predict(X.iloc[val_idx]).reshape(len(val_idx), -1)
+        fold_scores.append(np.mean(oof_pred[val_idx] == y_2d[val_idx], axis=0))
+
+    classes = [np.unique(col) for col in y_2d.T]
+    same_classes = all(
+        all(np.array_equal(a, b) for a, b in zip(_output_classes(m), classes)) for m in models
+    )
+    if final_mode == "pooled" and same_classes:
+        model = pool_forests(models)
+    else:
+        if final_mode == "pooled":
+            logging.warning(f"[WARNING] A fold missed a class of '{label}'; refitting instead.")
+        model = forest(train_params, n_estimators, random_seed, tree_jobs)
+        model.fit(X, y)
+    # Saved forests predict single-threaded; parallelism is a training-time setting.
+    model.set_params(n_jobs=None)
+    return model, oof_pred.reshape(y.shape), np.array(fold_scores)
+
+
+def _target_metrics(target, y, oof_pred, train_pred, fold_scores, fold_trees):
+    cv_scores = fold_scores
+    train_acc = float(np.mean(train_pred == y))
+    val_acc = float(np.mean(oof_pred == y))
+    logging.info(
+        f"[INFO] Cross-validation accuracy for {target} ({fold_trees} trees per fold): "
+        f"{cv_scores.mean():.4f} ± {cv_scores.std():.4f}"
+    )
+    logging.info(f"[INFO] Train accuracy for {target}: {train_acc:.4f}")
+    logging.info(f"[INFO] Validation (out-of-fold) accuracy for {target}: {val_acc:.4f}")
+    return {
+        "cv_mean_accuracy": float(cv_scores.mean()),
+        "cv_std_accuracy": float(cv_scores.std()),
+        "train_accuracy": train_acc,
+        "val_accuracy": val_acc,
+        "cv_trees_per_fold": fold_trees,
+    }
+
+
+def _check_classes(target, y):
+    unique_classes = np.unique(y)
+    if unique_classes.shape[0] < 2:
+        logging.warning(
+            f"[WARNING] Only one class present for target '{target}': {unique_classes}. Check your data!"
+        )
+
+
+def train_target(target, X, y, folds, train_params, random_seed, cv_jobs=1, tree_jobs=1):
+    """Cross-validate and fit the model for one target on shared folds (see cross_fit).
+
+    Returns (model, encoder, metrics, seconds). Forests are seeded from random_seed, so
+    the result does not depend on cv_jobs, tree_jobs or which process runs it.
+    """
+    start = time.perf_counter()
+    logging.info(f"[INFO] Training model for target: {target}")
+    y, encoder = _encode_target(y)
+    _check_classes(target, y)
+    model, oof_pred, fold_scores = cross_fit(
+        X, y, folds, train_params, random_seed, cv_jobs, tree_jobs, label=target
+    )
+    fold_trees = fold_tree_count(train_params, len(folds))
+    metrics = _target_metrics(target, y, oof_pred, model.predict(X), fold_scores[:, 0], fold_trees)
+    return model, encoder, metrics, time.perf_counter() - start
+
+
+def train_multi_output(
+    targets, X, target_df, folds, train_params, random_seed, cv_jobs=1, tree_jobs=1
+):
+    """Fit one multi-output forest predicting every target from a single pass over X.
+
+    Returns (model, encoders, metrics, seconds) with encoders and metrics keyed by target.
+    """
+    start = time.perf_counter()
+    logging.info(f"[INFO] Training multi-output model for targets: {targets}")
+    columns, encoders = [], {}
+    for target in targets:
+        y, encoders[target] = _encode_target(target_df[target])
+        _check_classes(target, y)
+        columns.append(y)
+    Y = np.column_stack(columns)
+    model, oof_pred, fold_scores = cross_fit(
+        X, Y, folds, train_params, random_seed, cv_jobs, tree_jobs, label="multi_output"
+    )
+    train_pred = model.predict(X)
+    fold_trees = fold_tree_count(train_params, len(folds))
+    metrics = {
+        target: _target_metrics(
+            target, Y[:, k], oof_pred[:, k], train_pred[:, k], fold_scores[:, k], fold_trees
+        )
+        for k, target in enumerate(targets)
+    }
+    return model, encoders, metrics, time.perf_counter() - start
+
+
+def load_train_state(model_dir):
+    """Rows and schedule of previous runs, used to decide what incremental training adds."""
+    path = os.path.join(model_dir, TRAIN_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        return load_json(path)
+    except Exception as e:
+        logging.warning(f"[WARNING] Ignoring unreadable training state {path}: {e}")
+        return {}
+
+
+def warm_start_target(
+    target, bundle, X, y, new_mask, dates, scaler, le_league, previous_metrics, settings
+):
+    """Grow the previous forest of a target with trees fitted on recent rows.
+
+    X is scaled with this run's scaler, so it is mapped back onto the previous bundle's
+    scale before the old trees see it. Drift is measured against full_val_accuracy, the
+    out-of-fold accuracy of the last full retrain, so the baseline does not move between
+    warm starts; the accuracy on the new rows is recorded as new_rows_accuracy. Returns (bundle, metrics) or, when a full retrain
+    is needed instead, a string with the reason.
+    """
+    if bundle is None or not previous_metrics:
+        return "no previous model"
+    if list(bundle["feature_columns"]) != list(X.columns):
+        return "feature columns changed"
+    if not np.array_equal(bundle["le_league"].classes_, le_league.classes_):
+        return "league encoding changed"
+    encoder = bundle["encoder"]
+    if encoder is not None:
+        if not set(y.unique()) <= set(encoder.classes_):
+            return "new target labels"
+        y = encoder.transform(y)
+    y = np.asarray(y)
+    raw = pd.DataFrame(scaler.inverse_transform(X), columns=X.columns)
+    X = pd.DataFrame(bundle["scaler"].transform(raw), columns=X.columns)
+    model = bundle["model"]
+    metrics = dict(previous_metrics)
+    n_new = int(new_mask.sum())
+    if n_new == 0:
+        metrics.update({"training_mode": "unchanged", "new_rows": 0})
+        return bundle, metrics
+
+    new_acc = float(np.mean(model.predict(X[new_mask]) == y[new_mask]))
+    baseline = metrics.get("full_val_accuracy", metrics["val_accuracy"])
+    drop = baseline - new_acc
+    if n_new >= settings.get("min_drift_rows", 50) and drop > settings.get(
+        "max_accuracy_drop", 0.05
+    ):
+        return f"accuracy on {n_new} new rows dropped by {drop:.3f}"
+
+    window = np.zeros(len(X), dtype=bool)
+    window[np.argsort(dates, kind="stable")[-settings.get("window_rows", 1000) :]] = True
+    window |= new_mask
+    if not np.array_equal(np.unique(y[window]), model.classes_):
+        return "recent rows miss a class"
+    model.set_params(
+        warm_start=True, n_estimators=len(model.estimators_) + settings.get("new_trees", 20)
+    )
+    model.fit(X[window], y[window])
+    model.set_params(warm_start=False)
+    max_trees = settings.get("max_trees", 300)
+    if len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+    train_acc = float(np.mean(model.predict(X) == y))
+    metrics.update(
+        {
+            "train_accuracy": train_acc,
+            "full_val_accuracy": baseline,
+            "new_rows_accuracy": new_acc,
+            "training_mode": "incremental",
+            "new_rows": n_new,
+            "n_trees": len(model.estimators_),
+        }
+    )
+    logging.info(
+        f"[INFO] Added trees to '{target}' from {n_new} new rows: "
+        f"{len(model.estimators_)} trees, accuracy on new rows {new_acc:.4f}"
+    )
+    return {**bundle, "model": model}, metrics
+
+
+def training_data(targets, feature_store_path=FEATURE_STORE_PATH):
+    """preprocess_data output restricted to rows with complete odds, as every model sees it."""
+    df, feature_columns, target_df, scaler, le_league = preprocess_data(
+        targets=targets, feature_store_path=feature_store_path
+    )
+    odds_cols = ["home_win", "draw", "away_win"]
+    mask = df[odds_cols].apply(pd.to_numeric, errors="coerce").notna().all(axis=1)
+    df = df[mask]
+    return df, feature_columns, target_df.loc[df.index], scaler, le_league
+
+
+def load_tuned_params(path):
+    """Per-target train_params overrides written by src/tune.py, or {} without an overlay."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def full_retrain_due(last_full_train, target, full_every_days):
+    """Whether target's last full retrain (ISO date in train state) is full_every_days old."""
+    if target not in last_full_train:
+        return False
+    age = (date.today() - date.fromisoformat(last_full_train[target])).days
+    return age >= full_every_days
+
+
+def train_model(force=False):
+    """Train every target and save bundles, metrics and the training fingerprint.
+
+    Training is skipped when the match data, the config sections it reads and the
+    feature/training code are unchanged since the fingerprint was written, unless force.
+    """
     config = load_config()
     targets = config.get("targets", ["Winner", "BTTS", "Over_1_5", "Over_2_5", "Double_Chance"])
     train_params = config.get("train_params", {})
     random_seed = config.get("random_seed", 42)
     model_dir = config.get("paths", {}).get("model_dir", "models/")
+    feature_store_path = config.get("paths", {}).get("feature_store", FEATURE_STORE_PATH)
+    tuned_path = config.get("paths", {}).get("tuned_params", TUNED_PARAMS_PATH)
+    tuned = load_tuned_params(tuned_path)
     os.makedirs(model_dir, exist_ok=True)
+    state_path = os.path.join(model_dir, TRAIN_STATE_FILE)
+    fingerprint_path = os.path.join(model_dir, TRAIN_FINGERPRINT_FILE)
+    fingerprint = stage_fingerprint(
+        data=data_digest(),
+        config={k: config.get(k) for k in ("random_seed", "targets", "train_params", "paths")},
+        sources=files_digest(TRAIN_SOURCES),
+        tuned=tuned,
+    )
+    if train_params.get("multi_output", False):
+        outputs = [os.path.join(model_dir, MULTI_OUTPUT_BUNDLE)]
+    else:
+        outputs = [os.path.join(model_dir, f"bundle_{t}.pkl") for t in targets]
+    incremental = train_params.get("incremental", {})
+    state = load_train_state(model_dir)
+    full_every_days = incremental.get("full_every_days", 7)
+    # Unchanged inputs do not postpone an incremental run's scheduled full retrain.
+    due = incremental.get("enabled", False) and any(
+        full_retrain_due(state.get("last_full_train", {}), t, full_every_days) for t in targets
+    )
+    if not force and not due and is_up_to_date(fingerprint_path, fingerprint, outputs):
+        logging.info("[INFO] Training inputs unchanged since the last run; skipping training.")
+        return
 
-    df, feature_columns, target_df, scaler, le_league = preprocess_data(targets=targets)
-    odds_cols = ["home_win", "draw", "away_win"]
-    mask = df[odds_cols].apply(pd.to_numeric, errors="coerce").notna().all(axis=1)
-    df = df[mask]
-    target_df = target_df.loc[df.index]
+    df, feature_columns, target_df, scaler, le_league = training_data(targets, feature_store_path)
     X = df[feature_columns]
-    metrics = {}
-    for target in targets:
-        logging.info(f"[INFO] Training model for target: {target}")
-        y = target_df[target]
-        encoder = None
-        if y.dtype == object or y.dtype.name == "category":
-            encoder = LabelEncoder()
-            y = encoder.fit_transform(y)
-        model_cv = RandomForestClassifier(
-            n_estimators=train_params.get("n_estimators", 100),
-            max_depth=train_params.get("max_depth", 5),
-            min_samples_leaf=train_params.get("min_samples_leaf", 10),
-            random_state=random_seed,
-        )
-        cv_scores = cross_val_score(
-            model_cv, X, y, cv=train_params.get("cv_folds", 5), scoring="accuracy"
-        )
-        logging.info(
-            f"[INFO] Cross-validation accuracy for {target}: {cv_scores.mean():.4f} ± {cv_scores.std():.4f}"
+    set_rows(len(X))
+
+    workers, cv_jobs, tree_jobs = parallel_plan(
+        train_params.get("n_jobs", 1),
+        len(targets),
+        train_params.get("cv_folds", 5),
+        train_params.get("parallelism", "targets"),
+    )
+    logging.info(
+        f"[INFO] Training {len(targets)} targets with {workers} worker(s), "
+        f"{cv_jobs} CV job(s) and {tree_jobs} tree job(s) each."
+    )
+    folds = fold_indices(len(X), train_params.get("cv_folds", 5), random_seed)
+    keys = match_keys(df)
+    if train_params.get("multi_output", False):
+        if incremental.get("enabled", False):
+            logging.info("[INFO] Incremental training is not available in multi-output mode.")
+        if tuned:
+            logging.info(
+                f"[INFO] Ignoring per-target parameters in {tuned_path} in multi-output mode."
+            )
+        model, encoders, metrics, seconds = train_multi_output(
+            targets, X, target_df, folds, train_params, random_seed, cv_jobs, tree_jobs * workers
         )
-        metrics[target] = {
-            "cv_mean_accuracy": float(cv_scores.mean()),
-            "cv_std_accuracy": float(cv_scores.std()),
+        logging.info(f"[INFO] Trained multi-output model in {seconds:.2f}s")
+        bundle = {
+            "model": model,
+            "targets": targets,
+            "feature_columns": feature_columns,
+            "scaler": scaler,
+            "le_league": le_league,
+            "encoders": encoders,
+        }
+        path = os.path.join(model_dir, MULTI_OUTPUT_BUNDLE)
+        digest = save_bundle(bundle, path)
+        logging.info(f"[INFO] Multi-output bundle saved in {model_dir}{MULTI_OUTPUT_BUNDLE}")
+        entry = {
+            "path": path,
+            "preprocess": digest,
+            "targets": targets,
+            "training_mode": "full",
+            "n_trees": len(model.estimators_),
+            "trained_at": date.today().isoformat(),
         }
-        unique_classes = np.unique(y)
-        if unique_classes.shape[0] > 1:
-            stratify_param = y
+        write_manifest(model_dir, {"multi_output": entry})
+        for target in targets:
+            metrics[target]["training_mode"] = "full"
+        save_json(metrics, os.path.join(model_dir, "train_metrics.json"))
+        logging.info(f"[INFO] Training metrics saved in {model_dir}train_metrics.json.")
+        save_json({"trained_keys": keys.tolist(), "last_full_train": {}}, state_path)
+        save_fingerprint(fingerprint_path, fingerprint)
+        return
+
+    results = {}
+    last_full = state.get("last_full_train", {})
+    last_tuned = state.get("tuned_params", {})
+    if incremental.get("enabled", False):
+        metrics_path = os.path.join(model_dir, "train_metrics.json")
+        previous_metrics = load_json(metrics_path) if os.path.exists(metrics_path) else {}
+        loader = BundleLoader(model_dir)
+        new_mask = ~keys.isin(set(state.get("trained_keys", []))).to_numpy()
+        dates = df["date"].to_numpy()
+        for target in targets:
+            start = time.perf_counter()
+            bundle_path = os.path.join(model_dir, f"bundle_{target}.pkl")
+            if target not in last_full:
+                outcome = "no record of a full retrain"
+            elif full_retrain_due(last_full, target, full_every_days):
+                outcome = "scheduled full retrain"
+            elif last_tuned.get(target) != tuned.get(target):
+                outcome = "tuned parameters changed"
+            else:
+                bundle = loader.load(bundle_path) if os.path.exists(bundle_path) else None
+                outcome = warm_start_target(
+                    target,
+                    bundle,
+                    X,
+                    target_df[target],
+                    new_mask,
+                    dates,
+                    scaler,
+                    le_league,
+                    previous_metrics.get(target),
+                    incremental,
+                )
+            if isinstance(outcome, str):
+                logging.info(f"[INFO] Full retrain for '{target}': {outcome}")
+                continue
+            results[target] = (*outcome, time.perf_counter() - start)
+
+    full_targets = [t for t in targets if t not in results]
+    params = {t: {**train_params, **tuned.get(t, {})} for t in full_targets}
+    args = [
+        (t, X, target_df[t], folds, params[t], random_seed, cv_jobs, tree_jobs)
+        for t in full_targets
+    ]
+    with span("fit_targets"):
+        if workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                full_results = list(pool.map(train_target, *zip(*args)))
         else:
-            stratify_param = None
-            logging.warning(
-                f"[WARNING] Stratify disabled for target '{target}' (only one class present: {unique_classes}). Check your data!"
-            )
-        X_train, X_val, y_train, y_val = train_test_split(
-            X,
-            y,
-            test_size=train_params.get("test_size", 0.2),
-            random_state=random_seed,
-            stratify=stratify_param,
-        )
-        model = RandomForestClassifier(
-            n_estimators=train_params.get("n_estimators", 100),
-            max_depth=train_params.get("max_depth", 5),
-            min_samples_leaf=train_params.get("min_samples_leaf", 10),
-            random_state=random_seed,
-        )
-        model.fit(X_train, y_train)
-        train_acc = model.score(X_train, y_train)
-        val_acc = model.score(X_val, y_val)
-        metrics[target].update({"train_accuracy": train_acc, "val_accuracy": val_acc})
-        logging.info(f"[INFO] Train accuracy for {target}: {train_acc:.4f}")
-        logging.info(f"[INFO] Validation accuracy for {target}: {val_acc:.4f}")
+            full_results = [train_target(*a) for a in args]
+    for target, (model, encoder, target_metrics, seconds) in zip(full_targets, full_results):
         bundle = {
             "model": model,
             "feature_columns": feature_columns,
@@ -85,8 +497,33 @@ def train_model():
             "le_league": le_league,
             "encoder": encoder,
         }
-        joblib.dump(bundle, os.path.join(model_dir, f"bundle_{target}.pkl"))
+        target_metrics["training_mode"] = "full"
+        target_metrics["full_val_accuracy"] = target_metrics["val_accuracy"]
+        last_full[target] = date.today().isoformat()
+        last_tuned[target] = tuned.get(target)
+        results[target] = (bundle, target_metrics, seconds)
+
+    metrics, entries = {}, {}
+    for target in targets:
+        bundle, metrics[target], seconds = results[target]
+        logging.info(
+            f"[INFO] Trained target '{target}' ({metrics[target]['training_mode']}) in {seconds:.2f}s"
+        )
+        path = os.path.join(model_dir, f"bundle_{target}.pkl")
+        entries[target] = {
+            "path": path,
+            "preprocess": save_bundle(bundle, path),
+            "training_mode": metrics[target]["training_mode"],
+            "n_trees": len(bundle["model"].estimators_),
+            "trained_at": date.today().isoformat(),
+        }
         logging.info(f"[INFO] Bundle saved for target '{target}' in {model_dir}bundle_{target}.pkl")
+    write_manifest(model_dir, entries)
     save_json(metrics, os.path.join(model_dir, "train_metrics.json"))
     logging.info(f"[INFO] Training metrics saved in {model_dir}train_metrics.json.")
+    save_json(
+        {"trained_keys": keys.tolist(), "last_full_train": last_full, "tuned_params": last_tuned},
+        state_path,
+    )
+    save_fingerprint(fingerprint_path, fingerprint)
     logging.info("[INFO] Training completed for all targets.")
@@ -0,0 +1,161 @@
+from joblib import Parallel, delayed
+from src.utils import setup_logging, load_config
+from src.feature_store import FEATURE_STORE_PATH
+from src.train import (
+    TUNED_PARAMS_PATH,
+    _encode_target,
+    fold_indices,
+    forest,
+    load_tuned_params,
+    parallel_plan,
+    training_data,
+)
+
+import logging
+import os
+import time
+import numpy as np
+import yaml
+
+setup_logging()
+
+TUNED_KEYS = ["max_depth", "min_samples_leaf", "max_features", "max_samples"]
+
+
+def sample_candidates(search_space, n_candidates, base_params, random_seed):
+    """Distinct parameter sets drawn from search_space, starting with the current base_params.
+
+    search_space maps a forest parameter to the list of values to try; parameters not in it
+    keep their base_params value. The current configuration always competes, so tuning never
+    writes back something that lost to it.
+    """
+    rng = np.random.RandomState(random_seed)
+    base = {k: base_params[k] for k in search_space if k in base_params}
+    candidates, seen = [base], {repr(sorted(base.items()))}
+    for _ in range(n_candidates * 20):
+        if len(candidates) >= n_candidates:
+            break
+        params = {k: values[rng.randint(len(values))] for k, values in search_space.items()}
+        key = repr(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def _fold_score(X, y, train_idx, val_idx, params, n_estimators, random_state):
+    model = forest(params, n_estimators, random_state)
+    model.fit(X[train_idx], y[train_idx])
+    return float(np.mean(model.predict(X[val_idx]) == y[val_idx]))
+
+
+def successive_halving(
+    X, y, folds, candidates, random_seed, min_trees, max_trees, eta=3, n_jobs=1, deadline=None
+):
+    """Race candidates on the shared folds, growing trees by eta and keeping the best 1/eta.
+
+    Each rung scores every surviving candidate by mean out-of-fold accuracy with the rung's
+    tree count, fanning the (candidate, fold) fits out over n_jobs processes. Racing stops
+    at max_trees, with a single survivor, or when the next rung would not finish before
+    deadline (a time.monotonic() value); a rung costs about the same as the one before, as
+    eta times fewer candidates fit eta times more trees.
+
+    Tree count is the racing budget rather than a tuned parameter: more trees rarely hurt a
+    forest, so train_params.n_estimators stays in charge of the final size.
+
+    Returns (best params, its score at the last rung, list of per-rung summaries).
+    """
+    X = np.ascontiguousarray(X)
+    survivors, n_trees, rungs = list(candidates), min_trees, []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while True:
+            start = time.monotonic()
+            scores = parallel(
+                delayed(_fold_score)(X, y, train_idx, val_idx, params, n_trees, random_seed + i)
+                for params in survivors
+                for i, (train_idx, val_idx) in enumerate(folds)
+            )
+            means = np.asarray(scores).reshape(len(survivors), len(folds)).mean(axis=1)
+            order = np.argsort(-means, kind="stable")
+            seconds = time.monotonic() - start
+            rungs.append(
+                {
+                    "n_estimators": n_trees,
+                    "candidates": len(survivors),
+                    "best_accuracy": float(means[order[0]]),
+                    "seconds": round(seconds, 2),
+                }
+            )
+            best, best_score = survivors[order[0]], means[order[0]]
+            if len(survivors) == 1 or n_trees >= max_trees:
+                break
+            if deadline is not None and time.monotonic() + seconds > deadline:
+                logging.info(f"[INFO] Time budget reached after the {n_trees}-tree rung.")
+                break
+            survivors = [survivors[k] for k in order[: max(1, len(survivors) // eta)]]
+            n_trees = min(max_trees, n_trees * eta)
+    return best, float(best_score), rungs
+
+
+def save_tuned_params(tuned, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Written by `python main.py --mode tune`; overrides train_params per target.\n")
+        yaml.safe_dump(tuned, f, sort_keys=True)
+
+
+def tune_model():
+    """Search forest parameters per target and write the winners to the tuned-params overlay.
+
+    The feature matrix and the fold splits are built once and shared by every candidate of
+    every target. tune.time_budget_seconds is split evenly across targets; a target that
+    finishes early leaves its unused time to the next ones.
+    """
+    config = load_config()
+    targets = config.get("targets", ["Winner", "BTTS", "Over_1_5", "Over_2_5", "Double_Chance"])
+    train_params = config.get("train_params", {})
+    tune = config.get("tune", {})
+    random_seed = config.get("random_seed", 42)
+    paths = config.get("paths", {})
+    tuned_path = paths.get("tuned_params", TUNED_PARAMS_PATH)
+    search_space = tune.get(
+        "search_space", {"max_depth": [3, 5, 8], "min_samples_leaf": [5, 10, 20]}
+    )
+    min_trees = tune.get("min_trees", 10)
+    max_trees = tune.get("max_trees", train_params.get("n_estimators", 100))
+    eta = tune.get("eta", 3)
+    budget = tune.get("time_budget_seconds", 600)
+    _, _, n_jobs = parallel_plan(tune.get("n_jobs", train_params.get("n_jobs", 1)), 1, 1, "trees")
+
+    df, feature_columns, target_df, _, _ = training_data(
+        targets, paths.get("feature_store", FEATURE_STORE_PATH)
+    )
+    X = df[feature_columns].to_numpy(dtype=np.float64)
+    folds = fold_indices(len(X), train_params.get("cv_folds", 5), random_seed)
+    candidates = sample_candidates(
+        search_space, tune.get("n_candidates", 27), train_params, random_seed
+    )
+    logging.info(
+        f"[INFO] Tuning {len(targets)} targets: {len(candidates)} candidates, "
+        f"{min_trees}-{max_trees} trees, eta {eta}, {n_jobs} job(s), budget {budget}s."
+    )
+
+    tuned = load_tuned_params(tuned_path)
+    start = time.monotonic()
+    for k, target in enumerate(targets):
+        y, _ = _encode_target(target_df[target])
+        deadline = start + budget * (k + 1) / len(targets)
+        best, score, rungs = successive_halving(
+            X, y, folds, candidates, random_seed, min_trees, max_trees, eta, n_jobs, deadline
+        )
+        for rung in rungs:
+            logging.info(
+                f"[INFO] {target}: {rung['candidates']} candidate(s) at {rung['n_estimators']} "
+                f"trees, best accuracy {rung['best_accuracy']:.4f} ({rung['seconds']:.2f}s)"
+            )
+        tuned[target] = {key: best[key] for key in TUNED_KEYS if key in best}
+        logging.info(f"[INFO] Best parameters for {target} (accuracy {score:.4f}): {tuned[target]}")
+
+    save_tuned_params(tuned, tuned_path)
+    logging.info(f"[INFO] Tuned parameters saved in {tuned_path}.")
+    return tuned
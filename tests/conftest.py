@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def make_matches():
+    """Factory for random historical match frames with data_prep column names.
+
+    Dates are Timestamps, or strings when date_format is given (e.g. "%d/%m/%Y", the
+    matches_raw.json layout).
+    """
+
+    def make(n=300, seed=0, days=30, date_format=None):
+        rng = np.random.default_rng(seed)
+        dates = pd.Series(rng.choice(pd.date_range("2025-01-01", periods=days), n))
+        return pd.DataFrame(
+            {
+                "match_id": np.arange(n) + 1000,
+                "date": dates.dt.strftime(date_format) if date_format else dates,
+                "League": rng.choice(["A", "B"], n),
+                "team1": rng.choice(list("abcdef"), n),
+                "team2": rng.choice(list("ghijkl"), n),
+                "Team1Goals": rng.integers(0, 4, n).astype(float),
+                "Team2Goals": rng.integers(0, 4, n).astype(float),
+            }
+        )
+
+    return make
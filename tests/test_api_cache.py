@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from src.api_cache import H2HCache, StandingsCache, standings_positions
+
+import asyncio
+
+STANDINGS = [{"team_id": 10, "position": 1}, {"team_id": 11, "position": 2}]
+
+
+def counting_fetch(calls):
+    async def fetch(league_id):
+        calls.append(league_id)
+        await asyncio.sleep(0)
+        return STANDINGS
+
+    return fetch
+
+
+def test_standings_cache_fetches_each_league_once():
+    """Test that concurrent lookups fetch each league's standings once."""
+    calls = []
+    cache = StandingsCache(counting_fetch(calls))
+
+    async def lookups():
+        return await asyncio.gather(*(cache.positions(lg) for lg in [1, 1, 2, 1, 2]))
+
+    tables = asyncio.run(lookups())
+
+    assert sorted(calls) == [1, 2]
+    assert tables[0] == {"10": 1, "11": 2}
+    assert cache.requests == 2
+
+
+def test_standings_positions_keep_last_entry_per_team():
+    """Test that a team listed twice keeps its last standings position."""
+    table = STANDINGS + [{"team_id": 10, "position": 5}, "bad"]
+    assert standings_positions(table) == {"10": 5, "11": 2}
+
+
+def test_standings_cache_ttl_and_disk_layer(tmp_path):
+    """Test that expired standings are refetched and fresh ones reload from disk."""
+    calls = []
+    cache_dir = str(tmp_path / "standings")
+    expired = StandingsCache(counting_fetch(calls), ttl=timedelta(0), cache_dir=cache_dir)
+    asyncio.run(expired.positions(7))
+    asyncio.run(expired.positions(7))
+    assert calls == [7, 7]
+
+    warm = StandingsCache(counting_fetch(calls), cache_dir=cache_dir)
+    assert asyncio.run(warm.positions(7)) == {"10": 1, "11": 2}
+    assert calls == [7, 7]
+
+    asyncio.run(warm.positions(7, snapshot=date.today() + timedelta(days=1)))
+    assert calls == [7, 7, 7]
+    assert len(list((tmp_path / "standings").iterdir())) == 1
+
+
+def test_h2h_cache_hits_invalidation_and_lru(tmp_path):
+    """Test that h2h lookups hit the cache, honour invalidation and evict LRU entries."""
+    calls = []
+
+    async def fetch(team1_id, team2_id):
+        calls.append((team1_id, team2_id))
+        return {"overall": {"overall_games_played": team1_id + team2_id}}
+
+    path = str(tmp_path / "h2h.sqlite")
+    with H2HCache(fetch, path=path, max_entries=2) as cache:
+        asyncio.run(cache.get(1, 2))
+        asyncio.run(cache.get(1, 2))
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        cache.invalidate(2, 1)
+        asyncio.run(cache.get(1, 2))
+        assert calls == [(1, 2), (1, 2)]
+
+        asyncio.run(cache.get(3, 4))
+        asyncio.run(cache.get(1, 2))
+        asyncio.run(cache.get(5, 6))
+        assert len(cache) == 2
+
+    with H2HCache(fetch, path=path) as reopened:
+        assert asyncio.run(reopened.get(1, 2)) == {"overall": {"overall_games_played": 3}}
+        asyncio.run(reopened.get(3, 4))
+        assert (reopened.hits, reopened.misses) == (1, 1)
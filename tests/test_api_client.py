@@ -0,0 +1,87 @@
+from src.api_client import PrioritySlots, SoccerDataClient, retry_after_seconds
+
+import asyncio
+import httpx
+
+
+def scripted_client(statuses, **kwargs):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        status = statuses.pop(0) if statuses else 200
+        return httpx.Response(status, headers={"Retry-After": "0"}, json={"ok": status == 200})
+
+    client = SoccerDataClient(
+        api_key="key",
+        rate_per_second=1000,
+        backoff_base=0,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+    return client, calls
+
+
+def test_client_retries_throttled_and_server_errors():
+    """Test that the client retries 429 and 5xx responses before succeeding."""
+    client, calls = scripted_client([429, 503])
+
+    async def fetch():
+        async with client:
+            return await client.get("/match/", match_id=1)
+
+    response = asyncio.run(fetch())
+
+    assert response.json() == {"ok": True}
+    assert len(calls) == 3
+    assert client.retries == 2
+    assert client.failures == []
+
+
+def test_client_records_requests_failing_after_retries():
+    """Test that requests still failing after every retry are recorded."""
+    client, calls = scripted_client([500] * 10, max_retries=2)
+
+    async def fetch():
+        async with client:
+            return await client.get("/standing/", league_id=3)
+
+    response = asyncio.run(fetch())
+
+    assert response.status_code == 500
+    assert len(calls) == 3
+    assert client.failures == [{"path": "/standing/", "params": {"league_id": 3}, "error": 500}]
+
+
+def test_priority_slots_admit_lowest_priority_first():
+    """Test that waiting requests are admitted lowest priority value first."""
+    order = []
+
+    async def run():
+        slots = PrioritySlots(1)
+        await slots.acquire(0)
+
+        async def worker(name, priority):
+            await slots.acquire(priority)
+            order.append(name)
+            slots.release()
+
+        tasks = [
+            asyncio.ensure_future(worker(name, priority))
+            for name, priority in [("backfill", 10), ("upcoming", 0), ("default", 5)]
+        ]
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == ["upcoming", "default", "backfill"]
+
+
+def test_retry_after_parses_seconds_and_dates():
+    """Test that Retry-After is parsed from both seconds and HTTP dates."""
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+    assert retry_after_seconds(httpx.Response(429)) is None
+    past = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert retry_after_seconds(past) == 0.0
@@ -0,0 +1,76 @@
+from src.batcher import MicroBatcher
+
+import asyncio
+import pytest
+
+
+def test_concurrent_submits_share_batches_and_failures_reach_every_caller():
+    """Test that concurrent submits share batches and a failed batch fails every caller."""
+    calls = []
+
+    def handler(items):
+        calls.append(list(items))
+        if "boom" in items:
+            raise ValueError("boom")
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch=8, window=0.05)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+        failed = await asyncio.gather(
+            batcher.submit(1), batcher.submit("boom"), return_exceptions=True
+        )
+        metrics = batcher.metrics()
+        await batcher.stop()
+        return results, failed, metrics
+
+    results, failed, metrics = asyncio.run(scenario())
+    assert results == [i * 2 for i in range(20)]
+    assert [len(c) for c in calls[:3]] == [8, 8, 4]
+    assert all(isinstance(r, ValueError) for r in failed)
+    assert metrics["items"] == 22 and metrics["batches"] == 4
+    assert metrics["batch_size"]["max"] == 8
+    assert metrics["max_queue_depth"] >= 8
+    assert metrics["wait_ms"]["max"] >= 0
+
+
+def test_stop_fails_requests_still_queued():
+    """Test that stopping the batcher fails requests still in the queue."""
+
+    async def scenario():
+        batcher = MicroBatcher(lambda items: items, window=0.05)
+        pending = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        await batcher.stop()
+        return await pending
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        asyncio.run(scenario())
+
+
+def test_full_batch_dispatches_without_waiting_for_the_window():
+    """Test that a batch closes as soon as max_batch items are queued, before the window ends."""
+    calls = []
+
+    def handler(items):
+        calls.append(list(items))
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch=4, window=10)
+        batcher.start()
+        loop_time = asyncio.get_running_loop().time
+        start = loop_time()
+        together = await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        first = asyncio.ensure_future(batcher.submit(4))
+        await asyncio.sleep(0.01)
+        staggered = await asyncio.gather(first, *(batcher.submit(i) for i in range(5, 8)))
+        elapsed = loop_time() - start
+        await batcher.stop()
+        return together + staggered, elapsed
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == list(range(8))
+    assert calls == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert elapsed < 5
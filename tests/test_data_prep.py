@@ -17,7 +17,7 @@ def test_preprocess_data_runs():
 
 
 def test_preprocess_data_returns_scaler_encoder():
-    """Test if preprocess_data returns scaler and encoder when cleanup_models is False."""
+    """Test if preprocess_data returns the fitted scaler and encoder."""
     df, features, scaler, le_league = data_prep.preprocess_data()
     assert scaler is not None
     assert le_league is not None
@@ -0,0 +1,64 @@
+from src.feature_store import build_features, load_feature_store, save_feature_store
+from src.features import add_recent_form_features
+
+import pandas as pd
+
+# Dates as strings, as preprocess_data reads them from matches_raw.json.
+RAW_DATES = dict(days=60, date_format="%d/%m/%Y")
+
+
+def row_features(df):
+    df["Total_Goals"] = df["Team1Goals"] + df["Team2Goals"]
+    return df
+
+
+def assert_same_features(actual, expected):
+    assert list(actual.index) == list(expected.index)
+    pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+
+
+def test_feature_store_incremental_update_matches_full_rebuild(tmp_path, make_matches):
+    """Test that updating the store with new, edited and removed matches equals a rebuild."""
+    path = str(tmp_path / "features")
+    full = make_matches(n=400, **RAW_DATES)
+    stale = full.drop(index=range(0, 400, 13)).copy()
+    stale.loc[[5, 77, 301], "Team1Goals"] += 1
+    removed = make_matches(n=5, seed=1, **RAW_DATES).assign(match_id=range(5000, 5005))
+    build_features(pd.concat([stale, removed], ignore_index=True), row_features, path=path)
+
+    actual = build_features(full, row_features, path=path)
+    expected = add_recent_form_features(row_features(full.copy()))
+    assert_same_features(actual, expected)
+    assert len(load_feature_store(path)) == len(full)
+
+
+def test_feature_store_reuses_unchanged_rows(tmp_path, make_matches):
+    """Test that a second run over identical data reads every row from the store."""
+    path = str(tmp_path / "features")
+    df = make_matches(n=400, **RAW_DATES)
+    first = build_features(df, row_features, path=path)
+    mtime = (tmp_path / "features" / "meta.json").stat().st_mtime_ns
+    second = build_features(df, row_features, path=path)
+    assert_same_features(second, first)
+    assert (tmp_path / "features" / "meta.json").stat().st_mtime_ns == mtime
+
+
+def test_feature_store_round_trips_column_types(tmp_path):
+    """Test that every column kind reads back unchanged, and columns can be read alone."""
+    path = str(tmp_path / "features")
+    frame = pd.DataFrame(
+        {
+            "match_key": ["id:1", "id:2", "id:3"],
+            "date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"]),
+            "League": ["A", "B", "A"],
+            "team1_rank": [3, "", None],
+            "match_id": pd.array([1, None, 3], dtype="Int64"),
+            "is_cup": pd.array([True, None, False], dtype="boolean"),
+            "home_win": [1.5, float("nan"), 2.0],
+        }
+    ).set_index("match_key", drop=False)
+    save_feature_store(frame, "v1", path)
+    pd.testing.assert_frame_equal(load_feature_store(path, "v1"), frame)
+    assert load_feature_store(path, "v2") is None
+    subset = load_feature_store(path, columns=["home_win"])
+    assert list(subset.columns) == ["match_key", "home_win"]
@@ -0,0 +1,61 @@
+from src.features import TeamHistoryIndex, add_recent_form_features, add_recent_form_to_upcoming
+
+import pandas as pd
+
+
+def reference_recent_form(df, team, date, group, n_games=5):
+    """Brute-force last-N points and goals for a team before the given date."""
+    prev = df[
+        (df["League"] == group)
+        & ((df["team1"] == team) | (df["team2"] == team))
+        & (df["date"] < date)
+    ].tail(n_games)
+    points = goals = 0
+    for _, g in prev.iterrows():
+        own, opp = (
+            (g["Team1Goals"], g["Team2Goals"])
+            if g["team1"] == team
+            else (g["Team2Goals"], g["Team1Goals"])
+        )
+        goals += own
+        points += 3 if own > opp else 1 if own == opp else 0
+    return points / n_games, goals / n_games
+
+
+def test_recent_form_matches_reference(make_matches):
+    """Test that the vectorized recent form equals a row-by-row computation."""
+    df = add_recent_form_features(make_matches())
+    for _, row in df.iterrows():
+        for side in ("team1", "team2"):
+            points, goals = reference_recent_form(df, row[side], row["date"], row["League"])
+            assert row[f"{side}_last5_avg_points"] == points
+            assert row[f"{side}_last5_avg_goals"] == goals
+
+
+def test_recent_form_first_game_is_zero(make_matches):
+    """Test that a team's first game in a group has no recent form."""
+    df = add_recent_form_features(make_matches(n=1))
+    assert df[["team1_last5_avg_points", "team2_last5_avg_goals"]].iloc[0].tolist() == [0, 0]
+
+
+def test_team_history_index_matches_reference(make_matches):
+    """Test that indexed upcoming form equals a scan over the historical matches."""
+    history = make_matches()
+    upcoming = pd.DataFrame(
+        {
+            "League": ["A", "B", "A", "C"],
+            "home_name": ["a", "b", "c", "a"],
+            "away_name": ["g", "h", "i", "g"],
+            "date": ["15/01/2025", "01/02/2025", "01/01/2025", "15/01/2025"],
+        }
+    )
+    index = TeamHistoryIndex(history)
+    df = add_recent_form_to_upcoming(upcoming, index)
+    history = history.sort_values("date", kind="stable")
+    for _, row in df.iterrows():
+        points, goals = reference_recent_form(history, row["home_name"], row["date"], row["League"])
+        assert row["team1_last5_avg_points"] == points
+        assert row["team1_last5_avg_goals"] == goals
+        points, goals = reference_recent_form(history, row["away_name"], row["date"], row["League"])
+        assert row["team2_last5_avg_points"] == points
+        assert row["team2_last5_avg_goals"] == goals
@@ -0,0 +1,30 @@
+from src.fingerprint import data_digest, is_up_to_date, save_fingerprint, stage_fingerprint
+from src.match_store import append_segment
+from src.utils import save_json
+
+
+def test_stage_fingerprint_tracks_inputs(tmp_path):
+    """Test that the stage fingerprint changes with any of its inputs."""
+    json_path = str(tmp_path / "matches_raw.json")
+    ingest_dir = str(tmp_path / "ingest")
+    save_json([{"match_id": 1}], json_path)
+    before = stage_fingerprint(data=data_digest(json_path, ingest_dir), config={"a": 1})
+
+    assert before == stage_fingerprint(data=data_digest(json_path, ingest_dir), config={"a": 1})
+    assert before != stage_fingerprint(data=data_digest(json_path, ingest_dir), config={"a": 2})
+    append_segment([{"match_id": 2}], ingest_dir=ingest_dir)
+    assert before != stage_fingerprint(data=data_digest(json_path, ingest_dir), config={"a": 1})
+
+
+def test_is_up_to_date_requires_outputs(tmp_path):
+    """Test that a matching fingerprint is not up to date when outputs are missing."""
+    path = str(tmp_path / "stage_fingerprint.json")
+    output = tmp_path / "out.json"
+    assert not is_up_to_date(path, "abc")
+
+    save_fingerprint(path, "abc")
+    assert is_up_to_date(path, "abc")
+    assert not is_up_to_date(path, "abd")
+    assert not is_up_to_date(path, "abc", [str(output)])
+    output.write_text("{}")
+    assert is_up_to_date(path, "abc", [str(output)])
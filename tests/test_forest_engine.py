@@ -0,0 +1,34 @@
+from sklearn.ensemble import RandomForestClassifier
+from src.forest_engine import CompiledForest
+
+import numpy as np
+
+
+def test_compiled_forest_matches_sklearn():
+    """Test that the compiled forest gives sklearn's probabilities."""
+    rng = np.random.RandomState(0)
+    X = rng.randn(400, 6)
+    y = np.where(X[:, 0] + X[:, 1] > 0, "H", np.where(X[:, 2] > 0.5, "D", "A"))
+    model = RandomForestClassifier(n_estimators=25, min_samples_leaf=2, random_state=0)
+    model.fit(X, y)
+    engine = CompiledForest.from_forest(model)
+
+    X_test = rng.randn(300, 6)
+    X_test[::5, 1] = np.nan
+    np.testing.assert_allclose(engine.predict_proba(X_test), model.predict_proba(X_test))
+    np.testing.assert_array_equal(engine.predict(X_test), model.predict(X_test))
+    np.testing.assert_allclose(engine.predict_proba(X_test[:1]), model.predict_proba(X_test[:1]))
+
+
+def test_compiled_forest_handles_multi_output():
+    """Test that the compiled forest gives one probability array per output."""
+    rng = np.random.RandomState(1)
+    X = rng.randn(300, 4)
+    Y = np.column_stack([X[:, 0] > 0, (X[:, 1] > 0).astype(int) + (X[:, 2] > 1)])
+    model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X, Y)
+    engine = CompiledForest.from_forest(model)
+
+    X_test = rng.randn(50, 4)
+    for ours, theirs in zip(engine.predict_proba(X_test), model.predict_proba(X_test)):
+        np.testing.assert_allclose(ours, theirs)
+    np.testing.assert_array_equal(engine.predict(X_test), model.predict(X_test))
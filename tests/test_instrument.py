@@ -0,0 +1,32 @@
+from src import instrument
+from src.instrument import instrumented, set_rows, span, start_run, write_report
+
+import os
+
+
+@instrumented(rows=len)
+def _build(n):
+    return list(range(n))
+
+
+def test_spans_nest_and_write_a_report(tmp_path, monkeypatch):
+    """Test that spans nest under their stage and are written to the report."""
+    monkeypatch.setattr(instrument, "PROFILE_DIR", str(tmp_path / "profiles"))
+    assert _build(3) == [0, 1, 2]
+
+    start_run("full", profile="train", trace_memory=True)
+    with span("train"):
+        set_rows(7)
+        _build(100_000)
+    with span("predict"):
+        pass
+    report = write_report(str(tmp_path / "run.json"))
+
+    assert [s["path"] for s in report["spans"]] == ["train", "train/_build", "predict"]
+    train, build, _ = report["spans"]
+    assert train["rows"] == 7 and build["rows"] == 100_000
+    assert build["peak_growth_mb"] > 1 and train["peak_traced_mb"] >= build["peak_traced_mb"]
+    assert train["seconds"] >= build["seconds"]
+    assert os.path.exists(train["profile"]) and "profile" not in build
+    assert os.path.exists(tmp_path / "run.json")
+    assert write_report(str(tmp_path / "again.json")) is None
@@ -0,0 +1,147 @@
+from src.match_store import (
+    append_segment,
+    compact_segments,
+    load_match_ids,
+    pending_segments,
+    read_match_records,
+    read_matches,
+    read_missing_mask,
+)
+from src.utils import load_json, save_json
+
+import os
+import pandas as pd
+import pytest
+
+RECORDS = [
+    {
+        "date": "15/08/2025",
+        "time": "19:00",
+        "league": "Premier League",
+        "is_cup": False,
+        "team1": "Liverpool",
+        "team2": "AFC Bournemouth",
+        "team1_goals": 4,
+        "team2_goals": 2,
+        "team1_rank": 3,
+        "odds": {"home_win": 1.3, "draw": 6.0, "away_win": 8.6},
+    },
+    {
+        "match_id": 964116,
+        "date": "14/09/2025",
+        "time": "15:00",
+        "league": "Primeira Liga",
+        "is_cup": True,
+        "team1": "Porto",
+        "team2": "Nacional",
+        "team1_goals": 2,
+        "team2_goals": 0,
+        "team1_rank": None,
+        "odds": {"home": 1.2, "draw": 6.5, "away": 14.0},
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # Readers default to data/raw/ingest; keep the repo's pending segments out of these tests.
+    monkeypatch.chdir(tmp_path)
+
+
+def write_json(tmp_path, records):
+    path = tmp_path / "matches_raw.json"
+    save_json(records, path)
+    return str(path), str(tmp_path / "matches")
+
+
+def test_match_store_round_trip(tmp_path):
+    """Test that the compatibility reader returns the original JSON records."""
+    json_path, store_dir = write_json(tmp_path, RECORDS)
+    assert read_match_records(store_dir=store_dir, json_path=json_path) == RECORDS
+
+
+def test_match_store_projection_and_types(tmp_path):
+    """Test that projected reads return typed, flattened columns."""
+    json_path, store_dir = write_json(tmp_path, RECORDS)
+    df = read_matches(
+        columns=["date", "league", "odds_draw", "match_id"],
+        store_dir=store_dir,
+        json_path=json_path,
+    )
+    assert list(df.columns) == ["date", "league", "odds_draw", "match_id"]
+    assert df["date"].iloc[0] == pd.Timestamp("2025-08-15")
+    assert isinstance(df["league"].dtype, pd.CategoricalDtype)
+    assert df["odds_draw"].tolist() == [6.0, 6.5]
+    assert df["match_id"].isna().tolist() == [True, False]
+    assert read_missing_mask("match_id", store_dir).tolist() == [True, False]
+
+
+def test_match_store_reconverts_when_json_changes(tmp_path):
+    """Test that a stale store is rebuilt after the JSON file changes."""
+    json_path, store_dir = write_json(tmp_path, RECORDS[:1])
+    assert len(read_matches(store_dir=store_dir, json_path=json_path)) == 1
+    write_json(tmp_path, RECORDS)
+    assert len(read_matches(store_dir=store_dir, json_path=json_path)) == 2
+
+
+def test_match_store_reconverts_after_same_size_edit(tmp_path):
+    """Test that an edit keeping the JSON file size still rebuilds the store."""
+    json_path, store_dir = write_json(tmp_path, RECORDS)
+    assert read_matches(columns=["team1_goals"], store_dir=store_dir, json_path=json_path)[
+        "team1_goals"
+    ].tolist() == [4, 2]
+    edited = [{**RECORDS[0], "team1_goals": 3}, RECORDS[1]]
+    size = os.path.getsize(json_path)
+    write_json(tmp_path, edited)
+    assert os.path.getsize(json_path) == size
+    # Coarse filesystem timestamps could leave the mtime unchanged; keep it apart.
+    os.utime(json_path, ns=(0, 0))
+    df = read_matches(columns=["team1_goals"], store_dir=store_dir, json_path=json_path)
+    assert df["team1_goals"].tolist() == [3, 2]
+
+
+def test_mixed_type_column_keeps_missing_values(tmp_path):
+    """Test that None in a mixed-type column reads back as missing, not "None"."""
+    records = [{**RECORDS[0], "round": 5}, {**RECORDS[1], "round": "Final"}, {**RECORDS[1]}]
+    records[2]["round"] = None
+    json_path, store_dir = write_json(tmp_path, records)
+    df = read_matches(columns=["round"], store_dir=store_dir, json_path=json_path)
+    assert df["round"].tolist()[:2] == ["5", "Final"]
+    assert pd.isna(df["round"].iloc[2])
+
+
+def test_ingest_segments_are_read_and_compacted(tmp_path):
+    """Test that appended segments are visible before and after compaction."""
+    json_path, store_dir = write_json(tmp_path, RECORDS[:1])
+    ingest_dir = str(tmp_path / "ingest")
+    paths = dict(store_dir=store_dir, json_path=json_path, ingest_dir=ingest_dir)
+    assert load_match_ids(**paths) == set()
+
+    append_segment(RECORDS[1:], ingest_dir=ingest_dir)
+    assert load_match_ids(**paths) == {"964116"}
+    assert read_matches(columns=["team1"], **paths)["team1"].tolist() == ["Liverpool", "Porto"]
+    assert read_match_records(**paths) == RECORDS
+
+    assert compact_segments(**paths) == 1
+    assert pending_segments(ingest_dir) == []
+    assert load_json(json_path) == RECORDS
+    assert read_match_records(**paths) == RECORDS
+
+
+def test_interrupted_compaction_does_not_duplicate(tmp_path):
+    """Test that segment records already folded into the JSON are not read twice."""
+    json_path, store_dir = write_json(tmp_path, RECORDS)
+    ingest_dir = str(tmp_path / "ingest")
+    append_segment(RECORDS[1:], ingest_dir=ingest_dir)
+    df = read_matches(store_dir=store_dir, json_path=json_path, ingest_dir=ingest_dir)
+    assert len(df) == 2
+
+
+def test_compaction_without_json_starts_empty(tmp_path):
+    """Test that compacting before matches_raw.json exists writes the segments as history."""
+    json_path, store_dir = str(tmp_path / "matches_raw.json"), str(tmp_path / "matches")
+    ingest_dir = str(tmp_path / "ingest")
+    append_segment(RECORDS, ingest_dir=ingest_dir)
+    assert compact_segments(json_path, store_dir, ingest_dir) == 2
+    assert load_json(json_path) == RECORDS
+    assert read_match_records(store_dir=store_dir, json_path=json_path) == RECORDS
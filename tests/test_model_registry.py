@@ -0,0 +1,50 @@
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from src.model_registry import ModelRegistry
+from src.model_store import save_bundle, write_manifest
+
+import os
+import numpy as np
+
+
+def _write(model_dir, names, n_estimators, manifest=True):
+    rng = np.random.default_rng(n_estimators)
+    X, y = rng.random((40, 2)), rng.integers(0, 2, 40)
+    shared = {
+        "feature_columns": ["a", "b"],
+        "scaler": StandardScaler().fit(X),
+        "le_league": LabelEncoder().fit(["L1"]),
+    }
+    entries = {}
+    for name in names:
+        path = os.path.join(model_dir, f"bundle_{name}.pkl")
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=0).fit(X, y)
+        entries[name] = {"path": path, "preprocess": save_bundle({"model": model, **shared}, path)}
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + n_estimators * 10**9))
+    if manifest:
+        write_manifest(model_dir, entries)
+
+
+def test_refresh_swaps_whole_model_set_only_when_files_change(tmp_path):
+    """Test that refresh swaps in a whole new model set only when files change."""
+    model_dir = str(tmp_path)
+    registry = ModelRegistry(model_dir, targets=["Winner", "BTTS"])
+    _write(model_dir, ["Winner", "BTTS"], n_estimators=3)
+    assert registry.refresh()
+    first = registry.current
+    assert first.info()["models"]["Winner"]["n_trees"] == 3
+    assert first.bundles["Winner"]["scaler"] is first.bundles["BTTS"]["scaler"]
+    assert not registry.refresh()
+
+    # Bundles rewritten but the manifest not yet: a retrain in progress keeps the old set.
+    _write(model_dir, ["Winner", "BTTS"], n_estimators=5, manifest=False)
+    assert not registry.refresh()
+    assert registry.current is first
+
+    _write(model_dir, ["Winner", "BTTS"], n_estimators=5)
+    assert registry.refresh()
+    assert registry.current.generation == first.generation + 1
+    assert registry.current.fingerprint != first.fingerprint
+    assert len(first.bundles["Winner"]["model"].estimators_) == 3
+    assert "engine" in registry.current.bundles["BTTS"]
@@ -0,0 +1,69 @@
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from src.model_store import PREPROCESS_DIR, BundleLoader, save_bundle, write_manifest
+
+import joblib
+import os
+import numpy as np
+
+
+def _shared(offset=0.0):
+    scaler = StandardScaler().fit(np.array([[0.0, 1.0], [2.0, 3.0 + offset]]))
+    return {
+        "feature_columns": ["a", "b"],
+        "scaler": scaler,
+        "le_league": LabelEncoder().fit(["L1", "L2"]),
+    }
+
+
+def test_bundles_share_one_preprocess_artifact(tmp_path):
+    """Test that bundles of one run share a single preprocess artifact."""
+    model_dir = str(tmp_path)
+    shared = _shared()
+    entries = {}
+    for name in ("Winner", "BTTS"):
+        path = os.path.join(model_dir, f"bundle_{name}.pkl")
+        digest = save_bundle({"model": name, "encoder": None, **shared}, path)
+        entries[name] = {"path": path, "preprocess": digest}
+        assert "scaler" not in joblib.load(path)
+    assert len(os.listdir(os.path.join(model_dir, PREPROCESS_DIR))) == 1
+
+    manifest = write_manifest(model_dir, entries)
+    assert set(manifest["models"]) == {"Winner", "BTTS"}
+    assert len(manifest["preprocess"]) == 1
+
+    loader = BundleLoader(model_dir)
+    winner = loader.load(entries["Winner"]["path"])
+    btts = loader.load(entries["BTTS"]["path"])
+    assert winner["model"] == "Winner" and winner["feature_columns"] == ["a", "b"]
+    assert winner["scaler"] is btts["scaler"]
+    np.testing.assert_array_equal(winner["scaler"].mean_, shared["scaler"].mean_)
+
+
+def test_manifest_keeps_referenced_artifacts_and_loads_legacy_bundles(tmp_path):
+    """Test that the manifest keeps referenced artifacts and legacy bundles still load."""
+    model_dir = str(tmp_path)
+    old_path = os.path.join(model_dir, "bundle_Winner.pkl")
+    new_path = os.path.join(model_dir, "bundle_BTTS.pkl")
+    old = save_bundle({"model": 1, **_shared()}, old_path)
+    new = save_bundle({"model": 2, **_shared(offset=1.0)}, new_path)
+    entries = {
+        "Winner": {"path": old_path, "preprocess": old},
+        "BTTS": {"path": new_path, "preprocess": new},
+    }
+    write_manifest(model_dir, entries)
+    assert sorted(os.listdir(os.path.join(model_dir, PREPROCESS_DIR))) == sorted(
+        [f"{old}.pkl", f"{new}.pkl"]
+    )
+
+    assert save_bundle({"model": 3, **_shared(offset=1.0)}, old_path) == new
+    entries["Winner"]["preprocess"] = new
+    write_manifest(model_dir, entries)
+    assert os.listdir(os.path.join(model_dir, PREPROCESS_DIR)) == [f"{new}.pkl"]
+    assert not any(f.endswith(".tmp") for f in os.listdir(model_dir))
+
+    manifest = write_manifest(model_dir, {"BTTS": entries["BTTS"]})
+    assert set(manifest["models"]) == {"BTTS"}
+
+    legacy_path = os.path.join(model_dir, "bundle_legacy.pkl")
+    joblib.dump({"model": 4, **_shared()}, legacy_path)
+    assert BundleLoader(model_dir).load(legacy_path)["feature_columns"] == ["a", "b"]
@@ -0,0 +1,68 @@
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from src.features import TeamHistoryIndex
+from src.predict import build_feature_frame, prepare_features, project_features
+
+import numpy as np
+import pandas as pd
+
+
+def _games():
+    game = {
+        "date": "20/10/2025",
+        "league_id": 228,
+        "home_name": "Liverpool",
+        "away_name": "Arsenal",
+        "odds": {"home": 2.1, "draw": 3.4, "away": 3.5},
+        "team1_rank": 1,
+        "team2_rank": 2,
+        "h2h_games_played": 4,
+        "h2h_team1_wins": 2,
+        "h2h_team2_wins": 1,
+        "h2h_draws": 1,
+        "h2h_team1_scored": 6,
+        "h2h_team2_scored": 4,
+    }
+    for side in ("team1_home", "team2_home"):
+        for stat in ("wins", "draws", "losses", "scored", "conceded"):
+            game[f"h2h_{side}_{stat}"] = 1
+    return [
+        game,
+        {
+            **game,
+            "home_name": "Arsenal",
+            "away_name": "Liverpool",
+            "team1_rank": 2,
+            "team2_rank": 1,
+        },
+    ]
+
+
+def test_shared_frame_matches_per_bundle_preparation():
+    """Test that the shared feature frame gives the same predictions as per-bundle preparation."""
+    history = TeamHistoryIndex(
+        pd.DataFrame(
+            {
+                "date": ["01/10/2025", "08/10/2025"],
+                "league": ["Premier League"] * 2,
+                "team1": ["Liverpool", "Arsenal"],
+                "team2": ["Arsenal", "Liverpool"],
+                "team1_goals": [2, 1],
+                "team2_goals": [0, 1],
+            }
+        )
+    )
+    le_league = LabelEncoder().fit(["Premier League", "Serie A"])
+    columns = ["Rank_Diff", "League_Encoded", "team1_last5_avg_points", "home_win", "missing"]
+    scaler = StandardScaler().fit(
+        pd.DataFrame(np.random.RandomState(0).rand(10, len(columns)), columns=columns)
+    )
+
+    frame = build_feature_frame(_games(), le_league, history)
+    X = project_features(frame, columns, scaler)
+    expected = prepare_features(_games(), columns, scaler, {"le_league": le_league}, history)
+    pd.testing.assert_frame_equal(X, expected)
+
+    raw = project_features(frame, columns)
+    assert raw["Rank_Diff"].tolist() == [-1, 1]
+    assert raw["missing"].tolist() == [0, 0]
+    assert raw["team1_last5_avg_points"].tolist() == [4 / 5, 1 / 5]
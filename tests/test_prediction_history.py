@@ -0,0 +1,67 @@
+from src.prediction_history import PredictionHistory
+from src.utils import load_json, save_json
+
+import json
+import os
+
+
+def _record(match_id, confidence=0.5):
+    return {
+        "match_id": match_id,
+        "home_team": "A",
+        "away_team": "B",
+        "predictions": {"winner": {"class": 0, "confidence": confidence}},
+        "finished": False,
+    }
+
+
+def test_history_imports_legacy_json_and_updates_flags_in_place(tmp_path):
+    """Test that the legacy JSON is imported unfinished and exports in its original layout."""
+    legacy = str(tmp_path / "history.json")
+    save_json([_record(1), _record(2), {**_record(1, 0.7), "finished": True}], legacy)
+    db = str(tmp_path / "history.sqlite")
+
+    with PredictionHistory(db, legacy_json=legacy) as history:
+        assert [(r["match_id"], r["run"]) for r in history] == [
+            (1, "legacy-001"),
+            (2, "legacy-001"),
+            (1, "legacy-002"),
+        ]
+        assert history.get(1, "legacy-002")["finished"] is False
+        history.append("2025-11-01T09:00:00", [_record(3), _record(1, 0.9)])
+        assert len(history) == 5
+        assert history.set_finished(3, "2025-11-01T09:00:00")
+        assert not history.set_finished(3, "2025-11-01T09:00:00")
+        assert [r["match_id"] for r in history.stream(finished=True)] == [3]
+        assert history.export_json(legacy) == 5
+
+    exported = load_json(legacy)
+    assert [list(r)[-1] for r in exported] == ["finished"] * 5
+    assert not any("run" in r for r in exported)
+    assert [r["finished"] for r in exported] == [False, False, False, True, False]
+    assert exported[3]["predictions"]["winner"]["confidence"] == 0.5
+    with open(legacy, encoding="utf-8") as f:
+        assert f.read() == json.dumps(exported, ensure_ascii=False, indent=2)
+    with PredictionHistory(db, legacy_json=legacy) as history:
+        assert len(history) == 5
+    assert not os.path.exists(db + "-wal") or os.path.getsize(db + "-wal") == 0
+
+
+def test_history_keeps_outcomes_of_finished_records(tmp_path):
+    """Test that finished records keep their outcomes and feed the per-market totals."""
+    with PredictionHistory(str(tmp_path / "history.sqlite"), legacy_json=None) as history:
+        history.append("run-1", [_record(1), _record(2), _record(3)])
+        results = [(1, "run-1", {"winner": 1, "btts": 0}), (2, "run-1", {"winner": 0})]
+        assert history.mark_finished_many(results) == 2
+        assert history.mark_finished_many(results) == 0
+        assert [r["match_id"] for r in history.stream(finished=False)] == [3]
+        assert history.outcome_totals() == {"winner": (1, 2), "btts": (0, 1)}
+
+
+def test_history_indexes_finished_flag(tmp_path):
+    """Test that queries on the finished flag use its index."""
+    with PredictionHistory(str(tmp_path / "history.sqlite"), legacy_json=None) as history:
+        plan = history._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT payload FROM predictions WHERE finished = 0"
+        ).fetchall()
+        assert "predictions_finished" in " ".join(str(row[-1]) for row in plan)
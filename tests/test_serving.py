@@ -0,0 +1,66 @@
+from benchmarks.synthetic import generate_matches
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from src.forest_engine import CompiledForest
+from src.predict import predict_games
+from src.serving import FixtureContext, predict_matches
+
+import copy
+import numpy as np
+import pandas as pd
+
+
+def _bundles(leagues, columns, rng):
+    X = rng.normal(size=(200, len(columns)))
+    scaler = StandardScaler().fit(pd.DataFrame(X * 3 + 1, columns=columns))
+    shared = {
+        "feature_columns": columns,
+        "scaler": scaler,
+        "le_league": LabelEncoder().fit(leagues),
+    }
+    bundles = {}
+    for name in ("Winner", "BTTS"):
+        model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0)
+        model.fit(X, rng.integers(0, 3 if name == "Winner" else 2, len(X)))
+        bundles[name] = {"model": model, "engine": CompiledForest.from_forest(model), **shared}
+    return bundles
+
+
+def test_fast_path_matches_batch_prediction_path():
+    """Test that the NumPy fast path gives the same records as predict_games."""
+    df = generate_matches(3000, n_leagues=2)
+    context = FixtureContext(df)
+    last = df.iloc[-1]
+    pair = context.h2h[(last["league"], last["team1"], last["team2"])]
+    swapped = context.h2h[(last["league"], last["team2"], last["team1"])]
+    assert pair["h2h_team1_wins"] == last["h2h_team1_wins"] == swapped["h2h_team2_wins"]
+    assert pair["h2h_team2_home_scored"] == swapped["h2h_team1_home_scored"]
+
+    rows = df.tail(30)
+    matches = [
+        {
+            "match_id": i,
+            "date": "01/06/2026",
+            "time": "20:00",
+            "league": row.league,
+            "home_team": row.team1,
+            "away_team": row.team2 if i % 5 else "Unknown FC",
+            "odds": (
+                {"home": row.home_win, "draw": row.draw, "away": row.away_win} if i % 4 else None
+            ),
+        }
+        for i, row in enumerate(rows.itertuples())
+    ]
+    columns = ["team1_rank", "Rank_Diff", "League_Encoded", "h2h_team1_wins", "home_win"]
+    columns += ["team2_last5_avg_points", "team1_last5_avg_goals"]
+    bundles = _bundles(df["league"].unique(), columns, np.random.default_rng(0))
+
+    records = predict_matches(bundles, context, copy.deepcopy(matches))
+    games = predict_games(bundles, [context.game(m) for m in matches], context.history)
+    for record, game in zip(records, games):
+        assert record["predictions"]["winner"]["class"] == game["prediction_Winner"]
+        assert record["predictions"]["btts"]["class"] == game["prediction_BTTS"]
+        np.testing.assert_allclose(
+            record["predictions"]["winner"]["confidence"], game["confidence_Winner"]
+        )
+        assert record["odds"]["home"] == (game["home_win"] if game["odds"] else None)
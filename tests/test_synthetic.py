@@ -0,0 +1,28 @@
+from benchmarks.synthetic import generate_matches, write_matches_raw
+from src.utils import load_json
+
+import pandas as pd
+
+
+def test_generated_matches_are_consistent(tmp_path):
+    """Test that generated matches have ordered dates, consistent h2h stats and valid odds."""
+    df = generate_matches(3000, teams_per_league=10, seed=1)
+    assert len(df) == 3000
+    dates = pd.to_datetime(df["date"], dayfirst=True)
+    assert dates.is_monotonic_increasing
+    assert (df["team1"] != df["team2"]).all()
+
+    h2h = df.filter(like="h2h_")
+    assert (h2h >= 0).all().all()
+    assert (
+        df["h2h_team1_wins"] + df["h2h_team2_wins"] + df["h2h_draws"] == df["h2h_games_played"]
+    ).all()
+    first = df.drop_duplicates(["league", "team1", "team2"])
+    assert (first["h2h_team1_home_wins"] + first["h2h_team1_home_losses"] == 0).all()
+    assert ((1 / df[["home_win", "draw", "away_win"]]).sum(axis=1) > 1).all()
+
+    path = str(tmp_path / "matches_raw.json")
+    write_matches_raw(df.head(5), path)
+    record = load_json(path)[0]
+    assert set(record["odds"]) == {"home_win", "draw", "away_win"}
+    assert record["date"] == df["date"].iloc[0] and "home_win" not in record
@@ -0,0 +1,188 @@
+from datetime import date, timedelta
+from src import train
+from src.train import (
+    fold_indices,
+    full_retrain_due,
+    parallel_plan,
+    train_multi_output,
+    train_target,
+    warm_start_target,
+)
+from src.tune import sample_candidates, successive_halving
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_parallel_plan_never_oversubscribes():
+    """Test that the parallel plan never uses more cores than n_jobs."""
+    for n_jobs in range(1, 33):
+        workers, cv_jobs, tree_jobs = parallel_plan(n_jobs, n_targets=5, cv_folds=5)
+        assert workers <= 5
+        assert workers * cv_jobs * tree_jobs <= n_jobs
+    assert parallel_plan(16, 5, 5) == (5, 3, 1)
+    assert parallel_plan(16, 5, 5, parallelism="trees") == (1, 1, 16)
+    assert parallel_plan(None, 5, 5) == (1, 1, 1)
+
+
+def test_parallel_plan_rejects_unknown_mode():
+    """Test that an unknown parallelism mode raises ValueError."""
+    with pytest.raises(ValueError):
+        parallel_plan(4, 5, 5, parallelism="folds")
+
+
+def test_train_target_pools_fold_forests_and_scores_out_of_fold():
+    """Test that train_target pools the fold forests and scores out of fold."""
+    rng = np.random.RandomState(0)
+    X = pd.DataFrame(rng.rand(300, 4), columns=list("abcd"))
+    y = pd.Series(np.where(X["a"] + 0.1 * rng.rand(300) > 0.5, "H", "A"), dtype=object)
+    folds = fold_indices(len(X), 5, random_seed=42)
+    params = {"n_estimators": 20, "max_depth": 3, "min_samples_leaf": 5}
+
+    model, encoder, metrics, _ = train_target("Winner", X, y, folds, params, 42)
+
+    assert sorted(np.concatenate([val for _, val in folds])) == list(range(300))
+    assert len(model.estimators_) == 20
+    assert list(encoder.classes_) == ["A", "H"]
+    assert set(metrics) == {
+        "cv_mean_accuracy",
+        "cv_std_accuracy",
+        "train_accuracy",
+        "val_accuracy",
+        "cv_trees_per_fold",
+    }
+    assert metrics["cv_trees_per_fold"] == 4
+    assert metrics["val_accuracy"] > 0.8
+
+    again = train_target("Winner", X, y, folds, {**params, "final_model": "pooled"}, 42)
+    np.testing.assert_array_equal(model.predict_proba(X), again[0].predict_proba(X))
+
+
+def test_train_multi_output_predicts_every_target_in_one_pass():
+    """Test that the multi-output model predicts every target in one pass."""
+    rng = np.random.RandomState(1)
+    X = pd.DataFrame(rng.rand(300, 3), columns=list("abc"))
+    targets = pd.DataFrame(
+        {
+            "Winner": np.where(X["a"] > 0.5, "1", "2").astype(object),
+            "BTTS": (X["b"] > 0.3).astype(int),
+        }
+    )
+    folds = fold_indices(len(X), 3, random_seed=0)
+    params = {"n_estimators": 9, "max_depth": 3, "min_samples_leaf": 5}
+
+    model, encoders, metrics, _ = train_multi_output(
+        ["Winner", "BTTS"], X, targets, folds, params, 0
+    )
+
+    probs = model.predict_proba(X)
+    assert len(probs) == 2 and len(model.estimators_) == 9
+    assert encoders["BTTS"] is None and list(encoders["Winner"].classes_) == ["1", "2"]
+    assert metrics["Winner"]["val_accuracy"] > 0.8 and metrics["BTTS"]["val_accuracy"] > 0.8
+
+
+def test_warm_start_target_adds_trees_and_retires_oldest():
+    """Test that warm starting adds trees for new rows and retires the oldest."""
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    rng = np.random.RandomState(2)
+    raw = pd.DataFrame(rng.rand(400, 2), columns=["a", "League_Encoded"])
+    scaler = StandardScaler().fit(raw)
+    X = pd.DataFrame(scaler.transform(raw), columns=raw.columns)
+    y = pd.Series(np.where(raw["a"] > 0.5, "1", "2").astype(object))
+    le_league = LabelEncoder().fit(["A", "B"])
+    params = {"n_estimators": 10, "max_depth": 3, "min_samples_leaf": 5}
+    model, encoder, metrics, _ = train_target("Winner", X, y, fold_indices(400, 5, 0), params, 0)
+    bundle = {
+        "model": model,
+        "feature_columns": list(X.columns),
+        "scaler": scaler,
+        "le_league": le_league,
+        "encoder": encoder,
+    }
+    new_mask = np.arange(400) >= 350
+    dates = np.arange(400)
+    settings = {"new_trees": 5, "max_trees": 12, "window_rows": 100}
+
+    updated, new_metrics = warm_start_target(
+        "Winner", bundle, X, y, new_mask, dates, scaler, le_league, metrics, settings
+    )
+
+    assert len(updated["model"].estimators_) == 12
+    assert new_metrics["training_mode"] == "incremental" and new_metrics["new_rows"] == 50
+    assert new_metrics["val_accuracy"] == metrics["val_accuracy"]
+    assert new_metrics["full_val_accuracy"] == metrics["val_accuracy"]
+    assert 0 <= new_metrics["new_rows_accuracy"] <= 1
+
+    _, again = warm_start_target(
+        "Winner", updated, X, y, new_mask, dates, scaler, le_league, new_metrics, settings
+    )
+    assert again["full_val_accuracy"] == metrics["val_accuracy"]
+
+    unchanged, _ = warm_start_target(
+        "Winner", updated, X, y, np.zeros(400, dtype=bool), dates, scaler, le_league, metrics, {}
+    )
+    assert unchanged is updated
+    other_leagues = LabelEncoder().fit(["A", "B", "C"])
+    reason = warm_start_target(
+        "Winner", updated, X, y, new_mask, dates, scaler, other_leagues, metrics, {}
+    )
+    assert reason == "league encoding changed"
+
+
+def test_successive_halving_keeps_the_best_candidate_and_respects_the_budget():
+    """Test that successive halving keeps the best candidate within the budget."""
+    rng = np.random.RandomState(2)
+    X = rng.rand(240, 3)
+    y = (X[:, 0] > 0.5).astype(int)
+    folds = fold_indices(len(X), 3, random_seed=0)
+    space = {"max_depth": [1, 4], "min_samples_leaf": [1, 100]}
+    candidates = sample_candidates(space, 4, {"max_depth": 1, "min_samples_leaf": 100}, 0)
+    assert candidates[0] == {"max_depth": 1, "min_samples_leaf": 100}
+    assert len({repr(sorted(c.items())) for c in candidates}) == 4
+
+    best, score, rungs = successive_halving(X, y, folds, candidates, 0, 3, 27, eta=2)
+    assert [r["candidates"] for r in rungs] == [4, 2, 1]
+    assert best["min_samples_leaf"] == 1 and rungs[-1]["n_estimators"] == 12
+    assert score > 0.9
+
+    _, _, rungs = successive_halving(X, y, folds, candidates, 0, 3, 27, eta=2, deadline=0)
+    assert len(rungs) == 1
+
+
+def test_full_retrain_due_after_full_every_days():
+    """Test that a full retrain falls due full_every_days after the last one."""
+    last = {
+        "Winner": (date.today() - timedelta(days=7)).isoformat(),
+        "BTTS": (date.today() - timedelta(days=6)).isoformat(),
+    }
+    assert full_retrain_due(last, "Winner", 7)
+    assert not full_retrain_due(last, "BTTS", 7)
+    assert not full_retrain_due(last, "Over_2_5", 7)
+
+
+def test_train_model_runs_scheduled_full_retrain_on_unchanged_data(monkeypatch, tmp_path):
+    """Test that an up-to-date fingerprint does not skip a due full retrain."""
+
+    class Trained(Exception):
+        pass
+
+    def preprocess_data(*args, **kwargs):
+        raise Trained
+
+    config = {
+        "targets": ["Winner"],
+        "train_params": {"incremental": {"enabled": True, "full_every_days": 7}},
+        "paths": {"model_dir": str(tmp_path), "tuned_params": None},
+    }
+    last_full = {"Winner": (date.today() - timedelta(days=1)).isoformat()}
+    monkeypatch.setattr(train, "load_config", lambda: config)
+    monkeypatch.setattr(train, "load_train_state", lambda _: {"last_full_train": last_full})
+    monkeypatch.setattr(train, "is_up_to_date", lambda *args: True)
+    monkeypatch.setattr(train, "preprocess_data", preprocess_data)
+    assert train.train_model() is None
+
+    last_full["Winner"] = (date.today() - timedelta(days=7)).isoformat()
+    with pytest.raises(Trained):
+        train.train_model()